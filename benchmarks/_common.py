@@ -0,0 +1,75 @@
+import os
+import sys
+import contextlib
+import numpy as np
+from typing import Dict, List, Tuple
+from src.prob_model import LitBot
+
+@contextlib.contextmanager
+def quiet_stdout():
+    # keeps stray output, e.g. the legacy bot or a StreamSink on stdout, out of the timings
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+def percentile_summary(samples : List[float], scale : float = 1e6) -> Dict[str, float]:
+    samples = np.asarray(samples)*scale
+    return {
+        "p50" : float(np.percentile(samples, 50)),
+        "p95" : float(np.percentile(samples, 95)),
+        "p99" : float(np.percentile(samples, 99)),
+        "mean" : float(samples.mean()),
+    }
+
+def random_ask_game(seed : int, team_count : int, player_count : int, move_count : int) -> Tuple[LitBot, List[Dict]]:
+    # deals with initialize_fake_game and plays legal random asks against the true card locations
+    with quiet_stdout():
+        bot = LitBot(0, 0, team_count, player_count, fake_game_seed = seed)
+    card_location_array = bot._fake_initial_card_location_array.copy()
+    player_per_team_count = bot.player_per_team_count
+    rng = np.random.default_rng(seed)
+
+    game_action_dicts = []
+    for move_id in range(move_count):
+        holders = np.unique(card_location_array)
+        asker = int(rng.choice(holders))
+        opponents = [
+            player for player in range(player_count)
+            if player//player_per_team_count != asker//player_per_team_count and (card_location_array == player).any()
+        ]
+        if len(opponents) == 0:
+            break
+        held_sets = np.unique(np.argwhere(card_location_array == asker)[:, 0])
+        set_id = int(rng.choice(held_sets))
+        missing_cards = np.flatnonzero(card_location_array[set_id] != asker)
+        if len(missing_cards) == 0:
+            continue
+        card_id = int(rng.choice(missing_cards))
+        target = int(rng.choice(opponents))
+        result = int(card_location_array[set_id, card_id] == target)
+        if result == 1:
+            card_location_array[set_id, card_id] = asker
+
+        game_action_dicts.append({
+            move_id : {
+                "action" : "ask_card",
+                "by_team" : asker//player_per_team_count,
+                "by" : asker%player_per_team_count,
+                "to_team" : target//player_per_team_count,
+                "to" : target%player_per_team_count,
+                "set_id" : set_id,
+                "card_id" : card_id,
+                "result" : result
+            }
+        })
+
+    return bot, game_action_dicts
+
+def print_table(rows : List[Dict], file = sys.stdout) -> None:
+    if len(rows) == 0:
+        return
+    columns = list(rows[0].keys())
+    widths = [max(len(str(column)), *(len(f"{row[column]:.4g}" if isinstance(row[column], float) else str(row[column])) for row in rows)) for column in columns]
+    print("  ".join(str(column).rjust(width) for column, width in zip(columns, widths)), file=file)
+    for row in rows:
+        cells = [f"{row[column]:.4g}" if isinstance(row[column], float) else str(row[column]) for column in columns]
+        print("  ".join(cell.rjust(width) for cell, width in zip(cells, widths)), file=file)
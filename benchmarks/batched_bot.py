@@ -0,0 +1,78 @@
+import time
+import argparse
+import numpy as np
+from src.prob_model import LitBot, BatchedLitBot, MoveBatch
+from ._common import quiet_stdout, random_ask_game, print_table
+
+def build_games(game_count : int, team_count : int, player_count : int, move_count : int):
+    bots, games = [], []
+    for seed in range(game_count):
+        dealer, game_action_dicts = random_ask_game(seed, team_count, player_count, move_count)
+        team_id = seed%team_count
+        player_id = (seed//team_count)%dealer.player_per_team_count
+        with quiet_stdout():
+            bots.append(LitBot(team_id, player_id, team_count, player_count, fake_game_seed = seed))
+        games.append(game_action_dicts)
+    return bots, games
+
+def encode_batches(games, move_count : int):
+    return [
+        MoveBatch.from_action_dicts([game[move_idx] if move_idx < len(game) else None for game in games])
+        for move_idx in range(move_count)
+    ]
+
+def check_equivalence(bots, batched_bot : BatchedLitBot) -> None:
+    for game_idx, bot in enumerate(bots):
+        assert np.array_equal(bot.information_matrix, batched_bot.information_matrix[game_idx]), game_idx
+        assert np.array_equal(bot.player_card_count, batched_bot.player_card_count[game_idx]), game_idx
+        assert np.array_equal(bot.active_cards, batched_bot.active_cards[game_idx]), game_idx
+        assert np.array_equal(bot.recent_card_array, batched_bot.recent_card_array[game_idx]), game_idx
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="games*moves/sec of BatchedLitBot against per-game LitBot")
+    parser.add_argument("--games", type=int, nargs="+", default=[1, 8, 64, 512])
+    parser.add_argument("--moves", type=int, default=40)
+    parser.add_argument("--players", type=int, default=6)
+    parser.add_argument("--teams", type=int, default=2)
+    parser.add_argument("--litbot-max-games", type=int, default=64, help="per-game LitBot baseline is timed on at most this many games")
+    parser.add_argument("--check", action="store_true", help="replay every game through LitBot and compare the final state")
+    args = parser.parse_args()
+
+    rows = []
+    for game_count in args.games:
+        bots, games = build_games(game_count, args.teams, args.players, args.moves)
+        batches = encode_batches(games, args.moves)
+        applied_moves = sum(len(game) for game in games)
+
+        batched_bot = BatchedLitBot.from_bots(bots)
+        start = time.perf_counter()
+        for batch in batches:
+            batched_bot.update_game(batch)
+        batched_seconds = time.perf_counter() - start
+
+        baseline_count = min(game_count, args.litbot_max_games) if not args.check else game_count
+        baseline_moves = sum(len(game) for game in games[:baseline_count])
+        with quiet_stdout():
+            start = time.perf_counter()
+            for bot, game in zip(bots[:baseline_count], games[:baseline_count]):
+                for game_action_dict in game:
+                    bot.update_game(game_action_dict)
+            litbot_seconds = time.perf_counter() - start
+
+        if args.check:
+            check_equivalence(bots, batched_bot)
+
+        rows.append({
+            "games" : game_count,
+            "moves" : applied_moves,
+            "batched_moves_per_s" : applied_moves/batched_seconds,
+            "litbot_moves_per_s" : baseline_moves/litbot_seconds,
+            "speedup" : (applied_moves/batched_seconds)/(baseline_moves/litbot_seconds),
+        })
+
+    print_table(rows)
+    if args.check:
+        print("batched state matches per-game LitBot")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import time
+import argparse
+import tracemalloc
+import numpy as np
+from src.prob_model import LitBot, BitboardBot
+from src.simulation import GameSimulator
+from ._common import print_table
+
+class HardLitBot(LitBot):
+    # LitBot without inferences and statistics, the work BitboardBot actually replaces
+    def update_inference_list(self, *args, **kwargs) -> None:
+        pass
+
+    def update_statistics(self) -> None:
+        pass
+
+ENGINES = {
+    "litbot" : LitBot,
+    "litbot_hard" : HardLitBot,
+    "bitboard" : BitboardBot,
+}
+
+def bot_memory_bytes(engine, seed : int, player_count : int, moves) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    bot = engine(0, 0, 2, player_count, fake_game_seed = seed)
+    for game_action_dict in moves:
+        bot.update_game(game_action_dict)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before
+
+def run_config(player_count : int, seeds : range, check : bool) -> list:
+    games = [(seed, GameSimulator(seed, player_count = player_count).play()) for seed in seeds]
+    rows = []
+    for name, engine in ENGINES.items():
+        seconds, updates = 0.0, 0
+        for seed, moves in games:
+            bot = engine(0, 0, 2, player_count, fake_game_seed = seed)
+            reference = LitBot(0, 0, 2, player_count, fake_game_seed = seed) if check and engine is BitboardBot else None
+            for game_action_dict in moves:
+                start = time.perf_counter()
+                bot.update_game(game_action_dict)
+                seconds += time.perf_counter() - start
+                updates += 1
+                if reference is not None:
+                    reference.update_game(game_action_dict)
+                    assert np.array_equal(reference.information_matrix, bot.information_matrix), (seed, game_action_dict)
+        rows.append({
+            "players" : player_count,
+            "engine" : name,
+            "updates" : updates,
+            "us_per_move" : seconds/updates*1e6,
+            "bot_kib" : bot_memory_bytes(engine, games[0][0], player_count, games[0][1])/1024,
+        })
+    return rows
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="per-move time and per-bot memory of BitboardBot against LitBot")
+    parser.add_argument("--players", type=int, nargs="+", default=[6, 8])
+    parser.add_argument("--seeds", type=int, default=5)
+    parser.add_argument("--check", action="store_true", help="compare BitboardBot's information_matrix with LitBot's after every move")
+    args = parser.parse_args()
+    print_table([row for player_count in args.players for row in run_config(player_count, range(args.seeds), args.check)])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import time
+import argparse
+import numpy as np
+from src.prob_model import LitBot, CallabilityEngine, StatisticsConfig
+from src.simulation import GameSimulator
+from ._common import quiet_stdout, print_table, percentile_summary
+
+def prob_matrix_scores(bot : LitBot) -> np.ndarray:
+    # what callers did before the engine: every set from the full prob_matrix after every move
+    team_prob = np.nan_to_num(bot.prob_matrix)[bot.team_id]
+    return np.where(bot.active_sets != 0, team_prob.sum(axis=0).prod(axis=1), 0)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="cost of querying call-set candidates after every move, incremental against from scratch")
+    parser.add_argument("--players", type=int, nargs="+", default=[6, 8])
+    parser.add_argument("--seeds", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = []
+    for player_count in args.players:
+        with quiet_stdout():
+            games = [(seed, GameSimulator(seed, player_count = player_count).play()) for seed in range(args.seeds)]
+        seconds = {"incremental" : [], "repeat" : [], "fresh_engine" : [], "prob_matrix" : []}
+        refreshed_sets = 0
+        for seed, moves in games:
+            bot = LitBot(0, 0, 2, player_count, fake_game_seed = seed, statistics_config = StatisticsConfig.parse("off"))
+            engine = CallabilityEngine(bot)
+            for game_action_dict in moves:
+                bot.update_game(game_action_dict)
+
+                start = time.perf_counter()
+                scores = engine.candidates(bot, 3)
+                seconds["incremental"].append(time.perf_counter() - start)
+                refreshed_sets += scores.refreshed_sets
+
+                # another client asking about the same seat before the next move
+                start = time.perf_counter()
+                engine.candidates(bot, 3)
+                seconds["repeat"].append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                bot.call_candidates(3)
+                seconds["fresh_engine"].append(time.perf_counter() - start)
+
+                # prob_matrix is cached per state version, drop it so each query pays for it like a lone caller would
+                bot.clear_matrix_cache()
+                start = time.perf_counter()
+                prob_matrix_scores(bot)
+                seconds["prob_matrix"].append(time.perf_counter() - start)
+
+        move_count = sum(len(moves) for _, moves in games)
+        for name, samples in seconds.items():
+            summary = percentile_summary(samples)
+            rows.append({
+                "players" : player_count,
+                "query" : name,
+                "moves" : move_count,
+                "p50_us" : summary["p50"],
+                "p95_us" : summary["p95"],
+                "mean_us" : summary["mean"],
+                "sets_per_move" : {"incremental" : refreshed_sets/move_count, "repeat" : 0.0}.get(name, float(bot.set_count)),
+            })
+    print_table(rows)
+
+if __name__ == "__main__":
+    main()
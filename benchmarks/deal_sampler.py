@@ -0,0 +1,56 @@
+import argparse
+import numpy as np
+from src.prob_model import LitBot, DealSampler
+from src.simulation import GameSimulator
+from ._common import print_table
+
+def positions(player_count : int, seeds : range, every : int):
+    # positions along self-play games, with exact_prob_matrix as the reference
+    for seed in seeds:
+        moves = GameSimulator(seed, player_count = player_count).play()
+        bot = LitBot(0, 0, 2, player_count, fake_game_seed = seed)
+        for move_idx, game_action_dict in enumerate(moves):
+            bot.update_game(game_action_dict)
+            if move_idx%every == 0:
+                yield bot
+
+def run_config(player_count : int, seeds : range, samples : int, processes : int, every : int) -> dict:
+    errors, coverage, seconds, ess = [], [], [], []
+    with DealSampler(processes = processes) as sampler:
+        for bot in positions(player_count, seeds, every):
+            exact = bot.exact_prob_matrix
+            estimate = bot.sample_prob_matrix(samples = samples, seed = 0, sampler = sampler, use_inferences = False)
+            errors.append(np.abs(estimate.prob_matrix - exact).max())
+            coverage.append(((exact >= estimate.lower - 1e-12) & (exact <= estimate.upper + 1e-12)).mean())
+            seconds.append(estimate.seconds)
+            ess.append(estimate.effective_sample_size/estimate.samples)
+    return {
+        "players" : player_count,
+        "samples" : samples,
+        "processes" : processes,
+        "positions" : len(errors),
+        "p50_ms" : float(np.percentile(seconds, 50))*1e3,
+        "p95_ms" : float(np.percentile(seconds, 95))*1e3,
+        "deals_per_s" : samples*len(seconds)/float(np.sum(seconds)),
+        "max_error" : float(np.max(errors)),
+        "ci_coverage" : float(np.mean(coverage)),
+        "ess_ratio" : float(np.mean(ess)),
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="DealSampler latency, throughput and accuracy against exact_prob_matrix")
+    parser.add_argument("--players", type=int, nargs="+", default=[6, 8])
+    parser.add_argument("--samples", type=int, nargs="+", default=[4096, 32768])
+    parser.add_argument("--processes", type=int, nargs="+", default=[0])
+    parser.add_argument("--seeds", type=int, default=2)
+    parser.add_argument("--every", type=int, default=20, help="sample every n-th position of a game")
+    args = parser.parse_args()
+
+    rows = [
+        run_config(player_count, range(args.seeds), samples, processes, args.every)
+        for player_count in args.players for samples in args.samples for processes in args.processes
+    ]
+    print_table(rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import time
+import argparse
+from src.prob_model import LitBot
+from src.service import EncodedMatrixCache, encode_matrix, etag_matches, ENCODINGS, STATE_MATRICES
+from src.simulation import GameSimulator
+from ._common import print_table
+
+def time_us(function, repeats : int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return (time.perf_counter() - start)/repeats*1e6
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="size and cost of the state read encodings against str(truth_matrix)")
+    parser.add_argument("--players", type=int, default=6)
+    parser.add_argument("--moves", type=int, default=60)
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args()
+
+    bot = LitBot(0, 0, 2, args.players, fake_game_seed = 0)
+    for game_action_dict in GameSimulator(0, player_count = args.players).play()[:args.moves]:
+        bot.update_game(game_action_dict)
+
+    rows = [{"matrix" : "truth", "encoding" : "str", "bytes" : len(str(bot.truth_matrix)), "encode_us" : time_us(lambda: str(bot.truth_matrix), args.repeats), "not_modified_us" : float("nan")}]
+    cache = EncodedMatrixCache()
+    for matrix in STATE_MATRICES:
+        for encoding in ENCODINGS:
+            try:
+                body, _ = encode_matrix(bot, matrix, encoding)
+            except ImportError:
+                continue
+            etag = cache.etag(bot, matrix, encoding)
+            rows.append({
+                "matrix" : matrix,
+                "encoding" : encoding,
+                "bytes" : len(body),
+                "encode_us" : time_us(lambda: encode_matrix(bot, matrix, encoding), args.repeats),
+                "not_modified_us" : time_us(lambda: etag_matches(etag, cache.etag(bot, matrix, encoding)), args.repeats),
+            })
+    print_table(rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import time
+import argparse
+import numpy as np
+from src.prob_model import LitBot
+from src.prob_model._exact_marginals import component_marginals
+from src.simulation import GameSimulator
+from ._common import percentile_summary, print_table
+
+def run_config(player_count : int, seeds : range) -> dict:
+    # every position a seat sees over a self-play game, timed with the counting cache cold and warm
+    cold, warm, deviation = [], [], []
+    for seed in seeds:
+        moves = GameSimulator(seed, player_count = player_count).play()
+        bot = LitBot(0, 0, 2, player_count, fake_game_seed = seed)
+        for game_action_dict in moves:
+            bot.update_game(game_action_dict)
+            component_marginals.cache_clear()
+            start = time.perf_counter()
+            exact_prob_matrix = bot.exact_prob_matrix
+            cold.append(time.perf_counter() - start)
+
+            # same constraints from a fresh matrix cache, only the counting cache is warm
+            bot.clear_matrix_cache()
+            start = time.perf_counter()
+            bot.exact_prob_matrix
+            warm.append(time.perf_counter() - start)
+            deviation.append(np.abs(np.nan_to_num(bot.dumb_prob_matrix) - exact_prob_matrix).max())
+
+    cold, warm = percentile_summary(cold, 1e3), percentile_summary(warm, 1e3)
+    return {
+        "players" : player_count,
+        "positions" : len(deviation),
+        "cold_p50_ms" : cold["p50"],
+        "cold_p95_ms" : cold["p95"],
+        "cold_p99_ms" : cold["p99"],
+        "warm_p50_ms" : warm["p50"],
+        "warm_p99_ms" : warm["p99"],
+        "max_dumb_error" : float(np.max(deviation)),
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="exact_prob_matrix latency over self-play positions and its gap to dumb_prob_matrix")
+    parser.add_argument("--players", type=int, nargs="+", default=[6, 8])
+    parser.add_argument("--seeds", type=int, default=5)
+    args = parser.parse_args()
+    print_table([run_config(player_count, range(args.seeds)) for player_count in args.players])
+
+if __name__ == "__main__":
+    main()
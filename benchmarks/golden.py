@@ -0,0 +1,134 @@
+import os
+import sys
+import json
+import argparse
+import platform
+import numpy as np
+from src.prob_model import StatisticsConfig
+from src.ingest import GameLog, iter_game_records, fake_game_record, export_game_record, load_corpus, write_corpus, replay_corpus
+from .scaling import parse_config
+from ._common import quiet_stdout, print_table
+
+# the committed corpus holds seeded games only, no real export ships with the repo; re-record it
+# with --record --exports <archive> --players-map <map> where exported games are available
+DEFAULT_CORPUS = "benchmarks/corpus/golden.jsonl"
+
+def record_corpus(args) -> None:
+    players_map = None
+    if args.players_map is not None:
+        with open(args.players_map) as f:
+            players_map = json.load(f)
+    records = []
+    with quiet_stdout():
+        for team_count, player_count, set_count, set_card_count in args.configs:
+            for seed in range(args.first_seed, args.first_seed + args.seeds):
+                records.append(fake_game_record(seed, team_count, player_count, set_count, set_card_count, args.checkpoint_every))
+        for path in args.exports:
+            for record in iter_game_records(path):
+                game_log = GameLog(record, players_map, team_count = args.team_count, newest_first = not args.oldest_first)
+                records.append(export_game_record(game_log, args.checkpoint_every))
+    write_corpus(args.corpus, records)
+    print(f"recorded {len(records)} games to {args.corpus}")
+
+def machine() -> dict:
+    # what the absolute latencies of a baseline depend on, a baseline only gates the host it was recorded on
+    cpu = platform.processor()
+    if os.path.exists("/proc/cpuinfo"):
+        with open("/proc/cpuinfo") as f:
+            cpu = next((line.split(":", 1)[1].strip() for line in f if line.startswith("model name")), cpu)
+    return {"cpu" : cpu, "cpus" : os.cpu_count(), "python" : platform.python_version(), "numpy" : np.__version__}
+
+def median_groups(runs : list) -> dict:
+    # each config's percentiles as the median across runs, p95_noise is the relative spread of its p95
+    groups = {}
+    for name in runs[0]:
+        rows = [groups_of_run[name] for groups_of_run in runs]
+        groups[name] = {key : float(np.median([row[key] for row in rows])) for key in rows[0]}
+        p95 = [row["p95_us"] for row in rows]
+        groups[name]["p95_noise"] = (max(p95) - min(p95))/groups[name]["p95_us"]
+    return groups
+
+def compare(groups, baseline, tolerance : float, max_noise : float) -> list:
+    # a config whose baseline p95 was noisier than tolerance is only gated past its noise band,
+    # widened to max_noise at most so a noisy baseline cannot switch the gate off
+    regressions = []
+    for name, row in groups.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        allowed = max(tolerance, min(reference.get("p95_noise", 0.0), max_noise))
+        change = (row["p95_us"] - reference["p95_us"])/reference["p95_us"]
+        if change > allowed:
+            regressions.append(f"{name} p95_us: {reference['p95_us']:.4g} -> {row['p95_us']:.4g} ({change:+.1%}, allowed {allowed:+.1%})")
+    return regressions
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="replay the golden corpus, check every checkpoint and gate the p95 update latency")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="jsonl corpus of recorded games")
+    parser.add_argument("--record", action="store_true", help="record the corpus from seeded games and --exports instead of replaying it")
+    parser.add_argument(
+        "--configs", type=parse_config, nargs="+",
+        default=[parse_config(text) for text in ("2:4:8:6", "2:6:8:6", "2:8:8:6", "3:6:8:6")],
+        help="team_count:player_count:set_count:set_card_count of the seeded games recorded"
+    )
+    parser.add_argument("--seeds", type=int, default=1, help="seeded games recorded per config")
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--exports", nargs="*", default=[], help="exported game archives recorded after the seeded games")
+    parser.add_argument("--players-map", help="json file mapping the exports' player ids to table positions")
+    parser.add_argument("--team-count", type=int, default=2, help="team count of the exports")
+    parser.add_argument("--oldest-first", action="store_true", help="the exports' raw moves are stored oldest first")
+    parser.add_argument("--checkpoint-every", type=int, default=20, help="moves between recorded checkpoints")
+    parser.add_argument("--repeats", type=int, default=3, help="replays per game, each update keeps its fastest time")
+    parser.add_argument("--runs", type=int, default=5, help="corpus replays, each percentile is the median across runs")
+    parser.add_argument("--statistics", type=StatisticsConfig.parse, default=StatisticsConfig.parse("off"), help="off (default), on_demand or every:N")
+    parser.add_argument("--save-baseline", help="write the latency percentiles and the machine they were measured on to this json file")
+    parser.add_argument(
+        "--baseline",
+        help="compare against a saved baseline and fail on p95 regressions; the latencies are only gated against a baseline "
+        "recorded on the same machine, regenerate it on each gating host with --save-baseline on an idle run"
+    )
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative p95 regression per config, widened to a noisier baseline's p95_noise")
+    parser.add_argument("--max-noise", type=float, default=0.3, help="the most a baseline's p95_noise can widen the tolerance to")
+    args = parser.parse_args()
+
+    if args.record:
+        record_corpus(args)
+        return 0
+
+    records = load_corpus(args.corpus)
+    with quiet_stdout():
+        reports = [replay_corpus(records, repeats = args.repeats, statistics_config = args.statistics) for _ in range(args.runs)]
+    # the replays are deterministic, the state checks of the first run stand for all of them
+    report = reports[0]
+    groups = median_groups([run.groups() for run in reports])
+    print(f"{report.games} games, {report.moves} moves, {report.checkpoints} checkpoints, {len(report.mismatches)} mismatches")
+    print_table([{"config" : name, **row} for name, row in groups.items()])
+
+    if args.save_baseline is not None:
+        with open(args.save_baseline, "w") as f:
+            json.dump({
+                "config" : {
+                    "corpus" : args.corpus, "games" : report.games, "moves" : report.moves, "repeats" : args.repeats, "runs" : args.runs,
+                    "machine" : machine(),
+                },
+                "results" : groups,
+            }, f, indent=4)
+
+    for mismatch in report.mismatches:
+        print(f"mismatch: {mismatch}", file=sys.stderr)
+    regressions = []
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        recorded_on = baseline["config"].get("machine")
+        if recorded_on != machine():
+            # microseconds from another host say nothing about a regression, the checkpoints are still checked
+            print(f"baseline was recorded on {recorded_on}, not on {machine()}: p95 gate skipped, regenerate the baseline on this host with --save-baseline", file=sys.stderr)
+        else:
+            regressions = compare(groups, baseline["results"], args.tolerance, args.max_noise)
+        for regression in regressions:
+            print(f"regression: {regression}", file=sys.stderr)
+    return 1 if len(report.mismatches) > 0 or len(regressions) > 0 else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+import time
+import copy
+import argparse
+from src.prob_model import LitBot
+from src.simulation import GameSimulator
+from ._common import percentile_summary, print_table
+
+def timed(function) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+def per_move_row(player_count : int, games : list, record_undo : bool) -> dict:
+    seconds, updates = 0.0, 0
+    for seed, moves in games:
+        bot = LitBot(0, 0, 2, player_count, fake_game_seed = seed, record_undo = record_undo)
+        seconds += timed(lambda: [bot.update_game(game_action_dict) for game_action_dict in moves])
+        updates += len(moves)
+    return {"players" : player_count, "record_undo" : record_undo, "us_per_move" : seconds/updates*1e6}
+
+def what_if_row(player_count : int, games : list) -> dict:
+    # one hypothetical move on a copy of a mid-game bot, deepcopy against fork
+    deepcopies, forks, rewinds, replays = [], [], [], []
+    for seed, moves in games:
+        half = len(moves)//2
+        bot = LitBot(0, 0, 2, player_count, fake_game_seed = seed, record_undo = True)
+        for game_action_dict in moves[:half]:
+            bot.update_game(game_action_dict)
+        hypothetical = moves[half]
+
+        deepcopies.append(timed(lambda: copy.deepcopy(bot).update_game(hypothetical)))
+        forks.append(timed(lambda: bot.fork().update_game(hypothetical)))
+
+        # seeking back a quarter of the game, undo deltas against replaying from move zero
+        target = list(moves[half//2].keys())[0]
+        forked = bot.fork()
+        rewinds.append(timed(lambda: forked.rewind(target)))
+
+        def replay():
+            fresh = LitBot(0, 0, 2, player_count, fake_game_seed = seed)
+            for game_action_dict in moves[:half//2 + 1]:
+                fresh.update_game(game_action_dict)
+        replays.append(timed(replay))
+
+    return {
+        "players" : player_count,
+        "deepcopy_move_us" : percentile_summary(deepcopies)["p50"],
+        "fork_move_us" : percentile_summary(forks)["p50"],
+        "rewind_us" : percentile_summary(rewinds)["p50"],
+        "replay_us" : percentile_summary(replays)["p50"],
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="copy-on-write forks and undo deltas against deepcopy and replay")
+    parser.add_argument("--players", type=int, nargs="+", default=[6, 8])
+    parser.add_argument("--seeds", type=int, default=5)
+    args = parser.parse_args()
+
+    per_move_rows, what_if_rows = [], []
+    for player_count in args.players:
+        games = [(seed, GameSimulator(seed, player_count = player_count).play()) for seed in range(args.seeds)]
+        per_move_rows += [per_move_row(player_count, games, record_undo) for record_undo in (False, True)]
+        what_if_rows.append(what_if_row(player_count, games))
+    print_table(per_move_rows)
+    print()
+    print_table(what_if_rows)
+
+if __name__ == "__main__":
+    main()
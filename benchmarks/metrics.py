@@ -0,0 +1,47 @@
+import time
+import argparse
+from src.prob_model import LitBot
+from src.simulation import GameSimulator
+from src.tracing import PipelineMetrics, UPDATE_STAGES
+from ._common import print_table
+
+def run_config(player_count : int, games : list, metrics : PipelineMetrics) -> float:
+    seconds, updates = 0.0, 0
+    for seed, moves in games:
+        bot = LitBot(0, 0, 2, player_count, fake_game_seed = seed, metrics = metrics)
+        start = time.perf_counter()
+        for game_action_dict in moves:
+            bot.update_game(game_action_dict)
+        seconds += time.perf_counter() - start
+        updates += len(moves)
+    return seconds/updates*1e6
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="overhead of the update_game stage timing and where a move's time goes")
+    parser.add_argument("--players", type=int, nargs="+", default=[6, 8])
+    parser.add_argument("--seeds", type=int, default=5)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    overhead_rows, stage_rows = [], []
+    for player_count in args.players:
+        games = [(seed, GameSimulator(seed, player_count = player_count).play()) for seed in range(args.seeds)]
+        metrics = PipelineMetrics()
+        disabled = min(run_config(player_count, games, None) for _ in range(args.repeats))
+        enabled = min(run_config(player_count, games, metrics) for _ in range(args.repeats))
+        overhead_rows.append({
+            "players" : player_count,
+            "off_us_per_move" : disabled,
+            "on_us_per_move" : enabled,
+            "overhead_pct" : (enabled/disabled - 1)*100,
+        })
+        stage_rows.append({
+            "players" : player_count,
+            **{f"{stage}_us" : metrics.stages[stage].total/metrics.stages[stage].count*1e6 for stage in UPDATE_STAGES},
+        })
+    print_table(overhead_rows)
+    print()
+    print_table(stage_rows)
+
+if __name__ == "__main__":
+    main()
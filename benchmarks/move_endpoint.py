@@ -0,0 +1,75 @@
+import time
+import asyncio
+import argparse
+import httpx
+from main import app
+from src.simulation import GameSimulator
+from ._common import percentile_summary, print_table
+
+def request_json(batch : list) -> list:
+    return [{str(move_id) : action_dict for move_id, action_dict in game_action_dict.items()} for game_action_dict in batch]
+
+async def seat_game(client : httpx.AsyncClient, game_id : str, seed : int, player_count : int) -> None:
+    for team_id in range(2):
+        for player_id in range(player_count//2):
+            response = await client.post(f"/games/{game_id}/bots", json = {
+                "team_id" : team_id, "player_id" : player_id, "player_count" : player_count, "fake_game_seed" : seed
+            })
+            response.raise_for_status()
+
+async def ping_loop(client : httpx.AsyncClient, latencies : list, stop : asyncio.Event) -> None:
+    # how long a trivial request waits on the event loop while moves are ingested
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get("/")
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.005)
+
+async def run_config(batch_size : int, games : int, player_count : int) -> dict:
+    transport = httpx.ASGITransport(app = app)
+    async with httpx.AsyncClient(transport = transport, base_url = "http://bench") as client:
+        played = [GameSimulator(seed, player_count = player_count).play() for seed in range(games)]
+        for seed in range(games):
+            await seat_game(client, f"bench-{batch_size}-{seed}", seed, player_count)
+
+        async def ingest(seed : int, latencies : list) -> None:
+            moves = played[seed]
+            for start_idx in range(0, len(moves), batch_size):
+                start = time.perf_counter()
+                response = await client.post(f"/games/bench-{batch_size}-{seed}/moves", json = request_json(moves[start_idx:start_idx + batch_size]))
+                latencies.append(time.perf_counter() - start)
+                response.raise_for_status()
+
+        request_latencies, ping_latencies = [], []
+        stop = asyncio.Event()
+        pinger = asyncio.create_task(ping_loop(client, ping_latencies, stop))
+        start = time.perf_counter()
+        await asyncio.gather(*[ingest(seed, request_latencies) for seed in range(games)])
+        seconds = time.perf_counter() - start
+        stop.set()
+        await pinger
+
+        for seed in range(games):
+            await client.delete(f"/games/bench-{batch_size}-{seed}")
+
+    move_count = sum(len(moves) for moves in played)
+    return {
+        "batch" : batch_size,
+        "requests" : len(request_latencies),
+        "moves" : move_count,
+        "us_per_move" : seconds/move_count*1e6,
+        "request_p50_ms" : percentile_summary(request_latencies, 1e3)["p50"],
+        "request_p99_ms" : percentile_summary(request_latencies, 1e3)["p99"],
+        "ping_p99_ms" : percentile_summary(ping_latencies or [0.0], 1e3)["p99"],
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="POST /games/{game_id}/moves, one move per request against batched requests")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 64])
+    parser.add_argument("--games", type=int, default=4, help="games ingested concurrently")
+    parser.add_argument("--players", type=int, default=6)
+    args = parser.parse_args()
+    print_table([asyncio.run(run_config(batch_size, args.games, args.players)) for batch_size in args.batch_sizes])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import argparse
+import numpy as np
+from src.prob_model import LitBot, MoveRecommender
+from src.prob_model._recommender import PROB_SOURCES
+from src.simulation import GameSimulator, InformationGainPolicy, RandomPolicy
+from ._common import percentile_summary, print_table
+
+def decision_latencies(player_count : int, seeds : range, recommender : MoveRecommender, k : int) -> list:
+    # every position a seat sees over self-play games, the bot's matrix cache is cold for each decision
+    latencies = []
+    for seed in seeds:
+        moves = GameSimulator(seed, player_count = player_count).play()
+        bot = LitBot(0, 0, 2, player_count, fake_game_seed = seed)
+        for game_action_dict in moves:
+            bot.update_game(game_action_dict)
+            latencies.append(recommender.recommend(bot, k).seconds)
+    return latencies
+
+def win_rate(player_count : int, seeds : range) -> float:
+    wins = [
+        GameSimulator(seed, player_count = player_count, policies = {0 : InformationGainPolicy(), 1 : RandomPolicy()}).run().winner == 0
+        for seed in seeds
+    ]
+    return float(np.mean(wins))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="MoveRecommender latency per decision and win rate against RandomPolicy")
+    parser.add_argument("--players", type=int, nargs="+", default=[6, 8])
+    parser.add_argument("--prob", choices=PROB_SOURCES, nargs="+", default=["prob_matrix", "exact_prob_matrix"])
+    parser.add_argument("--seeds", type=int, default=3)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    rows = []
+    for player_count in args.players:
+        for prob in args.prob:
+            recommender = MoveRecommender(prob = prob, budget_ms = args.budget_ms)
+            latencies = decision_latencies(player_count, range(args.seeds), recommender, args.k)
+            summary = percentile_summary(latencies, 1e3)
+            rows.append({
+                "players" : player_count,
+                "prob" : prob,
+                "p50_ms" : summary["p50"],
+                "p95_ms" : summary["p95"],
+                "p99_ms" : summary["p99"],
+                "over_budget" : float(np.mean(np.asarray(latencies)*1e3 > args.budget_ms)),
+                "exact_skipped" : recommender.exact_skipped,
+            })
+    print_table(rows)
+    print()
+    print_table([{"players" : player_count, "win_rate_vs_random" : win_rate(player_count, range(args.seeds))} for player_count in args.players])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import time
+import argparse
+import tracemalloc
+from typing import Dict, List, Tuple
+from src.prob_model import LitBot, LitTable, StatisticsConfig
+from src.simulation import GameSimulator
+from src.tracing import PipelineMetrics, UPDATE_STAGES
+from ._common import percentile_summary, print_table
+
+def parse_config(text : str) -> Tuple[int, int, int, int]:
+    # team_count:player_count:set_count:set_card_count
+    config = tuple(int(value) for value in text.split(":"))
+    if len(config) != 4:
+        raise argparse.ArgumentTypeError(f"expected teams:players:sets:cards, got {text}")
+    return config
+
+def measure(config : Tuple[int, int, int, int], games : List, statistics_config : StatisticsConfig) -> Dict:
+    team_count, player_count, set_count, set_card_count = config
+    metrics = PipelineMetrics()
+    latencies, table_seconds, peaks, nbytes, moves_applied = [], 0.0, [], [], 0
+    for seed, moves in games:
+        tracemalloc.start()
+        bot = LitBot(
+            0, 0, team_count, player_count, fake_game_seed = seed,
+            statistics_config = statistics_config, set_count = set_count, set_card_count = set_card_count
+        )
+        for game_action_dict in moves:
+            bot.update_game(game_action_dict)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        nbytes.append(bot.nbytes)
+
+        # stage means come from the metrics stamps, the latency percentiles include their cost
+        bot = LitBot(
+            0, 0, team_count, player_count, fake_game_seed = seed, metrics = metrics,
+            statistics_config = statistics_config, set_count = set_count, set_card_count = set_card_count
+        )
+        for game_action_dict in moves:
+            start = time.perf_counter()
+            bot.update_game(game_action_dict)
+            latencies.append(time.perf_counter() - start)
+
+        table = LitTable(team_count, player_count, set_count, set_card_count, statistics_config = statistics_config)
+        for team_id in range(team_count):
+            for player_id in range(player_count//team_count):
+                table.add_seat(team_id, player_id, fake_game_seed = seed)
+        start = time.perf_counter()
+        for game_action_dict in moves:
+            table.update_game(game_action_dict)
+        table_seconds += time.perf_counter() - start
+        moves_applied += len(moves)
+
+    summary = percentile_summary(latencies)
+    return {
+        "teams" : team_count,
+        "players" : player_count,
+        "sets" : set_count,
+        "cards" : set_card_count,
+        "moves" : moves_applied,
+        "bot_p50_us" : summary["p50"],
+        "bot_p95_us" : summary["p95"],
+        **{f"{stage}_us" : metrics.stages[stage].total/max(metrics.stages[stage].count, 1)*1e6 for stage in UPDATE_STAGES},
+        "table_us" : table_seconds/moves_applied*1e6,
+        "table_us_per_seat" : table_seconds/moves_applied/player_count*1e6,
+        "bot_kib" : max(nbytes)/1024,
+        "peak_kib" : max(peaks)/1024,
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="per move latency and memory of LitBot and LitTable against player count and deck size")
+    parser.add_argument(
+        "--configs", type=parse_config, nargs="+",
+        default=[parse_config(text) for text in ("2:6:8:6", "2:8:8:6", "3:12:8:6", "2:12:12:6", "4:16:16:6", "4:24:16:6", "4:24:24:8")],
+        help="team_count:player_count:set_count:set_card_count"
+    )
+    parser.add_argument("--seeds", type=int, default=2)
+    parser.add_argument("--max-moves", type=int, default=1000)
+    parser.add_argument("--statistics", type=StatisticsConfig.parse, default=StatisticsConfig.parse("off"))
+    args = parser.parse_args()
+
+    rows = []
+    for config in args.configs:
+        team_count, player_count, set_count, set_card_count = config
+        games = [
+            (seed, GameSimulator(
+                seed, team_count = team_count, player_count = player_count, max_moves = args.max_moves,
+                set_count = set_count, set_card_count = set_card_count
+            ).play())
+            for seed in range(args.seeds)
+        ]
+        rows.append(measure(config, games, args.statistics))
+    print_table(rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import sys
+import json
+import time
+import argparse
+import functools
+import tracemalloc
+import numpy as np
+from src.simulation import GameSimulator, RandomPolicy, GreedyPolicy
+from ._common import quiet_stdout, print_table
+
+STAGES = (
+    "update_information_matrix_hard",
+    "completeness_check_hard",
+    "update_inference_list",
+    "update_active_arrays",
+    "update_statistics",
+)
+POLICIES = {
+    "random" : RandomPolicy,
+    "greedy" : GreedyPolicy,
+}
+# metric -> whether higher is better
+METRICS = {
+    "moves_per_s" : True,
+    "p50_us" : False,
+    "p99_us" : False,
+    "bot_kib" : False,
+}
+
+class TimedSimulator(GameSimulator):
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.bot_update_seconds = []
+        self.stage_seconds = {stage : 0.0 for stage in STAGES}
+        for bot in self.bots.values():
+            for stage in STAGES:
+                setattr(bot, stage, self.timed_stage(stage, getattr(bot, stage)))
+
+    def timed_stage(self, stage, method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            result = method(*args, **kwargs)
+            self.stage_seconds[stage] += time.perf_counter() - start
+            return result
+        return wrapper
+
+    def broadcast(self, game_action_dict) -> None:
+        for bot in self.bots.values():
+            start = time.perf_counter()
+            bot.update_game(game_action_dict)
+            self.bot_update_seconds.append(time.perf_counter() - start)
+
+def bot_memory_kib(seed : int, player_count : int, policy : str) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    simulator = GameSimulator(seed, player_count = player_count, policies = {0 : POLICIES[policy](), 1 : POLICIES[policy]()})
+    simulator.run()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before)/len(simulator.bots)/1024
+
+def run_config(player_count : int, seeds : range, policy : str, max_moves : int) -> dict:
+    bot_update_seconds = []
+    stage_seconds = {stage : 0.0 for stage in STAGES}
+    moves, seconds = 0, 0.0
+    with quiet_stdout():
+        for seed in seeds:
+            simulator = TimedSimulator(seed, player_count = player_count, max_moves = max_moves, policies = {0 : POLICIES[policy](), 1 : POLICIES[policy]()})
+            start = time.perf_counter()
+            simulator.run()
+            seconds += time.perf_counter() - start
+            moves += simulator.move_id
+            bot_update_seconds += simulator.bot_update_seconds
+            for stage in STAGES:
+                stage_seconds[stage] += simulator.stage_seconds[stage]
+        memory = bot_memory_kib(seeds[0], player_count, policy)
+
+    bot_updates = len(bot_update_seconds)
+    latencies = np.asarray(bot_update_seconds)*1e6
+    return {
+        "players" : player_count,
+        "games" : len(seeds),
+        "moves" : moves,
+        "moves_per_s" : moves/seconds,
+        "p50_us" : float(np.percentile(latencies, 50)),
+        "p99_us" : float(np.percentile(latencies, 99)),
+        "bot_kib" : memory,
+        **{f"{stage}_us" : stage_seconds[stage]/bot_updates*1e6 for stage in STAGES},
+    }
+
+def compare(rows, baseline, tolerance : float) -> list:
+    regressions = []
+    for row in rows:
+        reference = baseline.get(str(row["players"]))
+        if reference is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            change = (row[metric] - reference[metric])/reference[metric]
+            if (-change if higher_is_better else change) > tolerance:
+                regressions.append(f"{row['players']} players {metric}: {reference[metric]:.4g} -> {row[metric]:.4g} ({change:+.1%})")
+    return regressions
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="self-play throughput, latency, memory and per-stage cost")
+    parser.add_argument("--players", type=int, nargs="+", default=[4, 6, 8])
+    parser.add_argument("--seeds", type=int, default=5)
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="random")
+    parser.add_argument("--max-moves", type=int, default=2000)
+    parser.add_argument("--save-baseline", help="write the results to this json file")
+    parser.add_argument("--baseline", help="compare against a saved baseline and fail on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed relative regression per metric")
+    args = parser.parse_args()
+
+    seeds = range(args.first_seed, args.first_seed + args.seeds)
+    rows = [run_config(player_count, seeds, args.policy, args.max_moves) for player_count in args.players]
+    print_table([{key : value for key, value in row.items() if not key.endswith("_us") or key in METRICS} for row in rows])
+    print()
+    print_table([{"players" : row["players"], **{stage : row[f"{stage}_us"] for stage in STAGES}} for row in rows])
+
+    if args.save_baseline is not None:
+        with open(args.save_baseline, "w") as f:
+            json.dump({
+                "config" : {"seeds" : list(seeds), "policy" : args.policy, "max_moves" : args.max_moves},
+                "results" : {str(row["players"]) : row for row in rows},
+            }, f, indent=4)
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(rows, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"regression: {regression}", file=sys.stderr)
+        return 1 if len(regressions) > 0 else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
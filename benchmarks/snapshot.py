@@ -0,0 +1,91 @@
+import time
+import pickle
+import asyncio
+import argparse
+import numpy as np
+from src.persistence import dump_bot, load_bot, dump_game, load_game, WriteBehind, MemoryBackend
+from src.simulation import GameSimulator
+from ._common import percentile_summary, print_table
+
+def mid_game(seed : int, player_count : int, moves : int) -> GameSimulator:
+    simulator = GameSimulator(seed, player_count = player_count)
+    for _ in range(moves):
+        if simulator.is_over or simulator.step() is None:
+            break
+    return simulator
+
+def snapshot_row(player_count : int, seeds : range, moves : int) -> dict:
+    sizes, pickled_sizes, dumps, loads, restores = [], [], [], [], []
+    for seed in seeds:
+        simulator = mid_game(seed, player_count, moves)
+        for bot in simulator.bots.values():
+            start = time.perf_counter()
+            data = dump_bot(bot)
+            dumps.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            load_bot(data)
+            loads.append(time.perf_counter() - start)
+            sizes.append(len(data))
+            # what pickling the bot's arrays and inference lists would take
+            pickled_sizes.append(len(pickle.dumps((
+                {name : value for name, value in vars(bot).items() if isinstance(value, np.ndarray)},
+                bot.inferences_list, bot.conflict_inferences_list, bot.out_of_date_inferences_list, bot.statistics.export()
+            ))))
+        game = dump_game(simulator.bots)
+        start = time.perf_counter()
+        load_game(game)
+        restores.append(time.perf_counter() - start)
+
+    return {
+        "players" : player_count,
+        "bot_bytes" : float(np.mean(sizes)),
+        "pickle_bytes" : float(np.mean(pickled_sizes)),
+        "dump_p50_us" : percentile_summary(dumps)["p50"],
+        "load_p50_us" : percentile_summary(loads)["p50"],
+        "game_restore_p50_ms" : percentile_summary(restores, 1e3)["p50"],
+        "game_restore_p99_ms" : percentile_summary(restores, 1e3)["p99"],
+    }
+
+async def write_behind_row(games : int, updates : int, delay : float, flush_interval : float) -> dict:
+    # every game is updated `updates` times as fast as the loop allows against a slow backend,
+    # games are serialized on a worker thread at the flush like the service does
+    backend = MemoryBackend(delay = delay)
+    write_behind = WriteBehind(backend, flush_interval = flush_interval)
+    write_behind.start()
+    bots = mid_game(0, 6, 40).bots
+
+    async def snapshot():
+        return await asyncio.to_thread(dump_game, bots)
+
+    start = time.perf_counter()
+    for _ in range(updates):
+        for game_idx in range(games):
+            write_behind.submit(f"game-{game_idx}", snapshot)
+        await asyncio.sleep(0)
+    submit_seconds = time.perf_counter() - start
+    await write_behind.close()
+    return {
+        "games" : games,
+        "submitted" : write_behind.submitted,
+        "serialized" : write_behind.serialized,
+        "backend_writes" : backend.writes,
+        "backend_batches" : backend.batches,
+        "submit_us" : submit_seconds/write_behind.submitted*1e6,
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="snapshot size, dump/load latency and write-behind coalescing")
+    parser.add_argument("--players", type=int, nargs="+", default=[6, 8])
+    parser.add_argument("--seeds", type=int, default=5)
+    parser.add_argument("--moves", type=int, default=80, help="snapshot after this many moves")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--updates", type=int, default=20, help="snapshots submitted per game")
+    parser.add_argument("--backend-delay", type=float, default=0.01)
+    args = parser.parse_args()
+
+    print_table([snapshot_row(player_count, range(args.seeds), args.moves) for player_count in args.players])
+    print()
+    print_table([asyncio.run(write_behind_row(args.games, args.updates, args.backend_delay, 0.05))])
+
+if __name__ == "__main__":
+    main()
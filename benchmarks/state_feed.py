@@ -0,0 +1,52 @@
+import json
+import time
+import argparse
+from src.prob_model import LitBot
+from src.service import StateFeeds
+from src.simulation import GameSimulator
+from ._common import print_table
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="bytes and server time per move of StateFeeds diffs against polling /return_truth_matrix")
+    parser.add_argument("--players", type=int, default=6)
+    parser.add_argument("--seeds", type=int, default=1)
+    parser.add_argument("--subscribers", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--threshold", type=float, default=0.05)
+    args = parser.parse_args()
+
+    games = [(seed, GameSimulator(seed, player_count = args.players).play()) for seed in range(args.seeds)]
+    rows = []
+    for subscriber_count in args.subscribers:
+        poll_bytes, feed_bytes, poll_seconds, feed_seconds, moves_applied = 0, 0, 0.0, 0.0, 0
+        for seed, moves in games:
+            bot = LitBot(0, 0, 2, args.players, fake_game_seed = seed)
+            feeds = StateFeeds(threshold = args.threshold)
+            subscribers = [feeds.subscribe("game", 0, 0, bot) for _ in range(subscriber_count)]
+            for subscriber in subscribers:
+                feeds.next_frame(subscriber)
+            for game_action_dict in moves:
+                bot.update_game(game_action_dict)
+
+                start = time.perf_counter()
+                for _ in subscribers:
+                    poll_bytes += len(json.dumps(str(bot.truth_matrix)))
+                poll_seconds += time.perf_counter() - start
+
+                start = time.perf_counter()
+                feeds.wake(feeds.publish("game", {(0, 0) : bot}))
+                for subscriber in subscribers:
+                    feed_bytes += len(json.dumps(feeds.next_frame(subscriber)))
+                feed_seconds += time.perf_counter() - start
+            moves_applied += len(moves)
+
+        rows.append({
+            "subscribers" : subscriber_count,
+            "poll_bytes_per_move" : poll_bytes/moves_applied,
+            "feed_bytes_per_move" : feed_bytes/moves_applied,
+            "poll_us_per_move" : poll_seconds/moves_applied*1e6,
+            "feed_us_per_move" : feed_seconds/moves_applied*1e6,
+        })
+    print_table(rows)
+
+if __name__ == "__main__":
+    main()
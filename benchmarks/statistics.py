@@ -0,0 +1,52 @@
+import time
+import argparse
+import tracemalloc
+from src.prob_model import LitBot, StatisticsConfig
+from src.simulation import GameSimulator
+from ._common import print_table
+
+CONFIGS = ("every:1", "every:10", "on_demand", "off")
+
+def run_config(player_count : int, games : list, config : StatisticsConfig) -> dict:
+    seconds, updates = 0.0, 0
+    for seed, moves in games:
+        bot = LitBot(0, 0, 2, player_count, fake_game_seed = seed, statistics_config = config)
+        start = time.perf_counter()
+        for game_action_dict in moves:
+            bot.update_game(game_action_dict)
+        seconds += time.perf_counter() - start
+        updates += len(moves)
+
+    # a long lived bot, the same game replayed `laps` times worth of samples
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    bot = LitBot(0, 0, 2, player_count, fake_game_seed = games[0][0], statistics_config = config)
+    for _ in range(20):
+        for _ in games[0][1]:
+            bot.update_statistics()
+    statistics_bytes = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    return {
+        "players" : player_count,
+        "statistics" : f"{config.mode}:{config.every}" if config.mode == "every" else config.mode,
+        "us_per_move" : seconds/updates*1e6,
+        "samples_kept" : bot.statistics.samples,
+        "statistics_kib" : statistics_bytes/1024,
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="update_game cost and statistics memory per statistics mode")
+    parser.add_argument("--players", type=int, nargs="+", default=[6, 8])
+    parser.add_argument("--seeds", type=int, default=5)
+    parser.add_argument("--configs", nargs="+", default=list(CONFIGS))
+    args = parser.parse_args()
+
+    rows = []
+    for player_count in args.players:
+        games = [(seed, GameSimulator(seed, player_count = player_count).play()) for seed in range(args.seeds)]
+        rows += [run_config(player_count, games, StatisticsConfig.parse(config)) for config in args.configs]
+    print_table(rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import time
+import argparse
+from src.prob_model import LitBot, LitTable, StatisticsConfig
+from src.simulation import GameSimulator
+from ._common import print_table
+
+def per_move_us(player_count : int, games : list, seat_count : int, shared : bool, statistics_config : StatisticsConfig) -> float:
+    seats = [(team_id, player_id) for team_id in range(2) for player_id in range(player_count//2)][:seat_count]
+    seconds, moves_applied = 0.0, 0
+    for seed, moves in games:
+        if shared:
+            table = LitTable(2, player_count, statistics_config = statistics_config)
+            for team_id, player_id in seats:
+                table.add_seat(team_id, player_id, fake_game_seed = seed)
+            targets = [table]
+        else:
+            targets = [LitBot(team_id, player_id, 2, player_count, fake_game_seed = seed, statistics_config = statistics_config) for team_id, player_id in seats]
+        start = time.perf_counter()
+        for game_action_dict in moves:
+            for target in targets:
+                target.update_game(game_action_dict)
+        seconds += time.perf_counter() - start
+        moves_applied += len(moves)
+    return seconds/moves_applied*1e6
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="per game move cost of seats at a shared LitTable against one LitBot per seat")
+    parser.add_argument("--players", type=int, nargs="+", default=[6, 8])
+    parser.add_argument("--seeds", type=int, default=3)
+    parser.add_argument("--statistics", type=StatisticsConfig.parse, default=StatisticsConfig.parse("off"))
+    args = parser.parse_args()
+
+    rows = []
+    for player_count in args.players:
+        games = [(seed, GameSimulator(seed, player_count = player_count).play()) for seed in range(args.seeds)]
+        for seat_count in sorted({1, 2, player_count//2, player_count}):
+            rows.append({
+                "players" : player_count,
+                "seats" : seat_count,
+                "litbots_us" : per_move_us(player_count, games, seat_count, False, args.statistics),
+                "table_us" : per_move_us(player_count, games, seat_count, True, args.statistics),
+            })
+    print_table(rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import os
+import time
+import argparse
+import numpy as np
+from src.prob_model import LitBot
+from src.simulation import GameSimulator
+from src.tracing import Tracer, StreamSink, NULL_TRACER, DEBUG, INFO
+from ._common import percentile_summary, print_table
+
+def play_games(seeds, player_count : int):
+    return [(seed, GameSimulator(seed, player_count = player_count).play()) for seed in seeds]
+
+def replay(games, player_count : int, tracer_factory):
+    # every seat replays the game, one tracer per seat like the service would hold
+    latencies = []
+    for seed, moves in games:
+        bots = [
+            LitBot(team_id, player_id, 2, player_count, fake_game_seed = seed, tracer = tracer_factory())
+            for team_id in range(2) for player_id in range(player_count//2)
+        ]
+        for game_action_dict in moves:
+            for bot in bots:
+                start = time.perf_counter()
+                bot.update_game(game_action_dict)
+                latencies.append(time.perf_counter() - start)
+    return latencies
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="per-move update_game cost with tracing off, ring buffered and streamed")
+    parser.add_argument("--players", type=int, default=6)
+    parser.add_argument("--seeds", type=int, default=10)
+    parser.add_argument("--ring-size", type=int, default=1024)
+    args = parser.parse_args()
+
+    games = play_games(range(args.seeds), args.players)
+    devnull = open(os.devnull, "w")
+    configs = {
+        "off" : lambda: NULL_TRACER,
+        "ring info" : lambda: Tracer(INFO, ring_size = args.ring_size),
+        "ring debug" : lambda: Tracer(DEBUG, ring_size = args.ring_size),
+        # closest to the old behaviour of printing every update
+        "stream debug" : lambda: Tracer(DEBUG, ring_size = 0, sinks = [StreamSink(devnull)]),
+    }
+
+    rows = []
+    for name, tracer_factory in configs.items():
+        latencies = replay(games, args.players, tracer_factory)
+        summary = percentile_summary(latencies)
+        rows.append({
+            "tracer" : name,
+            "updates" : len(latencies),
+            "updates_per_s" : len(latencies)/float(np.sum(latencies)),
+            "p50_us" : summary["p50"],
+            "p99_us" : summary["p99"],
+        })
+    devnull.close()
+    print_table(rows)
+
+if __name__ == "__main__":
+    main()
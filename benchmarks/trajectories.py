@@ -0,0 +1,82 @@
+import os
+import time
+import shutil
+import argparse
+import tempfile
+import tracemalloc
+import numpy as np
+from src.ingest import GameLog, TrajectoryWriter, TrajectoryArchive, export_trajectories
+from src.simulation import GameSimulator
+from ._common import quiet_stdout, print_table, percentile_summary
+
+def simulated_game_logs(seeds : range, player_count : int):
+    for seed in seeds:
+        simulator = GameSimulator(seed, player_count = player_count)
+        card_location_array = simulator.card_location_array.copy()
+        actions = {str(move_id) : action_dict for game_action_dict in simulator.play() for move_id, action_dict in game_action_dict.items()}
+        yield GameLog({"game_id" : f"seed-{seed}", "player_count" : player_count, "card_location_array" : card_location_array.tolist(), "actions" : actions})
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="write a trajectory archive from seeded games, then time random trajectory reads and shuffled minibatches")
+    parser.add_argument("--players", type=int, default=6)
+    parser.add_argument("--games", type=int, default=20)
+    parser.add_argument("--chunk-rows", type=int, default=1 << 14)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--reads", type=int, default=1000, help="random trajectory reads timed")
+    parser.add_argument("--path", help="archive directory, a temporary one that is removed afterwards by default")
+    args = parser.parse_args()
+
+    path = args.path if args.path is not None else os.path.join(tempfile.mkdtemp(), "archive")
+    try:
+        with quiet_stdout():
+            game_logs = list(simulated_game_logs(range(args.games), args.players))
+        start = time.perf_counter()
+        with quiet_stdout(), TrajectoryWriter(path, chunk_rows = args.chunk_rows) as writer:
+            report = export_trajectories(game_logs, writer)
+        write_seconds = time.perf_counter() - start
+        archive_bytes = sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+        archive = TrajectoryArchive(path)
+        rng = np.random.default_rng(0)
+        read_seconds = []
+        for idx in rng.integers(archive.trajectory_count, size=args.reads).tolist():
+            start = time.perf_counter()
+            trajectory = archive.trajectory(idx)
+            trajectory["information"][-1].sum()
+            read_seconds.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        batches = 0
+        for batch in archive.iter_minibatches(args.batch_size, seed = 0):
+            batches += 1
+        batch_seconds = time.perf_counter() - start
+        peak_kib = tracemalloc.get_traced_memory()[1]/1024
+        tracemalloc.stop()
+
+        print_table([{
+            "games" : report.games,
+            "rows" : len(archive),
+            "chunks" : len(archive.chunk_sizes),
+            "archive_mib" : archive_bytes/2**20,
+            "bytes_per_row" : archive_bytes/max(len(archive), 1),
+            "write_rows_per_s" : len(archive)/write_seconds,
+        }])
+        print()
+        print_table([{
+            "read" : "trajectory",
+            **{f"{key}_us" : value for key, value in percentile_summary(read_seconds).items()},
+        }])
+        print()
+        print_table([{
+            "batches" : batches,
+            "batch_rows_per_s" : len(archive)/batch_seconds,
+            "batch_us" : batch_seconds/max(batches, 1)*1e6,
+            "iter_peak_kib" : peak_kib,
+        }])
+    finally:
+        if args.path is None:
+            shutil.rmtree(os.path.dirname(path))
+
+if __name__ == "__main__":
+    main()
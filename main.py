@@ -1,23 +1,404 @@
-from src.prob_model import LitBot
-from fastapi import FastAPI
+import os
+import asyncio
+import weakref
+import functools
+import contextlib
+import numpy as np
+from typing import Dict, List, Literal, Optional, Union
+from pydantic import BaseModel, model_validator
+from src.prob_model import StatisticsConfig, CallabilityEngine
+from src.service import (
+    GameRegistry, MoveExecutor, Overloaded, StateFeeds, EncodedMatrixCache, validate_move, apply_moves,
+    etag_matches, ENCODINGS, STATE_MATRICES
+)
+from src.persistence import WriteBehind, FileBackend, MongoBackend, dump_game, game_version
+from src.tracing import PipelineMetrics, MoveProfiler, LEVELS
+from fastapi import FastAPI, HTTPException, Body, Header, WebSocket, WebSocketDisconnect
+from fastapi.responses import PlainTextResponse, Response
 
-app = FastAPI()
+# LITBOT_METRICS=0 starts with the per-stage timing off, PUT /metrics switches it at runtime
+metrics = PipelineMetrics(enabled = os.environ.get("LITBOT_METRICS", "1") != "0")
+# LITBOT_STATISTICS is "off", "on_demand" or "every:N", see StatisticsConfig.parse
+# on_demand by default, GET /games/{game_id}/statistics?sample=true records a sample
+statistics_config = StatisticsConfig.parse(os.environ.get("LITBOT_STATISTICS", "on_demand"))
+# LITBOT_SHARED_TABLES=0 gives every bot its own copy of the public state, e.g. to seat bots mid-game
+# every game keeps its last LITBOT_TRACE_RING events at LITBOT_TRACE_LEVEL ("debug", "info" or "off")
+registry = GameRegistry(
+    metrics = metrics,
+    statistics_config = statistics_config,
+    shared_tables = os.environ.get("LITBOT_SHARED_TABLES", "1") != "0",
+    trace_level = LEVELS[os.environ.get("LITBOT_TRACE_LEVEL", "info")],
+    trace_ring_size = int(os.environ.get("LITBOT_TRACE_RING", 1024))
+)
+profilers : Dict[str, MoveProfiler] = {}
+move_executor = MoveExecutor(
+    max_workers = int(os.environ.get("LITBOT_MOVE_WORKERS", 4)),
+    max_pending = int(os.environ.get("LITBOT_MOVE_QUEUE", 64))
+)
+# websocket subscribers are sent probability changes above LITBOT_FEED_THRESHOLD, at most every LITBOT_FEED_COALESCE_MS
+feeds = StateFeeds(
+    threshold = float(os.environ.get("LITBOT_FEED_THRESHOLD", 0.05)),
+    coalesce_seconds = float(os.environ.get("LITBOT_FEED_COALESCE_MS", 50))/1000
+)
+encoded_matrices = EncodedMatrixCache()
+# one engine per seat, dropped with the bot it follows
+call_engines : "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+def forget_game(entry) -> None:
+    # what the service keeps per game besides its registry entry, for removed and evicted games;
+    # subscribers are sent a closed frame and reconnect to the game restored from its snapshot
+    profilers.pop(entry.game_id, None)
+    feeds.close_game(entry.game_id)
+    for bot in entry.bots.values():
+        call_engines.pop(bot, None)
+
+registry.on_evict = forget_game
+
+def make_write_behind():
+    # snapshots go to LITBOT_MONGO_URI if set, else LITBOT_SNAPSHOT_DIR, else nowhere
+    if os.environ.get("LITBOT_MONGO_URI"):
+        return WriteBehind(MongoBackend(os.environ["LITBOT_MONGO_URI"]))
+    if os.environ.get("LITBOT_SNAPSHOT_DIR"):
+        return WriteBehind(FileBackend(os.environ["LITBOT_SNAPSHOT_DIR"]))
+    return None
+
+write_behind = make_write_behind()
+# idle games are only evicted on create and restore otherwise, every LITBOT_EVICT_INTERVAL seconds
+# the registry drops the games past their ttl
+evict_interval = float(os.environ.get("LITBOT_EVICT_INTERVAL", 60))
+
+async def sweep_expired_games() -> None:
+    while True:
+        await asyncio.sleep(evict_interval)
+        registry.evict()
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    if write_behind is not None:
+        write_behind.start()
+    sweeper = asyncio.create_task(sweep_expired_games())
+    yield
+    sweeper.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await sweeper
+    if write_behind is not None:
+        await write_behind.close()
+    move_executor.shutdown()
+
+app = FastAPI(lifespan=lifespan)
+
+class BotRequest(BaseModel):
+    team_id : int
+    player_id : int
+    player_count : int
+    team_count : int = 2
+    set_count : int = 8
+    set_card_count : int = 6
+    initial_game_state_array : Optional[List[List[int]]] = None
+    fake_game_seed : Optional[int] = None
+
+class MoveAction(BaseModel):
+    # one value of an update_game action dict
+    action : Literal["ask_card", "call_set"]
+    by_team : int
+    by : int
+    set_id : int
+    result : Literal[0, 1]
+    to_team : Optional[int] = None
+    to : Optional[int] = None
+    card_id : Optional[int] = None
+    card_locations : Optional[Dict[int, int]] = None
+
+    @model_validator(mode="after")
+    def check_action_fields(self):
+        if self.action == "ask_card" and None in (self.to_team, self.to, self.card_id):
+            raise ValueError("ask_card needs to_team, to and card_id")
+        if self.action == "call_set" and self.card_locations is None:
+            raise ValueError("call_set needs card_locations")
+        return self
+
+async def restore_if_persisted(game_id : str) -> None:
+    # games evicted from memory or lost to a restart come back from their last snapshot
+    if game_id in registry or write_behind is None:
+        return
+    data = await write_behind.read(game_id)
+    if data is not None:
+        async with registry.lock(game_id):
+            # a request that read the same snapshot may have restored it and applied moves meanwhile
+            if game_id in registry:
+                return
+            registry.restore_game(game_id, data)
+
+async def snapshot_entry(entry) -> bytes:
+    # a flush serializes the game on the move pool under its lock, an evicted entry is still written
+    async with entry.lock:
+        return await move_executor.run(dump_game, entry.bots)
+
+def persist(game_id : str) -> None:
+    if write_behind is not None:
+        write_behind.submit(game_id, functools.partial(snapshot_entry, registry.get_game(game_id)))
+
+async def get_bot_or_404(game_id : str, team_id : int, player_id : int):
+    await restore_if_persisted(game_id)
+    try:
+        return registry.get_bot(game_id, team_id, player_id)
+    except KeyError as error:
+        raise HTTPException(status_code=404, detail=str(error))
 
 @app.get("/")
 async def root():
     return {"message": "API active"}
 
-@app.get("/initiate_bot/{game_id} {player_id} {player_count}")
-async def initiate_bot(game_id : str, player_id : int, player_count : int):
-    global bot
-    bot = LitBot(game_id, player_id, 2, player_count, None, 0)
+@app.get("/initiate_bot/{game_id} {team_id} {player_id} {player_count}")
+async def initiate_bot(game_id : str, team_id : int, player_id : int, player_count : int, fake_game_seed : int = 0, team_count : int = 2):
+    await restore_if_persisted(game_id)
+    async with registry.lock(game_id):
+        try:
+            registry.create_bot(game_id, team_id, player_id, team_count, player_count, fake_game_seed = fake_game_seed)
+        except ValueError as error:
+            # e.g. a seat joining a shared table after its first move
+            raise HTTPException(status_code=422, detail=str(error))
+        persist(game_id)
     return None
-    
 
-@app.get("/return_truth_matrix")
-async def return_truth_matrix():
+@app.post("/games/{game_id}/bots")
+async def create_bot(game_id : str, request : BotRequest):
+    await restore_if_persisted(game_id)
+    initial_game_state_array = None
+    if request.initial_game_state_array is not None:
+        initial_game_state_array = np.array(request.initial_game_state_array)
+    async with registry.lock(game_id):
+        try:
+            registry.create_bot(
+                game_id,
+                request.team_id,
+                request.player_id,
+                request.team_count,
+                request.player_count,
+                initial_game_state_array = initial_game_state_array,
+                fake_game_seed = request.fake_game_seed,
+                set_count = request.set_count,
+                set_card_count = request.set_card_count
+            )
+        except ValueError as error:
+            raise HTTPException(status_code=422, detail=str(error))
+        persist(game_id)
+    return {"game_id" : game_id, "games" : len(registry)}
+
+@app.delete("/games/{game_id}")
+async def remove_game(game_id : str):
+    await restore_if_persisted(game_id)
+    if game_id not in registry:
+        raise HTTPException(status_code=404, detail=f"unknown game_id: {game_id}")
+    async with registry.lock(game_id):
+        forget_game(registry.get_game(game_id))
+        registry.remove_game(game_id)
+        if write_behind is not None:
+            await write_behind.delete(game_id)
+    return None
+
+@app.post("/games/{game_id}/moves")
+async def apply_game_moves(game_id : str, moves : Union[Dict[int, MoveAction], List[Dict[int, MoveAction]]] = Body(...)):
+    # one {move_id : action} dict or a list of them, applied in order to every seat of the game
+    if isinstance(moves, dict):
+        moves = [moves]
+    moves = [
+        (move_id, action.model_dump(exclude_none = True))
+        for game_action_dict in moves
+        for move_id, action in game_action_dict.items()
+    ]
+
+    await restore_if_persisted(game_id)
+    if game_id not in registry:
+        raise HTTPException(status_code=404, detail=f"unknown game_id: {game_id}")
+    try:
+        move_executor.reserve()
+    except Overloaded as error:
+        raise HTTPException(status_code=503, detail=str(error), headers={"Retry-After" : "1"})
+
+    try:
+        async with registry.lock(game_id):
+            entry = registry.get_game(game_id)
+            if len(entry.bots) == 0:
+                raise HTTPException(status_code=404, detail=f"no bots seated in game {game_id}")
+            try:
+                for move_id, action_dict in moves:
+                    validate_move(next(iter(entry.bots.values())), move_id, action_dict)
+            except ValueError as error:
+                raise HTTPException(status_code=422, detail=str(error))
+
+            try:
+                await move_executor.run(apply_moves, entry.move_targets(), moves, profilers.get(game_id))
+            except AssertionError:
+                # apply_moves has rewound every bot to before the batch
+                raise HTTPException(status_code=409, detail="moves contradict the game state, batch rolled back")
+            persist(game_id)
+            # the game's inference records, undo deltas and statistics grow with every batch
+            registry.refresh_nbytes(game_id)
+            # diffing the seats costs a prob_matrix each, it runs on the pool like the moves
+            feeds.wake(await move_executor.run(feeds.publish, game_id, entry.bots))
+            return {"game_id" : game_id, "applied" : len(moves), "state_version" : game_version(entry.bots)}
+    finally:
+        move_executor.release()
+
+@app.websocket("/games/{game_id}/seats/{team_id}/{player_id}/feed")
+async def seat_feed(websocket : WebSocket, game_id : str, team_id : int, player_id : int, since : Optional[int] = None):
+    # a snapshot, or the diff from `since` if the server still has it, then one diff per batch of
+    # applied moves; the client can send {"since" : version} at any time to resync from that version
+    await restore_if_persisted(game_id)
+    if game_id not in registry or (team_id, player_id) not in registry.get_game(game_id).bots:
+        await websocket.close(code=1008, reason=f"no bot seated at {team_id, player_id} in game {game_id}")
+        return
+    await websocket.accept()
+    async with registry.lock(game_id):
+        subscriber = feeds.subscribe(game_id, team_id, player_id, registry.get_bot(game_id, team_id, player_id), since)
+
+    async def receive_resyncs():
+        try:
+            while True:
+                message = await websocket.receive_json()
+                subscriber.resync(message.get("since"))
+        except (WebSocketDisconnect, ValueError, AttributeError):
+            pass
+        finally:
+            subscriber.wake.set()
+
+    receiver = asyncio.create_task(receive_resyncs())
+    try:
+        while True:
+            await subscriber.wake.wait()
+            subscriber.wake.clear()
+            if receiver.done():
+                # the client went away or sent something other than a resync
+                break
+            frame = feeds.next_frame(subscriber)
+            if frame is not None:
+                await websocket.send_json(frame)
+            if subscriber.closed:
+                break
+            # moves published meanwhile are merged into the next frame
+            await asyncio.sleep(feeds.coalesce_seconds)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+        feeds.unsubscribe(subscriber)
+        with contextlib.suppress(RuntimeError):
+            await websocket.close()
+
+@app.post("/games/{game_id}/profile")
+async def start_profile(game_id : str, moves : int = 20, memory : bool = False):
+    # profiles the game's next `moves` moves applied through POST /games/{game_id}/moves
+    await restore_if_persisted(game_id)
+    if game_id not in registry:
+        raise HTTPException(status_code=404, detail=f"unknown game_id: {game_id}")
+    try:
+        profilers[game_id] = MoveProfiler(moves, memory = memory)
+    except ValueError as error:
+        raise HTTPException(status_code=422, detail=str(error))
+    return profilers[game_id].report()
+
+@app.get("/games/{game_id}/profile")
+async def get_profile(game_id : str):
+    if game_id not in profilers:
+        raise HTTPException(status_code=404, detail=f"no profile started for game {game_id}")
+    return profilers[game_id].report()
+
+@app.get("/games/{game_id}/statistics")
+async def get_statistics(game_id : str, sample : bool = False):
+    # per seat series in move order, sample=true records the current position first
+    await restore_if_persisted(game_id)
+    if game_id not in registry:
+        raise HTTPException(status_code=404, detail=f"unknown game_id: {game_id}")
+    async with registry.lock(game_id):
+        bots = registry.get_game(game_id).bots
+        if sample:
+            for bot in bots.values():
+                bot.sample_statistics()
+        return {
+            f"{team_id},{player_id}" : {name : series.tolist() for name, series in bot.statistics.export().items()}
+            for (team_id, player_id), bot in bots.items()
+        }
+
+@app.get("/games/{game_id}/events")
+async def get_events(game_id : str, move_id : Optional[int] = None):
+    # the game's most recent trace events, oldest first
+    await restore_if_persisted(game_id)
+    if game_id not in registry:
+        raise HTTPException(status_code=404, detail=f"unknown game_id: {game_id}")
+    async with registry.lock(game_id):
+        events = registry.get_game(game_id).tracer.events(move_id = move_id)
+    return [{"event" : type(event).__name__, "message" : event.message(), **event._asdict()} for event in events]
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    gauges = {
+        "litbot_active_games" : len(registry),
+        "litbot_registry_bytes" : registry.nbytes,
+        "litbot_move_batches_pending" : move_executor.pending,
+        "litbot_move_batches_rejected" : move_executor.rejected,
+        "litbot_metrics_enabled" : int(metrics.enabled),
+        "litbot_feed_subscribers" : len(feeds),
+    }
+    if write_behind is not None:
+        gauges["litbot_snapshots_pending"] = len(write_behind.pending)
+    return PlainTextResponse(metrics.render(gauges), media_type="text/plain; version=0.0.4")
+
+@app.put("/metrics")
+async def set_metrics(enabled : bool):
+    metrics.set_enabled(enabled)
+    return {"enabled" : metrics.enabled}
+
+@app.get("/games/{game_id}/seats/{team_id}/{player_id}/calls")
+async def get_call_candidates(game_id : str, team_id : int, player_id : int, k : Optional[int] = None, min_prob : float = 0.0):
+    # the seat's sets most likely held entirely by its team, with the likeliest holder of each card;
+    # only the sets the moves since the last query touched are rescored
+    bot = await get_bot_or_404(game_id, team_id, player_id)
+    async with registry.lock(game_id):
+        if bot not in call_engines:
+            call_engines[bot] = CallabilityEngine(bot)
+        scores = call_engines[bot].candidates(bot, k, min_prob)
+        version = bot.state_version
+    return {
+        "version" : version,
+        "candidates" : [
+            {"prob" : round(float(prob), 4), "known_count" : int(known_count), **action_dict}
+            for prob, known_count, action_dict in zip(scores.prob, scores.known_count, scores.action_dicts(team_id, player_id))
+        ],
+    }
+
+@app.get("/games/{game_id}/seats/{team_id}/{player_id}/{matrix}")
+async def get_state_matrix(
+    game_id : str,
+    team_id : int,
+    player_id : int,
+    matrix : str,
+    encoding : str = "sparse",
+    if_none_match : Optional[str] = Header(None)
+):
+    # truth, inference or prob matrix of a seat; the etag only moves with the state the matrix reads,
+    # a matching If-None-Match gets a 304 before anything is computed or serialized
+    if matrix not in STATE_MATRICES:
+        raise HTTPException(status_code=404, detail=f"unknown matrix {matrix}, expected one of {tuple(STATE_MATRICES)}")
+    if encoding not in ENCODINGS:
+        raise HTTPException(status_code=422, detail=f"unknown encoding {encoding}, expected one of {ENCODINGS}")
+    bot = await get_bot_or_404(game_id, team_id, player_id)
+    etag = encoded_matrices.etag(bot, matrix, encoding)
+    headers = {"ETag" : etag, "Cache-Control" : "no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    async with registry.lock(game_id):
+        try:
+            encoded = encoded_matrices.get(bot, matrix, encoding)
+        except ImportError:
+            raise HTTPException(status_code=406, detail=f"{encoding} encoding is not available on this server")
+    return Response(content=encoded.body, media_type=encoded.media_type, headers={**headers, "ETag" : encoded.etag})
+
+@app.get("/return_truth_matrix/{game_id} {team_id} {player_id}")
+async def return_truth_matrix(game_id : str, team_id : int, player_id : int):
+    bot = await get_bot_or_404(game_id, team_id, player_id)
     return str(bot.truth_matrix)
 
 @app.get("/test_func")
 async def test_func():
-    return "test_valid"
\ No newline at end of file
+    return "test_valid"
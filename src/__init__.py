@@ -8,4 +8,9 @@ __version__ = "0.1.0"
 
 from . import prob_model
 from . import abstract_classes
-from . import utils
\ No newline at end of file
+from . import utils
+from . import service
+from . import ingest
+from . import simulation
+from . import tracing
+from . import persistence
@@ -0,0 +1,4 @@
+from ._game_log import GameLog, iter_game_records, iter_json_array
+from ._replay import ReplayReport, replay_games, replay_game, seat_bots
+from ._corpus import CorpusReport, record_game, fake_game_record, export_game_record, load_corpus, write_corpus, replay_corpus
+from ._trajectories import TrajectoryWriter, TrajectoryArchive, TrajectoryBuffer, export_trajectories, encode_move, MOVE_FIELDS
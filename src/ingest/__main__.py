@@ -0,0 +1,78 @@
+import sys
+import json
+import argparse
+from . import GameLog, iter_game_records, replay_games, export_trajectories, TrajectoryWriter
+from ..tracing import Tracer, StreamSink, JsonLinesSink, LEVELS
+from ..prob_model import StatisticsConfig
+
+def parse_seat(seat : str):
+    team_id, player_id = seat.split(",")
+    return int(team_id), int(player_id)
+
+def main(argv = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.ingest", description="replay exported games into LitBot seats")
+    parser.add_argument("paths", nargs="+", help=".json (one game or an array of games) or .jsonl (one game per line) archives")
+    parser.add_argument("--players-map", help="json file mapping player ids to table positions, or game_id to such a mapping")
+    parser.add_argument("--team-count", type=int, default=2)
+    parser.add_argument("--seat", type=parse_seat, action="append", help="team_id,player_id to seat a bot at; every seat by default")
+    parser.add_argument("--limit", type=int, help="stop after this many games")
+    parser.add_argument("--oldest-first", action="store_true", help="raw moves are stored oldest first")
+    parser.add_argument("--strict", action="store_true", help="stop on the first game that fails to replay")
+    parser.add_argument("--verbose", action="store_true", help="print the bots' trace events to stderr")
+    parser.add_argument("--trace-level", choices=list(LEVELS), default="info", help="lowest event level traced")
+    parser.add_argument("--trace-jsonl", help="append the bots' trace events as json lines to this file")
+    parser.add_argument("--trace-ring", type=int, default=256, help="events kept per game and printed when the game fails to replay, 0 keeps none")
+    parser.add_argument("--archive", help="also write every seat's state after each move to a new trajectory archive in this directory")
+    parser.add_argument("--chunk-rows", type=int, default=1 << 16, help="rows per archive chunk")
+    parser.add_argument("--statistics", type=StatisticsConfig.parse, default=StatisticsConfig.parse("off"), help="off (default), on_demand or every:N")
+    args = parser.parse_args(argv)
+
+    players_maps = {}
+    if args.players_map is not None:
+        with open(args.players_map) as f:
+            players_maps = json.load(f)
+
+    def players_map_for(record):
+        game_id = record.get("game_id", record.get("id"))
+        if game_id in players_maps:
+            return players_maps[game_id]
+        return players_maps if len(players_maps) > 0 else None
+
+    def game_logs():
+        for path in args.paths:
+            for record in iter_game_records(path):
+                # records written with their team count, e.g. the golden corpus, keep it
+                team_count = record.get("team_count", args.team_count)
+                yield GameLog(record, players_map_for(record), team_count = team_count, newest_first = not args.oldest_first)
+
+    # one ring buffered tracer per game, its events go to the sinks and its ring explains a failed game
+    stream_sink = StreamSink(sys.stderr) if args.verbose else None
+    trace_file = open(args.trace_jsonl, "a") if args.trace_jsonl is not None else None
+
+    def make_tracer(game_id):
+        tracer = Tracer(level = LEVELS[args.trace_level], ring_size = args.trace_ring, game_id = game_id)
+        if stream_sink is not None:
+            tracer.add_sink(stream_sink)
+        if trace_file is not None:
+            tracer.add_sink(JsonLinesSink(trace_file, game_id))
+        return tracer
+
+    try:
+        if args.archive is not None:
+            with TrajectoryWriter(args.archive, chunk_rows = args.chunk_rows) as writer:
+                report = export_trajectories(game_logs(), writer, seats = args.seat, limit = args.limit, skip_failures = not args.strict, make_tracer = make_tracer, statistics_config = args.statistics)
+        else:
+            report = replay_games(game_logs(), seats = args.seat, limit = args.limit, skip_failures = not args.strict, make_tracer = make_tracer, statistics_config = args.statistics)
+    finally:
+        if trace_file is not None:
+            trace_file.close()
+
+    print(json.dumps(report.summary(), indent=4))
+    for game_id, error in report.failures.items():
+        print(f"failed {game_id} : {error}", file=sys.stderr)
+        for event in report.failure_events.get(game_id, []):
+            print(f"    {event.message()}", file=sys.stderr)
+    return 0 if len(report.failures) == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
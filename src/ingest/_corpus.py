@@ -0,0 +1,207 @@
+import json
+import time
+import numpy as np
+from typing import Dict, Iterable, Iterator, List, Tuple
+from ..prob_model import LitBot, MatrixTemplate, StatisticsConfig
+from ..simulation import GameSimulator
+from ._game_log import GameLog
+
+# a corpus is a jsonl file with one game per line, each a GameLog record with the actions already mapped
+# ({"card_location_array", "actions" : {move_id : action}}, so python -m src.ingest replays it too) plus
+# the deck shape, "inferences" : [[team_id, player_id, records], ...] with the [move_id, team_id, player_id,
+# set_id, card_id] of every inference record a seat made over the game, and "checkpoints" : {move_id :
+# [[team_id, player_id, information, status], ...]}; information is the seat's information_matrix in C order
+# as "1", "0" or "?" for unknown, status the status digit of each record made by then, so a checkpoint
+# costs the same at move 10 and at move 500
+
+def corpus_config(record : Dict) -> Tuple[int, int, int, int]:
+    return (record["team_count"], record["player_count"], record["set_count"], record["set_card_count"])
+
+def config_name(config : Tuple[int, int, int, int]) -> str:
+    # team_count:player_count:set_count:set_card_count, as benchmarks/scaling.py takes them
+    return ":".join(str(value) for value in config)
+
+def seat_state(bot : LitBot) -> Tuple[str, str]:
+    information = np.where(bot.information_matrix == 1, "1", np.where(bot.information_matrix == 0, "0", "?"))
+    status = bot.inference_store.status[:bot.inference_store.size]
+    return "".join(information.ravel().tolist()), "".join(str(value) for value in status.tolist())
+
+def seat_records(bot : LitBot) -> List[List]:
+    store = bot.inference_store
+    size = store.size
+    columns = (store.team_ids[:size], store.player_ids[:size], store.set_ids[:size], store.card_ids[:size])
+    return [[store.move_ids[idx], *values] for idx, values in enumerate(zip(*(column.tolist() for column in columns)))]
+
+def corpus_bots(record : Dict, templates : Dict = None, statistics_config : StatisticsConfig = None) -> Dict[Tuple[int, int], LitBot]:
+    # every seat at the table, dealt from the record's card_location_array
+    team_count, player_count, set_count, set_card_count = config = corpus_config(record)
+    player_per_team_count = player_count//team_count
+    card_location_array = np.array(record["card_location_array"])
+    templates = templates if templates is not None else {}
+    if config not in templates:
+        templates[config] = MatrixTemplate(*config, epsilon = LitBot.EPSILON)
+    statistics_config = statistics_config if statistics_config is not None else StatisticsConfig.parse("off")
+
+    return {
+        (team_id, player_id) : LitBot(
+            team_id = team_id,
+            player_id = player_id,
+            team_count = team_count,
+            player_count = player_count,
+            initial_game_state_array = np.where(card_location_array == team_id*player_per_team_count + player_id, 1, 0),
+            matrix_template = templates[config],
+            statistics_config = statistics_config,
+            set_count = set_count,
+            set_card_count = set_card_count
+        )
+        for team_id in range(team_count) for player_id in range(player_per_team_count)
+    }
+
+def iter_record_actions(record : Dict) -> Iterator[Tuple[int, Dict]]:
+    for move_id in sorted(record["actions"], key=int):
+        yield int(move_id), record["actions"][move_id]
+
+def record_game(
+    game_id : str,
+    source : str,
+    config : Tuple[int, int, int, int],
+    card_location_array : np.ndarray,
+    moves : Iterable[Tuple[int, Dict]],
+    checkpoint_every : int = 10
+) -> Dict:
+    # plays moves through every seat and keeps their state every checkpoint_every moves and after the last one
+    if checkpoint_every <= 0:
+        raise ValueError("checkpoint_every has to be positive")
+    team_count, player_count, set_count, set_card_count = config
+    record = {
+        "game_id" : game_id,
+        "source" : source,
+        "team_count" : team_count,
+        "player_count" : player_count,
+        "set_count" : set_count,
+        "set_card_count" : set_card_count,
+        "card_location_array" : np.asarray(card_location_array).tolist(),
+        "actions" : {},
+        "inferences" : [],
+        "checkpoints" : {},
+    }
+    bots = corpus_bots(record)
+    move_id = None
+    for count, (move_id, action_dict) in enumerate(moves, 1):
+        record["actions"][str(move_id)] = action_dict
+        for bot in bots.values():
+            bot.update_game({move_id : action_dict})
+        if count % checkpoint_every == 0:
+            record["checkpoints"][str(move_id)] = [[*seat, *seat_state(bot)] for seat, bot in bots.items()]
+    if move_id is not None:
+        record["checkpoints"][str(move_id)] = [[*seat, *seat_state(bot)] for seat, bot in bots.items()]
+    record["inferences"] = [[*seat, seat_records(bot)] for seat, bot in bots.items()]
+    # a json round trip, so a record compares the same whether it was just recorded or loaded
+    return json.loads(json.dumps(record))
+
+def fake_game_record(
+    seed : int,
+    team_count : int = 2,
+    player_count : int = 6,
+    set_count : int = 8,
+    set_card_count : int = 6,
+    checkpoint_every : int = 10
+) -> Dict:
+    simulator = GameSimulator(seed, team_count = team_count, player_count = player_count, set_count = set_count, set_card_count = set_card_count)
+    card_location_array = simulator.card_location_array.copy()
+    moves = [next(iter(game_action_dict.items())) for game_action_dict in simulator.play()]
+    return record_game(
+        f"seed-{seed}-{config_name((team_count, player_count, set_count, set_card_count))}", "fake",
+        (team_count, player_count, set_count, set_card_count), card_location_array, moves, checkpoint_every
+    )
+
+def export_game_record(game_log : GameLog, checkpoint_every : int = 10) -> Dict:
+    config = (game_log.team_count, game_log.player_count, game_log.card_codec.set_count, game_log.card_codec.set_card_count)
+    moves = [next(iter(game_action_dict.items())) for game_action_dict in game_log.iter_actions()]
+    return record_game(str(game_log.game_id), "export", config, game_log.initial_card_location_array(), moves, checkpoint_every)
+
+def load_corpus(path : str) -> List[Dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def write_corpus(path : str, records : Iterable[Dict]) -> None:
+    with open(path, "w") as f:
+        for record in records:
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+def compare_seat(expected : List, records : List[List], bot : LitBot) -> List[str]:
+    # records are the seat's records at the end of the game, the first len(status) of them were made by the checkpoint
+    team_id, player_id, information, status = expected
+    actual_information, actual_status = seat_state(bot)
+    errors = []
+    if actual_information != information:
+        cells = [idx for idx, (actual, wanted) in enumerate(zip(actual_information, information)) if actual != wanted]
+        cell = np.unravel_index(cells[0], bot.information_matrix.shape)
+        errors.append(
+            f"seat {team_id},{player_id}: {len(cells)} information cells differ, first {tuple(int(idx) for idx in cell)} "
+            f"is {actual_information[cells[0]]} instead of {information[cells[0]]}"
+        )
+    if len(actual_status) != len(status):
+        errors.append(f"seat {team_id},{player_id}: {len(actual_status)} inference records instead of {len(status)}")
+        return errors
+    actual_records = seat_records(bot)
+    if actual_status != status or actual_records != records[:len(status)]:
+        idx = next(idx for idx, (actual, wanted) in enumerate(zip(actual_records, records)) if actual != wanted or actual_status[idx] != status[idx])
+        errors.append(f"seat {team_id},{player_id}: inference record {idx} differs")
+    return errors
+
+class CorpusReport:
+    def __init__(self) -> None:
+        self.games = 0
+        self.moves = 0
+        self.checkpoints = 0
+        # config name : seconds per bot update, the fastest of the repeats for each move and seat
+        self.latencies : Dict[str, List[float]] = {}
+        self.mismatches : List[str] = []
+
+    def latency_percentiles(self, latencies : List[float], percentiles : Tuple = (50, 95, 99)) -> Dict[str, float]:
+        latencies = np.asarray(latencies)*1e6
+        return {f"p{percentile}_us" : float(np.percentile(latencies, percentile)) for percentile in percentiles}
+
+    def groups(self) -> Dict[str, Dict[str, float]]:
+        # per config, and "all" across the whole corpus
+        groups = {name : self.latency_percentiles(latencies) for name, latencies in sorted(self.latencies.items())}
+        if len(self.latencies) > 0:
+            groups["all"] = self.latency_percentiles([latency for latencies in self.latencies.values() for latency in latencies])
+        return groups
+
+def replay_record(record : Dict, report : CorpusReport, templates : Dict = None, repeats : int = 1, statistics_config : StatisticsConfig = None) -> None:
+    # the state checks are made on the first pass only, later passes just time the moves again
+    moves = list(iter_record_actions(record))
+    records = {(team_id, player_id) : inferences for team_id, player_id, inferences in record["inferences"]}
+    best = np.full((len(moves), record["player_count"]), np.inf)
+    for repeat in range(repeats):
+        bots = corpus_bots(record, templates, statistics_config)
+        for idx, (move_id, action_dict) in enumerate(moves):
+            game_action_dict = {move_id : action_dict}
+            for seat_idx, bot in enumerate(bots.values()):
+                start = time.perf_counter()
+                bot.update_game(game_action_dict)
+                best[idx, seat_idx] = min(best[idx, seat_idx], time.perf_counter() - start)
+            if repeat > 0 or str(move_id) not in record["checkpoints"]:
+                continue
+            report.checkpoints += 1
+            for expected in record["checkpoints"][str(move_id)]:
+                seat = tuple(expected[:2])
+                errors = compare_seat(expected, records[seat], bots[seat])
+                report.mismatches += [f"{record['game_id']} move {move_id} {error}" for error in errors]
+
+    report.games += 1
+    report.moves += len(moves)
+    report.latencies.setdefault(config_name(corpus_config(record)), []).extend(best.ravel().tolist())
+
+def replay_corpus(records : Iterable[Dict], repeats : int = 1, statistics_config : StatisticsConfig = None) -> CorpusReport:
+    report = CorpusReport()
+    templates = {}
+    for record in records:
+        try:
+            replay_record(record, report, templates, repeats, statistics_config)
+        except (AssertionError, KeyError, ValueError) as error:
+            # a game the engine can no longer replay is a mismatch like any other
+            report.mismatches.append(f"{record.get('game_id')} failed to replay: {error!r}")
+    return report
@@ -0,0 +1,196 @@
+import json
+import numpy as np
+from typing import Dict, Iterator, Tuple
+from ..utils import CardCodec
+
+SCALAR_DELIMITERS = " \t\r\n,]"
+
+def iter_json_array(f, prefix : str = "", chunk_size : int = 1 << 16) -> Iterator:
+    # yields the items of a top-level json array without loading the whole file
+    decoder = json.JSONDecoder()
+    buffer = prefix
+    position = 0
+    started = False
+    while True:
+        chunk = f.read(chunk_size)
+        buffer = buffer[position:] + chunk
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if not started:
+                if position == len(buffer):
+                    break
+                if buffer[position] != "[":
+                    raise ValueError("expected a json array")
+                started = True
+                position += 1
+                continue
+            if position == len(buffer):
+                break
+            if buffer[position] == "]":
+                return
+            if buffer[position] not in "{[\"":
+                # numbers, true, false and null only end at the next delimiter, which may be in the next
+                # chunk; decoding before it arrives would read "3.5" cut after "3." as 3
+                stop = position
+                while stop < len(buffer) and buffer[stop] not in SCALAR_DELIMITERS:
+                    stop += 1
+                if stop == len(buffer) and chunk != "":
+                    break
+                item = json.loads(buffer[position:stop])
+                position = stop
+                yield item
+                continue
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if chunk == "":
+                    raise
+                break
+            position = end
+            yield item
+        if chunk == "":
+            raise ValueError("unterminated json array")
+
+def iter_game_records(path : str) -> Iterator[Dict]:
+    # .jsonl archives hold one game per line, .json files a single game or an array of games
+    with open(path) as f:
+        if path.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+            return
+
+        first = f.read(1)
+        while first.isspace():
+            first = f.read(1)
+        if first == "[":
+            yield from iter_json_array(f, prefix = first)
+        else:
+            yield json.loads(first + f.read())
+
+class GameLog:
+    # one exported game: raw moves (newest first) or wrangled actions, mapped into LitBot action dicts
+    def __init__(
+        self,
+        record : Dict,
+        players_map : Dict[str, int] = None,
+        team_count : int = 2,
+        card_codec : CardCodec = None,
+        newest_first : bool = True
+    ) -> None:
+
+        self.record = record
+        self.team_count = team_count
+        self.card_codec = card_codec if card_codec is not None else CardCodec()
+        self.newest_first = newest_first
+
+        self.game_id = record.get("game_id", record.get("id"))
+        self.player_count = int(record.get("player_count", record.get("playerCount", 0)))
+        self.players_map = players_map if players_map is not None else record.get("players_map")
+
+        if self.player_count == 0:
+            raise ValueError(f"game {self.game_id} has no player count")
+        if "actions" not in record and self.players_map is None:
+            raise ValueError(f"game {self.game_id} needs a players_map to map player ids to seats")
+
+    @property
+    def player_per_team_count(self) -> int:
+        return self.player_count//self.team_count
+
+    def seat(self, player_hash : str) -> Tuple[int, int]:
+        player_idx = self.players_map[player_hash]
+        return player_idx//self.player_per_team_count, player_idx%self.player_per_team_count
+
+    def iter_moves(self) -> Iterator[Dict]:
+        moves = self.record["moves"]
+        return reversed(moves) if self.newest_first else iter(moves)
+
+    def convert_move(self, move : Dict) -> Dict:
+        action = move["actionData"]["action"]
+        result = 1 if move["resultData"]["success"] else 0
+
+        if action == "ASK":
+            ask_data = move["actionData"]["askData"]
+            set_id, card_id = self.card_codec.encode_card(ask_data["card"])
+            by_team, by = self.seat(ask_data["by"])
+            to_team, to = self.seat(ask_data["from"])
+            return {
+                "action" : "ask_card",
+                "by_team" : by_team,
+                "by" : by,
+                "to_team" : to_team,
+                "to" : to,
+                "set_id" : set_id,
+                "card_id" : card_id,
+                "result" : result
+            }
+
+        if action == "CALL_SET":
+            call_data = move["actionData"]["callData"]
+            by_team, by = self.seat(call_data["playerId"])
+            card_locations = {}
+            set_ids = set()
+            for player_hash, card_dict_list in call_data["data"].items():
+                for card_dict in card_dict_list:
+                    set_id, card_id = self.card_codec.encode_card(card_dict)
+                    set_ids.add(set_id)
+                    card_locations[card_id] = self.seat(player_hash)[1]
+            if len(set_ids) != 1:
+                raise ValueError(f"game {self.game_id} has a set call over cards of {len(set_ids)} sets, expected one")
+            return {
+                "action" : "call_set",
+                "by_team" : by_team,
+                "by" : by,
+                "set_id" : set_id,
+                "card_locations" : card_locations,
+                "result" : result
+            }
+
+        return None
+
+    def iter_actions(self) -> Iterator[Dict]:
+        # yields update_game inputs ({move_id : action}) in play order
+        if "actions" in self.record:
+            actions = self.record["actions"]
+            for move_id in sorted(actions, key=int):
+                yield {int(move_id) : actions[move_id]}
+            return
+
+        move_id = 0
+        for move in self.iter_moves():
+            action_dict = self.convert_move(move)
+            if action_dict is None:
+                continue
+            yield {move_id : action_dict}
+            move_id += 1
+
+    def initial_card_location_array(self) -> np.ndarray:
+        # a card starts with whoever first gives it away, or where a successful call finds it untouched
+        if "card_location_array" in self.record:
+            return np.array(self.record["card_location_array"])
+
+        card_location_array = np.full((self.card_codec.set_count, self.card_codec.set_card_count), -1)
+        for move in self.iter_moves():
+            action = move["actionData"]["action"]
+            if action == "ASK" and move["resultData"]["success"]:
+                ask_data = move["actionData"]["askData"]
+                set_id, card_id = self.card_codec.encode_card(ask_data["card"])
+                if card_location_array[set_id, card_id] == -1:
+                    card_location_array[set_id, card_id] = self.players_map[ask_data["from"]]
+            elif action == "CALL_SET" and move["resultData"]["success"]:
+                for player_hash, card_dict_list in move["actionData"]["callData"]["data"].items():
+                    for card_dict in card_dict_list:
+                        set_id, card_id = self.card_codec.encode_card(card_dict)
+                        if card_location_array[set_id, card_id] == -1:
+                            card_location_array[set_id, card_id] = self.players_map[player_hash]
+
+        if (card_location_array == -1).any():
+            raise ValueError(f"game {self.game_id} does not locate every card: {np.argwhere(card_location_array == -1).tolist()}")
+        return card_location_array
+
+    def initial_game_state_array(self, team_id : int, player_id : int, card_location_array : np.ndarray = None) -> np.ndarray:
+        if card_location_array is None:
+            card_location_array = self.initial_card_location_array()
+        return np.where(card_location_array == team_id*self.player_per_team_count + player_id, 1, 0)
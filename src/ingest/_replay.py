@@ -0,0 +1,115 @@
+import time
+import numpy as np
+from typing import Callable, Dict, Iterable, List, Tuple
+from ..prob_model import LitBot, MatrixTemplate, StatisticsConfig
+from ..tracing import Tracer
+from ._game_log import GameLog
+
+class ReplayReport:
+    def __init__(self) -> None:
+        self.games = 0
+        self.moves = 0
+        self.bot_updates = 0
+        self.seconds = 0.0
+        self.move_latencies = []
+        self.failures = {}
+        # the events each failed game's tracer still held, the moves leading up to the failure
+        self.failure_events = {}
+
+    @property
+    def games_per_second(self) -> float:
+        return self.games/self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def moves_per_second(self) -> float:
+        return self.moves/self.seconds if self.seconds > 0 else 0.0
+
+    def latency_percentiles(self, percentiles : Tuple = (50, 95, 99)) -> Dict[str, float]:
+        if len(self.move_latencies) == 0:
+            return {}
+        latencies = np.asarray(self.move_latencies)*1e6
+        return {f"p{percentile}_us" : float(np.percentile(latencies, percentile)) for percentile in percentiles}
+
+    def summary(self) -> Dict:
+        return {
+            "games" : self.games,
+            "moves" : self.moves,
+            "bot_updates" : self.bot_updates,
+            "failed_games" : len(self.failures),
+            "seconds" : round(self.seconds, 4),
+            "games_per_second" : round(self.games_per_second, 2),
+            "moves_per_second" : round(self.moves_per_second, 2),
+            **{key : round(value, 2) for key, value in self.latency_percentiles().items()},
+        }
+
+def seat_bots(
+    game_log : GameLog,
+    seats : List[Tuple[int, int]] = None,
+    templates : Dict = None,
+    tracer : Tracer = None,
+    statistics_config : StatisticsConfig = None
+) -> List[LitBot]:
+    # every seat at the table by default, bots are built from one template per game configuration
+    card_location_array = game_log.initial_card_location_array()
+    if seats is None:
+        seats = [(team_id, player_id) for team_id in range(game_log.team_count) for player_id in range(game_log.player_per_team_count)]
+
+    config = (game_log.team_count, game_log.player_count, game_log.card_codec.set_count, game_log.card_codec.set_card_count)
+    templates = templates if templates is not None else {}
+    if config not in templates:
+        templates[config] = MatrixTemplate(*config, epsilon = LitBot.EPSILON)
+
+    return [
+        LitBot(
+            team_id = team_id,
+            player_id = player_id,
+            team_count = game_log.team_count,
+            player_count = game_log.player_count,
+            initial_game_state_array = game_log.initial_game_state_array(team_id, player_id, card_location_array),
+            matrix_template = templates[config],
+            tracer = tracer,
+            statistics_config = statistics_config,
+            set_count = game_log.card_codec.set_count,
+            set_card_count = game_log.card_codec.set_card_count
+        )
+        for team_id, player_id in seats
+    ]
+
+def replay_game(game_log : GameLog, bots : List[LitBot], report : ReplayReport) -> None:
+    for game_action_dict in game_log.iter_actions():
+        start = time.perf_counter()
+        for bot in bots:
+            bot.update_game(game_action_dict)
+        report.move_latencies.append(time.perf_counter() - start)
+        report.moves += 1
+        report.bot_updates += len(bots)
+
+def replay_games(
+    game_logs : Iterable[GameLog],
+    seats : List[Tuple[int, int]] = None,
+    limit : int = None,
+    skip_failures : bool = True,
+    make_tracer : Callable[[str], Tracer] = None,
+    statistics_config : StatisticsConfig = None
+) -> ReplayReport:
+    # make_tracer(game_id) gives every game its own tracer, shared by the game's seats
+    report = ReplayReport()
+    templates = {}
+    start = time.perf_counter()
+    for game_log in game_logs:
+        if limit is not None and report.games >= limit:
+            break
+        tracer = make_tracer(game_log.game_id) if make_tracer is not None else None
+        try:
+            bots = seat_bots(game_log, seats, templates, tracer, statistics_config)
+            replay_game(game_log, bots, report)
+        except (AssertionError, KeyError, ValueError) as error:
+            if not skip_failures:
+                raise
+            report.failures[game_log.game_id] = repr(error)
+            if tracer is not None:
+                report.failure_events[game_log.game_id] = list(tracer.ring)
+            continue
+        report.games += 1
+    report.seconds = time.perf_counter() - start
+    return report
@@ -0,0 +1,325 @@
+import os
+import json
+import time
+import numpy as np
+from collections import OrderedDict
+from numpy.lib import format as npy_format
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+from ..prob_model import LitBot, StatisticsConfig
+from ..tracing import Tracer
+from ._game_log import GameLog
+from ._replay import ReplayReport, seat_bots
+
+# an archive is a directory of chunks, each column of a chunk one .npy file of rows x the column's shape:
+#   meta.json           shape, columns, rows per chunk; written last, an archive without it is incomplete
+#   index.npy           int64 [start, stop, team_id, player_id] rows of every trajectory, one per game and seat
+#   game_ids.json       the game_id of every trajectory
+#   <column>.<chunk>.npy
+# a trajectory never straddles two chunks, so reading one back is a view of the mapped files
+ARCHIVE_VERSION = 1
+ACTIONS = ("ask_card", "call_set")
+# the move column: these fields, then the player_id the call places each card of the set with, -1 when unused
+MOVE_FIELDS = ("action", "by_team", "by", "to_team", "to", "set_id", "card_id", "result")
+
+def archive_columns(shape : Tuple[int, int, int, int]) -> Dict[str, Tuple[Tuple[int, ...], str]]:
+    # column : (shape of one row, dtype); information holds -1 for unknown cells
+    return {
+        "move_id" : ((), "int32"),
+        "move" : ((len(MOVE_FIELDS) + shape[3],), "int16"),
+        "information" : (tuple(shape), "int8"),
+        "prob" : (tuple(shape), "float16"),
+        "inference_mask" : (tuple(shape), "bool"),
+    }
+
+def encode_move(action_dict : Dict, set_card_count : int) -> np.ndarray:
+    move = np.full(len(MOVE_FIELDS) + set_card_count, -1, dtype=np.int16)
+    move[0] = ACTIONS.index(action_dict["action"])
+    for idx, field in enumerate(MOVE_FIELDS[1:], 1):
+        if field in action_dict:
+            move[idx] = int(action_dict[field])
+    for card_id, player_id in action_dict.get("card_locations", {}).items():
+        move[len(MOVE_FIELDS) + int(card_id)] = int(player_id)
+    return move
+
+def chunk_path(path : str, column : str, chunk : int) -> str:
+    return os.path.join(path, f"{column}.{chunk:06d}.npy")
+
+def truncate_npy(path : str, rows : int) -> None:
+    # shrinks a preallocated .npy file to its first rows in place, the header keeps its length
+    # as numpy pads it for the first axis to grow, else the rows are copied to a new file
+    with open(path, "r+b") as f:
+        version = npy_format.read_magic(f)
+        if version == (1, 0):
+            read_header, write_header = npy_format.read_array_header_1_0, npy_format.write_array_header_1_0
+        else:
+            read_header, write_header = npy_format.read_array_header_2_0, npy_format.write_array_header_2_0
+        shape, fortran_order, dtype = read_header(f)
+        offset = f.tell()
+        header = {"descr" : npy_format.dtype_to_descr(dtype), "fortran_order" : fortran_order, "shape" : (rows, *shape[1:])}
+        f.seek(0)
+        write_header(f, header)
+        if f.tell() == offset:
+            f.truncate(offset + rows*int(np.prod(shape[1:], dtype=np.int64))*dtype.itemsize)
+            return
+        f.seek(0)
+        write_header(f, {**header, "shape" : shape})
+    array = np.load(path, mmap_mode="r")[:rows].copy()
+    np.save(path, array)
+
+class TrajectoryBuffer:
+    # the rows of one seat's trajectory until the writer commits them, grown by doubling
+    def __init__(self, game_id, team_id : int, player_id : int, columns : Dict, capacity : int = 256) -> None:
+        self.game_id = game_id
+        self.team_id = team_id
+        self.player_id = player_id
+        self.columns = columns
+        self.size = 0
+        self.arrays = {column : np.empty((capacity, *shape), dtype=dtype) for column, (shape, dtype) in columns.items()}
+
+    def __len__(self) -> int:
+        return self.size
+
+    def append(self, move_id : int, action_dict : Dict, bot : LitBot) -> None:
+        # the state of bot after it has seen move_id
+        if bot.information_matrix.shape != self.columns["information"][0]:
+            raise ValueError(f"bot shape {bot.information_matrix.shape} does not match the archive's {self.columns['information'][0]}")
+        if self.size == len(self.arrays["move_id"]):
+            self.arrays = {column : np.concatenate([array, np.empty_like(array)]) for column, array in self.arrays.items()}
+        row = self.size
+        self.arrays["move_id"][row] = move_id
+        self.arrays["move"][row] = encode_move(action_dict, bot.set_card_count)
+        self.arrays["information"][row] = np.where(bot.information_matrix == LitBot.EPSILON, -1, bot.information_matrix)
+        self.arrays["prob"][row] = np.nan_to_num(bot.prob_matrix)
+        self.arrays["inference_mask"][row] = bot.inference_store.inference_mask
+        self.size += 1
+
+class TrajectoryWriter:
+    # appends committed trajectories to the open chunk's memory mapped columns, preallocated at chunk_rows;
+    # a trajectory that does not fit seals the chunk, truncated to the rows it holds, and opens the next one.
+    # shape is taken from the first trajectory when not given
+    def __init__(self, path : str, shape : Tuple[int, int, int, int] = None, chunk_rows : int = 1 << 16) -> None:
+        if chunk_rows <= 0:
+            raise ValueError("chunk_rows has to be positive")
+        if os.path.exists(os.path.join(path, "meta.json")):
+            raise ValueError(f"{path} already holds an archive")
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.chunk_rows = chunk_rows
+        self.shape = tuple(shape) if shape is not None else None
+        self.columns = archive_columns(self.shape) if shape is not None else None
+        self.chunk_sizes : List[int] = []
+        self.chunk = None
+        self.chunk_capacity = 0
+        self.chunk_fill = 0
+        self.rows = 0
+        self.index : List[Tuple[int, int, int, int]] = []
+        self.game_ids : List = []
+        self.closed = False
+
+    def __enter__(self) -> "TrajectoryWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def trajectory(self, game_id, team_id : int, player_id : int, shape : Tuple[int, int, int, int]) -> TrajectoryBuffer:
+        if self.shape is None:
+            self.shape = tuple(shape)
+            self.columns = archive_columns(self.shape)
+        elif tuple(shape) != self.shape:
+            raise ValueError(f"game {game_id} has shape {tuple(shape)}, the archive holds {self.shape}")
+        return TrajectoryBuffer(game_id, team_id, player_id, self.columns)
+
+    def commit(self, trajectory : TrajectoryBuffer) -> None:
+        if self.closed:
+            raise ValueError("the writer is closed")
+        rows = len(trajectory)
+        if self.chunk is not None and self.chunk_fill + rows > self.chunk_capacity:
+            self.seal_chunk()
+        if self.chunk is None:
+            self.open_chunk(max(self.chunk_rows, rows))
+        stop = self.chunk_fill + rows
+        for column, array in self.chunk.items():
+            array[self.chunk_fill:stop] = trajectory.arrays[column][:rows]
+        self.chunk_fill = stop
+        self.index.append((self.rows, self.rows + rows, trajectory.team_id, trajectory.player_id))
+        self.game_ids.append(trajectory.game_id)
+        self.rows += rows
+
+    def open_chunk(self, capacity : int) -> None:
+        chunk = len(self.chunk_sizes)
+        self.chunk = {
+            column : npy_format.open_memmap(chunk_path(self.path, column, chunk), mode="w+", dtype=dtype, shape=(capacity, *shape))
+            for column, (shape, dtype) in self.columns.items()
+        }
+        self.chunk_capacity = capacity
+        self.chunk_fill = 0
+
+    def seal_chunk(self) -> None:
+        chunk = len(self.chunk_sizes)
+        for array in self.chunk.values():
+            array.flush()
+        self.chunk = None
+        if self.chunk_fill < self.chunk_capacity:
+            for column in self.columns:
+                truncate_npy(chunk_path(self.path, column, chunk), self.chunk_fill)
+        self.chunk_sizes.append(self.chunk_fill)
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        if self.chunk is not None:
+            self.seal_chunk()
+        np.save(os.path.join(self.path, "index.npy"), np.array(self.index, dtype=np.int64).reshape(-1, 4))
+        with open(os.path.join(self.path, "game_ids.json"), "w") as f:
+            json.dump(self.game_ids, f)
+        with open(os.path.join(self.path, "meta.json"), "w") as f:
+            json.dump({
+                "version" : ARCHIVE_VERSION,
+                "shape" : list(self.shape) if self.shape is not None else None,
+                "columns" : {column : {"shape" : list(shape), "dtype" : dtype} for column, (shape, dtype) in (self.columns or {}).items()},
+                "move_fields" : list(MOVE_FIELDS),
+                "chunk_sizes" : self.chunk_sizes,
+                "rows" : self.rows,
+                "trajectories" : len(self.index),
+            }, f, indent=4)
+        self.closed = True
+
+class TrajectoryArchive:
+    # read side of a TrajectoryWriter directory; columns are mapped on first use and at most
+    # max_mapped_chunks chunk files stay mapped, the least recently used are let go
+    def __init__(self, path : str, max_mapped_chunks : int = 256) -> None:
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        if meta["version"] != ARCHIVE_VERSION:
+            raise ValueError(f"{path} is a version {meta['version']} archive, expected {ARCHIVE_VERSION}")
+        self.path = path
+        self.shape = tuple(meta["shape"]) if meta["shape"] is not None else None
+        self.columns = tuple(meta["columns"])
+        self.chunk_sizes = meta["chunk_sizes"]
+        self.chunk_starts = np.concatenate([[0], np.cumsum(self.chunk_sizes, dtype=np.int64)])
+        self.index = np.load(os.path.join(path, "index.npy"), mmap_mode="r")
+        with open(os.path.join(path, "game_ids.json")) as f:
+            self.game_ids = json.load(f)
+        self.max_mapped_chunks = max_mapped_chunks
+        self.mapped : OrderedDict = OrderedDict()
+        self.game_index = None
+
+    def __len__(self) -> int:
+        return int(self.chunk_starts[-1])
+
+    @property
+    def trajectory_count(self) -> int:
+        return len(self.index)
+
+    def column_chunk(self, column : str, chunk : int) -> np.ndarray:
+        key = (column, chunk)
+        array = self.mapped.get(key)
+        if array is None:
+            if column not in self.columns:
+                raise KeyError(f"unknown column {column}, expected one of {self.columns}")
+            array = np.load(chunk_path(self.path, column, chunk), mmap_mode="r")
+            self.mapped[key] = array
+            while len(self.mapped) > self.max_mapped_chunks:
+                self.mapped.popitem(last=False)
+        self.mapped.move_to_end(key)
+        return array
+
+    def trajectory(self, idx : int, columns : Sequence[str] = None) -> Dict[str, np.ndarray]:
+        # read only views into the mapped chunk, nothing is copied
+        start, stop = int(self.index[idx, 0]), int(self.index[idx, 1])
+        chunk = int(np.searchsorted(self.chunk_starts, start, side="right")) - 1
+        offset = start - int(self.chunk_starts[chunk])
+        return {column : self.column_chunk(column, chunk)[offset:offset + stop - start] for column in (columns or self.columns)}
+
+    def trajectories_of(self, game_id) -> List[int]:
+        if self.game_index is None:
+            self.game_index = {}
+            for idx, trajectory_game_id in enumerate(self.game_ids):
+                self.game_index.setdefault(trajectory_game_id, []).append(idx)
+        return self.game_index.get(game_id, [])
+
+    def take(self, rows : np.ndarray, columns : Sequence[str] = None) -> Dict[str, np.ndarray]:
+        # rows in ascending order, gathered chunk by chunk into new arrays
+        rows = np.asarray(rows, dtype=np.int64)
+        chunks = np.searchsorted(self.chunk_starts, rows, side="right") - 1
+        bounds = np.flatnonzero(np.diff(chunks)) + 1
+        batch = {}
+        for column in (columns or self.columns):
+            parts = [
+                self.column_chunk(column, int(chunks[start]))[rows[start:stop] - self.chunk_starts[chunks[start]]]
+                for start, stop in zip(np.concatenate([[0], bounds]), np.concatenate([bounds, [len(rows)]]))
+                if stop > start
+            ]
+            batch[column] = np.concatenate(parts) if len(parts) != 1 else parts[0]
+        return batch
+
+    def iter_minibatches(
+        self,
+        batch_size : int,
+        columns : Sequence[str] = None,
+        seed : int = None,
+        chunks_per_shuffle : int = 4,
+        drop_last : bool = False
+    ) -> Iterator[Dict[str, np.ndarray]]:
+        # chunks come in a random order and rows are shuffled across chunks_per_shuffle of them at a time,
+        # so only a few chunks' row numbers are held whatever the archive's size; each batch is read in
+        # row order to keep the reads sequential within a chunk
+        if batch_size <= 0 or chunks_per_shuffle <= 0:
+            raise ValueError("batch_size and chunks_per_shuffle have to be positive")
+        rng = np.random.default_rng(seed)
+        chunk_order = rng.permutation(len(self.chunk_sizes))
+        carry = np.empty(0, dtype=np.int64)
+        for group_start in range(0, len(chunk_order), chunks_per_shuffle):
+            group = chunk_order[group_start:group_start + chunks_per_shuffle]
+            rows = np.concatenate([carry] + [np.arange(self.chunk_starts[chunk], self.chunk_starts[chunk + 1]) for chunk in group])
+            rng.shuffle(rows)
+            full = len(rows)//batch_size*batch_size
+            for start in range(0, full, batch_size):
+                yield self.take(np.sort(rows[start:start + batch_size]), columns)
+            carry = rows[full:]
+        if len(carry) > 0 and not drop_last:
+            yield self.take(np.sort(carry), columns)
+
+def export_trajectories(
+    game_logs : Iterable[GameLog],
+    writer : TrajectoryWriter,
+    seats : List[Tuple[int, int]] = None,
+    limit : int = None,
+    skip_failures : bool = True,
+    make_tracer : Callable[[str], Tracer] = None,
+    statistics_config : StatisticsConfig = None
+) -> ReplayReport:
+    # replays every game into its seats and commits their trajectories once the whole game has replayed,
+    # a game that fails leaves nothing in the archive
+    report = ReplayReport()
+    templates = {}
+    start = time.perf_counter()
+    for game_log in game_logs:
+        if limit is not None and report.games >= limit:
+            break
+        tracer = make_tracer(game_log.game_id) if make_tracer is not None else None
+        try:
+            bots = seat_bots(game_log, seats, templates, tracer, statistics_config)
+            trajectories = [writer.trajectory(game_log.game_id, bot.team_id, bot.player_id, bot.information_matrix.shape) for bot in bots]
+            for game_action_dict in game_log.iter_actions():
+                (move_id, action_dict), = game_action_dict.items()
+                move_start = time.perf_counter()
+                for bot, trajectory in zip(bots, trajectories):
+                    bot.update_game(game_action_dict)
+                    trajectory.append(move_id, action_dict, bot)
+                report.move_latencies.append(time.perf_counter() - move_start)
+                report.moves += 1
+                report.bot_updates += len(bots)
+        except (AssertionError, KeyError, ValueError) as error:
+            if not skip_failures:
+                raise
+            report.failures[game_log.game_id] = repr(error)
+            if tracer is not None:
+                report.failure_events[game_log.game_id] = list(tracer.ring)
+            continue
+        for trajectory in trajectories:
+            writer.commit(trajectory)
+        report.games += 1
+    report.seconds = time.perf_counter() - start
+    return report
@@ -0,0 +1,3 @@
+from ._snapshot import dump_bot, load_bot, dump_game, load_game, game_version, SNAPSHOT_VERSION
+from ._backends import SnapshotBackend, MemoryBackend, FileBackend, MongoBackend
+from ._write_behind import WriteBehind
@@ -0,0 +1,115 @@
+import os
+import asyncio
+from abc import ABC, abstractmethod
+from urllib.parse import quote, unquote
+from typing import Dict, List, Optional
+
+class SnapshotBackend(ABC):
+    # stores the latest snapshot per game_id, write_many receives one coalesced batch at a time
+    @abstractmethod
+    async def write_many(self, snapshots : Dict[str, bytes]) -> None:
+        pass
+
+    @abstractmethod
+    async def read(self, game_id : str) -> Optional[bytes]:
+        pass
+
+    @abstractmethod
+    async def delete(self, game_id : str) -> None:
+        pass
+
+    @abstractmethod
+    async def game_ids(self) -> List[str]:
+        pass
+
+class MemoryBackend(SnapshotBackend):
+    # in-process fake, delay simulates a slow store
+    def __init__(self, delay : float = 0.0) -> None:
+        self.delay = delay
+        self.snapshots : Dict[str, bytes] = {}
+        self.batches = 0
+        self.writes = 0
+
+    async def write_many(self, snapshots : Dict[str, bytes]) -> None:
+        if self.delay > 0:
+            await asyncio.sleep(self.delay)
+        self.snapshots.update(snapshots)
+        self.batches += 1
+        self.writes += len(snapshots)
+
+    async def read(self, game_id : str) -> Optional[bytes]:
+        return self.snapshots.get(game_id)
+
+    async def delete(self, game_id : str) -> None:
+        self.snapshots.pop(game_id, None)
+
+    async def game_ids(self) -> List[str]:
+        return list(self.snapshots)
+
+class FileBackend(SnapshotBackend):
+    # one file per game, written to a temporary name and renamed so readers never see half a snapshot
+    SUFFIX = ".snap"
+
+    def __init__(self, directory : str) -> None:
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, game_id : str) -> str:
+        return os.path.join(self.directory, quote(game_id, safe="") + FileBackend.SUFFIX)
+
+    def write_file(self, game_id : str, data : bytes) -> None:
+        path = self.path(game_id)
+        with open(path + ".tmp", "wb") as f:
+            f.write(data)
+        os.replace(path + ".tmp", path)
+
+    def read_file(self, game_id : str) -> Optional[bytes]:
+        try:
+            with open(self.path(game_id), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    async def write_many(self, snapshots : Dict[str, bytes]) -> None:
+        def write_all():
+            for game_id, data in snapshots.items():
+                self.write_file(game_id, data)
+        await asyncio.to_thread(write_all)
+
+    async def read(self, game_id : str) -> Optional[bytes]:
+        return await asyncio.to_thread(self.read_file, game_id)
+
+    async def delete(self, game_id : str) -> None:
+        try:
+            os.remove(self.path(game_id))
+        except FileNotFoundError:
+            pass
+
+    async def game_ids(self) -> List[str]:
+        return [unquote(name[:-len(FileBackend.SUFFIX)]) for name in os.listdir(self.directory) if name.endswith(FileBackend.SUFFIX)]
+
+class MongoBackend(SnapshotBackend):
+    # motor is only imported when this backend is built, the rest of the package runs without it
+    def __init__(self, uri : str = None, database : str = "litbot", collection : str = "snapshots", client = None) -> None:
+        if client is None:
+            from motor.motor_asyncio import AsyncIOMotorClient
+            client = AsyncIOMotorClient(uri)
+        self.client = client
+        self.collection = client[database][collection]
+
+    async def write_many(self, snapshots : Dict[str, bytes]) -> None:
+        from pymongo import ReplaceOne
+        await self.collection.bulk_write(
+            [ReplaceOne({"_id" : game_id}, {"_id" : game_id, "data" : data}, upsert=True) for game_id, data in snapshots.items()],
+            ordered=False
+        )
+
+    async def read(self, game_id : str) -> Optional[bytes]:
+        document = await self.collection.find_one({"_id" : game_id})
+        return bytes(document["data"]) if document is not None else None
+
+    async def delete(self, game_id : str) -> None:
+        await self.collection.delete_one({"_id" : game_id})
+
+    async def game_ids(self) -> List[str]:
+        return [document["_id"] async for document in self.collection.find({}, {"_id" : 1})]
@@ -0,0 +1,156 @@
+import json
+import struct
+import numpy as np
+from typing import Callable, Dict, Tuple
+from ..prob_model import LitBot, MatrixTemplate, InferenceStore, StatisticsConfig, STATISTICS_SERIES
+from ..tracing import Tracer, PipelineMetrics
+
+# bump SNAPSHOT_VERSION whenever the layout changes, load_bot refuses versions it does not know
+BOT_MAGIC = b"LBOT"
+GAME_MAGIC = b"LGAM"
+SNAPSHOT_VERSION = 2
+PREAMBLE = struct.Struct("<4sHI")
+
+# arrays holding EPSILON for unknown and small integers otherwise are stored as int8, -1 for EPSILON
+TRISTATE_ARRAYS = ("player_set_card_count", "active_sets", "active_cards", "recent_card_array")
+
+def encode_tristate(array : np.ndarray, epsilon : float) -> np.ndarray:
+    codes = np.where(array == epsilon, -1, array)
+    if not np.array_equal(codes, np.round(codes)) or codes.min(initial=0) < -1 or codes.max(initial=0) > 127:
+        raise ValueError("array holds values other than EPSILON and small integers")
+    return codes.astype(np.int8)
+
+def decode_tristate(codes : np.ndarray, epsilon : float) -> np.ndarray:
+    return np.where(codes == -1, epsilon, codes.astype(float))
+
+def pack(header : Dict, arrays : Dict[str, np.ndarray], magic : bytes) -> bytes:
+    # preamble, json header describing the arrays, then the raw array buffers in header order
+    header = {**header, "arrays" : [[name, array.dtype.str, list(array.shape)] for name, array in arrays.items()]}
+    header_bytes = json.dumps(header, separators=(",", ":")).encode()
+    return b"".join([PREAMBLE.pack(magic, SNAPSHOT_VERSION, len(header_bytes)), header_bytes, *(np.ascontiguousarray(array).tobytes() for array in arrays.values())])
+
+def unpack(data : bytes, magic : bytes) -> Tuple[Dict, Dict[str, np.ndarray]]:
+    found_magic, version, header_length = PREAMBLE.unpack_from(data)
+    if found_magic != magic:
+        raise ValueError(f"not a {magic.decode()} snapshot")
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f"unsupported snapshot version {version}, expected {SNAPSHOT_VERSION}")
+    offset = PREAMBLE.size
+    header = json.loads(bytes(data[offset:offset + header_length]))
+    offset += header_length
+
+    arrays = {}
+    for name, dtype, shape in header.pop("arrays"):
+        dtype = np.dtype(dtype)
+        count = int(np.prod(shape))
+        arrays[name] = np.frombuffer(data, dtype=dtype, count=count, offset=offset).reshape(shape)
+        offset += count*dtype.itemsize
+    return header, arrays
+
+def dump_bot(bot : LitBot) -> bytes:
+    epsilon = LitBot.EPSILON
+    information_matrix = bot.information_matrix
+    store = bot.inference_store
+    arrays = {
+        # two packed bits per cell, neither set means EPSILON
+        "known_one" : np.packbits(information_matrix == 1),
+        "known_zero" : np.packbits(information_matrix == 0),
+        "initial_game_state_array" : np.packbits(np.asarray(bot.initial_game_state_array) == 1),
+        "player_card_count" : bot.player_card_count.astype(np.int8),
+        **{name : encode_tristate(getattr(bot, name), epsilon) for name in TRISTATE_ARRAYS},
+        "inference_team_ids" : store.team_ids[:store.size].astype(np.int8),
+        "inference_player_ids" : store.player_ids[:store.size].astype(np.int8),
+        "inference_set_ids" : store.set_ids[:store.size].astype(np.int8),
+        "inference_card_ids" : store.card_ids[:store.size].astype(np.int8),
+        "inference_status" : store.status[:store.size],
+        **{f"statistics_{name}" : series for name, series in bot.statistics.export().items()},
+    }
+    header = {
+        "config" : [bot.team_count, bot.player_count, bot.set_count, bot.set_card_count],
+        "seat" : [bot.team_id, bot.player_id],
+        "fake_game_seed" : bot.fake_game_seed,
+        "state_version" : bot.state_version,
+        "state_versions" : bot.state_versions,
+        "inference_move_ids" : store.move_ids,
+        "statistics_moves_seen" : bot.statistics.moves_seen,
+    }
+    return pack(header, arrays, BOT_MAGIC)
+
+def load_bot(
+    data : bytes,
+    matrix_template : MatrixTemplate = None,
+    tracer : Tracer = None,
+    metrics : PipelineMetrics = None,
+    statistics_config : StatisticsConfig = None
+) -> LitBot:
+    header, arrays = unpack(data, BOT_MAGIC)
+    team_count, player_count, set_count, set_card_count = header["config"]
+    shape = (team_count, player_count//team_count, set_count, set_card_count)
+    size = int(np.prod(shape))
+
+    bot = LitBot(
+        team_id = header["seat"][0],
+        player_id = header["seat"][1],
+        team_count = team_count,
+        player_count = player_count,
+        initial_game_state_array = np.unpackbits(arrays["initial_game_state_array"], count=set_count*set_card_count).reshape(set_count, set_card_count).astype(int),
+        matrix_template = matrix_template,
+        tracer = tracer,
+        metrics = metrics,
+        statistics_config = statistics_config,
+        set_count = set_count,
+        set_card_count = set_card_count
+    )
+    bot.fake_game_seed = header["fake_game_seed"]
+
+    known_one = np.unpackbits(arrays["known_one"], count=size).reshape(shape).astype(bool)
+    known_zero = np.unpackbits(arrays["known_zero"], count=size).reshape(shape).astype(bool)
+    bot.information_matrix = np.where(known_one, 1.0, np.where(known_zero, 0.0, LitBot.EPSILON))
+    bot.player_card_count = arrays["player_card_count"].astype(int)
+    for name in TRISTATE_ARRAYS:
+        setattr(bot, name, decode_tristate(arrays[name], LitBot.EPSILON))
+
+    bot.inference_store = InferenceStore.restore(
+        shape,
+        header["inference_move_ids"],
+        arrays["inference_team_ids"],
+        arrays["inference_player_ids"],
+        arrays["inference_set_ids"],
+        arrays["inference_card_ids"],
+        arrays["inference_status"]
+    )
+    bot.statistics.restore({name : arrays[f"statistics_{name}"] for name in ("move",) + STATISTICS_SERIES}, header["statistics_moves_seen"])
+
+    # a snapshot is taken between moves, the hard rules are already at their fixpoint
+    bot.propagator.clear()
+    bot.state_version = header["state_version"]
+    bot.state_versions = dict(header["state_versions"])
+    bot.clear_matrix_cache()
+    return bot
+
+def dump_game(bots : Dict[Tuple[int, int], LitBot]) -> bytes:
+    # every seat of a game in one blob, the bot snapshots are stored back to back
+    blobs = {seat : dump_bot(bot) for seat, bot in bots.items()}
+    arrays = {f"{team_id},{player_id}" : np.frombuffer(blob, dtype=np.uint8) for (team_id, player_id), blob in blobs.items()}
+    return pack({"version" : game_version(bots)}, arrays, GAME_MAGIC)
+
+def load_game(
+    data : bytes,
+    template_for : Callable[[int, int, int, int], MatrixTemplate] = None,
+    tracer : Tracer = None,
+    metrics : PipelineMetrics = None,
+    statistics_config : StatisticsConfig = None
+) -> Dict[Tuple[int, int], LitBot]:
+    # template_for(team_count, player_count, set_count, set_card_count) lets a registry share its templates with restored bots
+    _, arrays = unpack(data, GAME_MAGIC)
+    bots = {}
+    for seat, blob in arrays.items():
+        team_id, player_id = map(int, seat.split(","))
+        header, _ = unpack(blob, BOT_MAGIC)
+        template = template_for(*header["config"]) if template_for is not None else None
+        bots[(team_id, player_id)] = load_bot(blob, template, tracer, metrics, statistics_config)
+    return bots
+
+def game_version(bots : Dict[Tuple[int, int], LitBot]) -> int:
+    # bots only ever move their state_version forward, so the sum orders a game's snapshots
+    return sum(bot.state_version for bot in bots.values())
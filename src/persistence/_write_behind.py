@@ -0,0 +1,112 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Optional
+from ._backends import SnapshotBackend
+
+# serializes a game's current state when awaited, None once there is nothing left to write
+Snapshot = Callable[[], Awaitable[Optional[bytes]]]
+
+class WriteBehind:
+    # games are marked dirty on submit and only serialized at the next flush, so a game updated
+    # many times between flushes costs one serialization and one write; flushes run every
+    # flush_interval seconds or as soon as max_batch games are pending
+    def __init__(self, backend : SnapshotBackend, flush_interval : float = 0.5, max_batch : int = 64) -> None:
+        self.backend = backend
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.pending : Dict[str, Snapshot] = {}
+        self.flush_lock = asyncio.Lock()
+        self.wake = asyncio.Event()
+        self.task : Optional[asyncio.Task] = None
+
+        self.submitted = 0
+        self.coalesced = 0
+        self.serialized = 0
+        self.written = 0
+        self.flushes = 0
+        self.failures = 0
+        self.last_error : Optional[BaseException] = None
+
+    def submit(self, game_id : str, snapshot : Snapshot) -> None:
+        # snapshot is awaited at the flush, it should take the game's lock and serialize off the loop
+        self.submitted += 1
+        if game_id in self.pending:
+            self.coalesced += 1
+        self.pending[game_id] = snapshot
+        if len(self.pending) >= self.max_batch:
+            self.wake.set()
+
+    async def flush(self) -> int:
+        async with self.flush_lock:
+            if len(self.pending) == 0:
+                return 0
+            batch, self.pending = self.pending, {}
+            try:
+                blobs = await asyncio.gather(*(snapshot() for snapshot in batch.values()))
+                data = {game_id : blob for game_id, blob in zip(batch, blobs) if blob is not None}
+                self.serialized += len(data)
+                if len(data) > 0:
+                    await self.backend.write_many(data)
+            except Exception as error:
+                # retried on the next flush, a game submitted again meanwhile is serialized once either way
+                for game_id, snapshot in batch.items():
+                    self.pending.setdefault(game_id, snapshot)
+                self.failures += 1
+                self.last_error = error
+                raise
+            self.written += len(data)
+            self.flushes += 1
+            return len(data)
+
+    async def read(self, game_id : str) -> Optional[bytes]:
+        # a pending game is newer than whatever the backend holds
+        if game_id in self.pending:
+            data = await self.pending[game_id]()
+            if data is not None:
+                return data
+        return await self.backend.read(game_id)
+
+    async def delete(self, game_id : str) -> None:
+        async with self.flush_lock:
+            self.pending.pop(game_id, None)
+            await self.backend.delete(game_id)
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self.wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self.wake.clear()
+            try:
+                await self.flush()
+            except Exception:
+                pass
+
+    def start(self) -> None:
+        if self.task is None:
+            # asyncio primitives bind to the loop that first waits on them, start on a fresh loop gets fresh ones
+            self.flush_lock = asyncio.Lock()
+            self.wake = asyncio.Event()
+            self.task = asyncio.get_running_loop().create_task(self.run())
+
+    async def close(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        await self.flush()
+
+    @property
+    def stats(self) -> Dict:
+        return {
+            "pending" : len(self.pending),
+            "submitted" : self.submitted,
+            "coalesced" : self.coalesced,
+            "serialized" : self.serialized,
+            "written" : self.written,
+            "flushes" : self.flushes,
+            "failures" : self.failures,
+        }
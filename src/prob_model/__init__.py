@@ -1 +1,12 @@
-from ._deterministic_bot import LitBot
\ No newline at end of file
+from ._deterministic_bot import LitBot
+from ._matrix_template import MatrixTemplate
+from ._batched_bot import BatchedLitBot, MoveBatch
+from ._inference_store import InferenceStore
+from ._exact_marginals import exact_marginals, log_deal_count
+from ._deal_sampler import DealSampler, DealEstimate
+from ._recommender import MoveRecommender, MoveScores
+from ._bitboard import BitboardState, BitboardBot
+from ._history import MoveDelta
+from ._statistics import StatisticsRecorder, StatisticsConfig, STATISTICS_SERIES
+from ._table import LitTable, TableSeat, SeatInferenceStore
+from ._callability import CallabilityEngine, CallScores
@@ -0,0 +1,244 @@
+import numpy as np
+from typing import List, Sequence
+from ..abstract_classes import LiteratureGameAbstract
+from ._deterministic_bot import LitBot
+
+NO_MOVE = -1
+ASK_CARD = 0
+CALL_SET = 1
+
+ACTION_CODES = {
+    "ask_card" : ASK_CARD,
+    "call_set" : CALL_SET,
+}
+
+class MoveBatch:
+    # one move per game as parallel arrays, games without a move carry NO_MOVE
+    __slots__ = ("action", "by_team", "by", "to_team", "to", "set_id", "card_id", "result", "card_locations")
+
+    def __init__(
+        self,
+        action : np.ndarray,
+        by_team : np.ndarray,
+        by : np.ndarray,
+        to_team : np.ndarray,
+        to : np.ndarray,
+        set_id : np.ndarray,
+        card_id : np.ndarray,
+        result : np.ndarray,
+        card_locations : np.ndarray
+    ) -> None:
+
+        self.action = action
+        self.by_team = by_team
+        self.by = by
+        self.to_team = to_team
+        self.to = to
+        self.set_id = set_id
+        self.card_id = card_id
+        self.result = result
+        self.card_locations = card_locations
+
+    def __len__(self) -> int:
+        return len(self.action)
+
+    @classmethod
+    def from_action_dicts(cls, game_action_dicts : Sequence, set_card_count : int = 6) -> "MoveBatch":
+        # accepts LitBot.update_game inputs ({move_id : action}), bare action dicts or None
+        game_count = len(game_action_dicts)
+        fields = np.full((8, game_count), -1, dtype=np.int64)
+        card_locations = np.full((game_count, set_card_count), -1, dtype=np.int64)
+
+        for game_idx, game_action_dict in enumerate(game_action_dicts):
+            if game_action_dict is None:
+                continue
+            if "action" not in game_action_dict:
+                game_action_dict = list(game_action_dict.values())[0]
+
+            action = ACTION_CODES.get(game_action_dict["action"], NO_MOVE)
+            fields[0, game_idx] = action
+            fields[1, game_idx] = game_action_dict["by_team"]
+            fields[2, game_idx] = game_action_dict["by"]
+            fields[5, game_idx] = game_action_dict["set_id"]
+            fields[7, game_idx] = game_action_dict["result"]
+            if action == ASK_CARD:
+                fields[3, game_idx] = game_action_dict["to_team"]
+                fields[4, game_idx] = game_action_dict["to"]
+                fields[6, game_idx] = game_action_dict["card_id"]
+            elif action == CALL_SET:
+                for card_id, player_id in game_action_dict["card_locations"].items():
+                    card_locations[game_idx, int(card_id)] = player_id
+
+        return cls(*fields, card_locations)
+
+def completeness_pass(
+    information_matrix : np.ndarray,
+    player_card_count : np.ndarray,
+    set_card_count : int,
+    epsilon : float,
+    active : np.ndarray
+) -> np.ndarray:
+    # one pass of the three hard rules over a stack of information matrices, in place
+    # player_card_count is per row or shared by every row, returns the rows that changed
+    is_epsilon = information_matrix == epsilon
+    is_one = information_matrix == 1
+    changed = np.zeros(len(information_matrix), dtype=bool)
+
+    # card location has to be atleast 1
+    card_complete = (is_epsilon.sum(axis=(1, 2)) == 1) & ~is_one.any(axis=(1, 2)) & active[:, None, None]
+    if card_complete.any():
+        filled = is_epsilon & card_complete[:, None, None]
+        information_matrix[filled] = 1
+        is_epsilon &= ~filled
+        is_one |= filled
+        changed |= card_complete.any(axis=(1, 2))
+
+    # player card count match
+    player_complete = (is_one.sum(axis=(3, 4)) == player_card_count) & active[:, None, None] & is_epsilon.any(axis=(3, 4))
+    if player_complete.any():
+        cleared = is_epsilon & player_complete[..., None, None]
+        information_matrix[cleared] = 0
+        is_epsilon &= ~cleared
+        changed |= player_complete.any(axis=(1, 2))
+
+    # set card count match
+    set_complete = (is_one.sum(axis=(1, 2, 4)) == set_card_count) & active[:, None] & is_epsilon.any(axis=(1, 2, 4))
+    if set_complete.any():
+        information_matrix[is_epsilon & set_complete[:, None, None, :, None]] = 0
+        changed |= set_complete.any(axis=1)
+
+    return changed
+
+class BatchedLitBot(LiteratureGameAbstract):
+    EPSILON = LitBot.EPSILON
+
+    def __init__(
+        self,
+        team_ids : np.ndarray,
+        player_ids : np.ndarray,
+        team_count : int,
+        player_count : int,
+        initial_game_state_arrays : np.ndarray,
+        set_count : int = 8,
+        set_card_count : int = 6
+    ) -> None:
+
+        super().__init__(
+            team_count = team_count,
+            player_count = player_count,
+            set_count = set_count,
+            set_card_count = set_card_count
+        )
+
+        self.team_ids = np.asarray(team_ids)
+        self.player_ids = np.asarray(player_ids)
+        self.initial_game_state_arrays = np.asarray(initial_game_state_arrays)
+
+        if self.initial_game_state_arrays.shape != (self.game_count, self.set_count, self.set_card_count):
+            raise ValueError(f"initial_game_state_arrays must have shape {(self.game_count, self.set_count, self.set_card_count)}: {self.initial_game_state_arrays.shape}")
+        if (self.team_ids >= self.team_count).any() or (self.player_ids >= self.player_per_team_count).any():
+            raise ValueError("team_ids and player_ids must index a seat in the game")
+
+        self.initialize_matrix()
+
+    @classmethod
+    def from_bots(cls, bots : List[LitBot]) -> "BatchedLitBot":
+        batched_bot = cls(
+            team_ids = [bot.team_id for bot in bots],
+            player_ids = [bot.player_id for bot in bots],
+            team_count = bots[0].team_count,
+            player_count = bots[0].player_count,
+            initial_game_state_arrays = np.stack([bot.initial_game_state_array for bot in bots]),
+            set_count = bots[0].set_count,
+            set_card_count = bots[0].set_card_count
+        )
+        batched_bot.information_matrix = np.stack([bot.information_matrix for bot in bots]).astype(float)
+        batched_bot.player_card_count = np.stack([bot.player_card_count for bot in bots])
+        batched_bot.active_sets = np.stack([bot.active_sets for bot in bots]).astype(float)
+        batched_bot.active_cards = np.stack([bot.active_cards for bot in bots]).astype(float)
+        batched_bot.recent_card_array = np.stack([bot.recent_card_array for bot in bots]).astype(float)
+        return batched_bot
+
+    @property
+    def game_count(self) -> int:
+        return len(self.team_ids)
+
+    def initialize_matrix(self) -> None:
+
+        game_idx = np.arange(self.game_count)
+        in_hand = self.initial_game_state_arrays == 1
+
+        self.information_matrix = np.where(
+            in_hand[:, None, None],
+            0,
+            BatchedLitBot.EPSILON
+        ) * np.ones((1, self.team_count, self.player_per_team_count, 1, 1))
+        self.information_matrix[game_idx, self.team_ids, self.player_ids] = in_hand
+
+        self.player_card_count = np.full((self.game_count, self.team_count, self.player_per_team_count), self.card_per_player_count)
+        self.active_sets = np.full((self.game_count, self.set_count), BatchedLitBot.EPSILON)
+        self.active_cards = np.full((self.game_count, self.set_count, self.set_card_count), BatchedLitBot.EPSILON)
+        self.recent_card_array = np.full((self.game_count, self.team_count, self.set_count), BatchedLitBot.EPSILON)
+
+    def update_information_matrix_hard(self, moves : MoveBatch) -> None:
+
+        ask_idx = np.flatnonzero(moves.action == ASK_CARD)
+        miss_idx = ask_idx[moves.result[ask_idx] == 0]
+        hit_idx = ask_idx[moves.result[ask_idx] == 1]
+
+        miss_set, miss_card = moves.set_id[miss_idx], moves.card_id[miss_idx]
+        assert not (self.information_matrix[miss_idx, moves.by_team[miss_idx], moves.by[miss_idx], miss_set, miss_card] == 1).any()
+        assert not (self.information_matrix[miss_idx, moves.to_team[miss_idx], moves.to[miss_idx], miss_set, miss_card] == 1).any()
+        self.information_matrix[miss_idx, moves.by_team[miss_idx], moves.by[miss_idx], miss_set, miss_card] = 0
+        self.information_matrix[miss_idx, moves.to_team[miss_idx], moves.to[miss_idx], miss_set, miss_card] = 0
+
+        hit_set, hit_card = moves.set_id[hit_idx], moves.card_id[hit_idx]
+        self.information_matrix[hit_idx, :, :, hit_set, hit_card] = 0
+        self.information_matrix[hit_idx, moves.by_team[hit_idx], moves.by[hit_idx], hit_set, hit_card] = 1
+        self.player_card_count[hit_idx, moves.by_team[hit_idx], moves.by[hit_idx]] += 1
+        self.player_card_count[hit_idx, moves.to_team[hit_idx], moves.to[hit_idx]] -= 1
+
+        # every called card is placed with the calling team
+        call_idx = np.flatnonzero(moves.action == CALL_SET)
+        call_game, call_card = np.nonzero(moves.card_locations[call_idx] >= 0)
+        call_game = call_idx[call_game]
+        call_set = moves.set_id[call_game]
+        self.information_matrix[call_game, :, :, call_set, call_card] = 0
+        self.information_matrix[call_game, moves.by_team[call_game], moves.card_locations[call_game, call_card], call_set, call_card] = 1
+
+    def completeness_pass(self, active : np.ndarray) -> np.ndarray:
+        return completeness_pass(self.information_matrix, self.player_card_count, self.set_card_count, BatchedLitBot.EPSILON, active)
+
+    def completeness_check_hard(self, moved : np.ndarray) -> None:
+        # passes repeat on the games that changed until every game reaches its fixpoint
+        active = moved
+        while active.any():
+            active = self.completeness_pass(active)
+
+    def update_active_arrays(self, moves : MoveBatch) -> None:
+
+        ask_idx = np.flatnonzero(moves.action == ASK_CARD)
+        miss_idx = ask_idx[moves.result[ask_idx] == 0]
+        hit_idx = ask_idx[moves.result[ask_idx] == 1]
+
+        self.active_cards[miss_idx, moves.set_id[miss_idx], moves.card_id[miss_idx]] = 1
+        self.recent_card_array[miss_idx, moves.by_team[miss_idx], moves.set_id[miss_idx]] = moves.card_id[miss_idx]
+        self.active_cards[hit_idx, moves.set_id[hit_idx], moves.card_id[hit_idx]] = 0
+        self.active_sets[ask_idx, moves.set_id[ask_idx]] = 1
+
+        call_idx = np.flatnonzero(moves.action == CALL_SET)
+        self.active_cards[call_idx, moves.set_id[call_idx], :] = 0
+        self.active_sets[call_idx, moves.set_id[call_idx]] = 0
+
+    def update_game(self, moves : MoveBatch) -> None:
+        if len(moves) != self.game_count:
+            raise ValueError(f"expected one move per game: {len(moves)} != {self.game_count}")
+
+        moved = moves.action != NO_MOVE
+        self.update_information_matrix_hard(moves)
+        self.completeness_check_hard(moved)
+        self.update_active_arrays(moves)
+
+    @property
+    def truth_matrix(self) -> np.ndarray:
+        return np.where(self.information_matrix == BatchedLitBot.EPSILON, 0, self.information_matrix)
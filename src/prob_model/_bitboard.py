@@ -0,0 +1,215 @@
+import numpy as np
+from typing import List
+from ..abstract_classes import LiteratureBotAbstract
+
+class BitboardState:
+    # hard knowledge as one "has" and one "cannot have" bitmask per player, bit set_id*set_card_count + card_id
+    # a card in neither mask is what information_matrix calls EPSILON
+    __slots__ = ("team_count", "player_per_team_count", "set_count", "set_card_count", "full_mask", "set_masks", "has", "cannot", "card_count")
+
+    def __init__(self, team_count : int, player_per_team_count : int, set_count : int, set_card_count : int, card_count : List[int]) -> None:
+        self.team_count = team_count
+        self.player_per_team_count = player_per_team_count
+        self.set_count = set_count
+        self.set_card_count = set_card_count
+        self.full_mask = (1 << set_count*set_card_count) - 1
+        self.set_masks = [((1 << set_card_count) - 1) << set_id*set_card_count for set_id in range(set_count)]
+        self.has = [0]*(team_count*player_per_team_count)
+        self.cannot = [0]*(team_count*player_per_team_count)
+        self.card_count = list(card_count)
+
+    def player_index(self, team_id : int, player_id : int) -> int:
+        return team_id*self.player_per_team_count + player_id
+
+    def card_bit(self, set_id : int, card_id : int) -> int:
+        return 1 << set_id*self.set_card_count + card_id
+
+    def unknown(self, player : int) -> int:
+        return self.full_mask & ~(self.has[player] | self.cannot[player])
+
+    def place(self, player : int, bit : int) -> None:
+        # the card is with player and nobody else
+        for other in range(len(self.has)):
+            self.has[other] &= ~bit
+            self.cannot[other] |= bit
+        self.has[player] |= bit
+        self.cannot[player] &= ~bit
+
+    def apply_ask(self, asker : int, answerer : int, set_id : int, card_id : int, result : int) -> None:
+        bit = self.card_bit(set_id, card_id)
+        if result == 0:
+            assert not self.has[asker] & bit
+            assert not self.has[answerer] & bit
+            self.cannot[asker] |= bit
+            self.cannot[answerer] |= bit
+        else:
+            self.place(asker, bit)
+            self.card_count[asker] += 1
+            self.card_count[answerer] -= 1
+
+    def apply_call(self, team_id : int, set_id : int, card_locations : dict) -> None:
+        for card_id, player_id in card_locations.items():
+            self.place(self.player_index(team_id, int(player_id)), self.card_bit(set_id, int(card_id)))
+
+    def propagate(self) -> int:
+        # the three completeness rules of ConstraintPropagator as popcounts and bitwise ops, to a fixpoint
+        has, cannot, full_mask = self.has, self.cannot, self.full_mask
+        players = range(len(has))
+        deductions = 0
+        changed = True
+        while changed:
+            changed = False
+            unknowns = [full_mask & ~(has[player] | cannot[player]) for player in players]
+            held = 0
+            once = 0
+            twice = 0
+            for player in players:
+                held |= has[player]
+                twice |= once & unknowns[player]
+                once |= unknowns[player]
+
+            # a card nobody holds yet with a single player left who may
+            only_candidate = once & ~twice & ~held
+            if only_candidate:
+                for player in players:
+                    gained = only_candidate & unknowns[player]
+                    if gained:
+                        has[player] |= gained
+                        unknowns[player] &= ~gained
+                        held |= gained
+                        deductions += gained.bit_count()
+                        changed = True
+
+            # a player whose known cards fill the hand cannot hold anything else
+            for player in players:
+                if unknowns[player] and has[player].bit_count() == self.card_count[player]:
+                    cannot[player] |= unknowns[player]
+                    deductions += unknowns[player].bit_count()
+                    unknowns[player] = 0
+                    changed = True
+
+            # a set whose every card is located is ruled out for everyone else
+            for set_mask in self.set_masks:
+                if held & set_mask == set_mask and once & set_mask:
+                    for player in players:
+                        excluded = unknowns[player] & set_mask
+                        if excluded:
+                            cannot[player] |= excluded
+                            deductions += excluded.bit_count()
+                            changed = True
+        return deductions
+
+    @property
+    def mask_dtype(self):
+        # the masks are python ints of set_count*set_card_count bits, uint64 only holds decks of up to 64 cards
+        return np.uint64 if self.set_count*self.set_card_count <= 64 else object
+
+    def has_array(self) -> np.ndarray:
+        return np.array(self.has, dtype=self.mask_dtype)
+
+    def cannot_array(self) -> np.ndarray:
+        return np.array(self.cannot, dtype=self.mask_dtype)
+
+    def masks_to_matrix(self, masks : List[int]) -> np.ndarray:
+        # the bits go through little endian bytes, so decks of any size unpack without a fixed width integer
+        card_total = self.set_count*self.set_card_count
+        byte_count = (card_total + 7)//8
+        data = np.frombuffer(b"".join(mask.to_bytes(byte_count, "little") for mask in masks), dtype=np.uint8)
+        bits = np.unpackbits(data.reshape(len(masks), byte_count), axis=1, count=card_total, bitorder="little")
+        return bits.astype(bool).reshape(self.team_count, self.player_per_team_count, self.set_count, self.set_card_count)
+
+    def to_information_matrix(self, epsilon : float) -> np.ndarray:
+        information_matrix = np.full((self.team_count, self.player_per_team_count, self.set_count, self.set_card_count), epsilon)
+        information_matrix[self.masks_to_matrix(self.cannot)] = 0
+        information_matrix[self.masks_to_matrix(self.has)] = 1
+        return information_matrix
+
+    @classmethod
+    def from_information_matrix(cls, information_matrix : np.ndarray, player_card_count : np.ndarray) -> "BitboardState":
+        team_count, player_per_team_count, set_count, set_card_count = information_matrix.shape
+        state = cls(team_count, player_per_team_count, set_count, set_card_count, player_card_count.reshape(-1).tolist())
+        flat = information_matrix.reshape(team_count*player_per_team_count, -1)
+        state.has = [int.from_bytes(row.tobytes(), "little") for row in np.packbits(flat == 1, axis=1, bitorder="little")]
+        state.cannot = [int.from_bytes(row.tobytes(), "little") for row in np.packbits(flat == 0, axis=1, bitorder="little")]
+        return state
+
+class BitboardBot(LiteratureBotAbstract):
+    # LitBot's hard knowledge (moves, card counts, completeness rules) on a BitboardState,
+    # inferences and the statistics are left to LitBot
+    EPSILON = 0.01
+
+    def __init__(
+        self,
+        team_id : int,
+        player_id : int,
+        team_count : int,
+        player_count : int,
+        initial_game_state_array : np.ndarray = None,
+        fake_game_seed : int = None,
+        set_count : int = 8,
+        set_card_count : int = 6
+    ) -> None:
+
+        super().__init__(
+            team_id = team_id,
+            player_id = player_id,
+            team_count = team_count,
+            player_count = player_count,
+            initial_game_state_array = initial_game_state_array,
+            set_count = set_count,
+            set_card_count = set_card_count,
+            fake_game_seed = fake_game_seed
+        )
+        if self.initial_game_state_array is None:
+            self.initial_game_state_array = self._fake_initial_game_state_array[self.team_id, self.player_id]
+        self.initialize_matrix()
+
+    def initialize_matrix(self) -> None:
+        self.state = BitboardState(self.team_count, self.player_per_team_count, self.set_count, self.set_card_count, [self.card_per_player_count]*self.player_count)
+        hand = 0
+        for set_id, card_id in np.argwhere(np.asarray(self.initial_game_state_array) == 1).tolist():
+            hand |= self.state.card_bit(set_id, card_id)
+        me = self.state.player_index(self.team_id, self.player_id)
+        for player in range(self.player_count):
+            self.state.cannot[player] = hand
+        self.state.has[me] = hand
+        self.state.cannot[me] = self.state.full_mask & ~hand
+        self.state.propagate()
+
+    def update_game(self, game_action_dict, stop = True) -> None:
+        move_id = list(game_action_dict.keys())[0]
+        game_action_dict = game_action_dict[move_id]
+        state = self.state
+        if game_action_dict["action"] == "ask_card":
+            state.apply_ask(
+                state.player_index(game_action_dict["by_team"], game_action_dict["by"]),
+                state.player_index(game_action_dict["to_team"], game_action_dict["to"]),
+                game_action_dict["set_id"],
+                game_action_dict["card_id"],
+                game_action_dict["result"]
+            )
+        elif game_action_dict["action"] == "call_set":
+            state.apply_call(game_action_dict["by_team"], game_action_dict["set_id"], game_action_dict["card_locations"])
+        state.propagate()
+
+    @property
+    def information_matrix(self) -> np.ndarray:
+        return self.state.to_information_matrix(BitboardBot.EPSILON)
+
+    @property
+    def truth_matrix(self) -> np.ndarray:
+        return self.state.masks_to_matrix(self.state.has).astype(float)
+
+    @property
+    def player_card_count(self) -> np.ndarray:
+        return np.array(self.state.card_count).reshape(self.team_count, self.player_per_team_count)
+
+    @property
+    def dumb_prob_matrix(self) -> np.ndarray:
+        info_matrix = np.where(self.information_matrix == BitboardBot.EPSILON, 1, self.information_matrix)
+        return info_matrix/info_matrix.sum(axis=(0,1))
+
+    @property
+    def prob_matrix(self) -> np.ndarray:
+        # without inferences the two coincide, kept so policies written against LitBot run unchanged
+        return self.dumb_prob_matrix
@@ -0,0 +1,138 @@
+import time
+import numpy as np
+from typing import List
+
+class CallScores:
+    # the sets worth calling, most likely first, as parallel arrays; holders is (sets, set_card_count)
+    __slots__ = ("set_id", "prob", "known_count", "holders", "refreshed_sets", "seconds")
+
+    def __init__(self, set_id, prob, known_count, holders, refreshed_sets : int, seconds : float) -> None:
+        self.set_id = set_id
+        self.prob = prob
+        self.known_count = known_count
+        self.holders = holders
+        self.refreshed_sets = refreshed_sets
+        self.seconds = seconds
+
+    def __len__(self) -> int:
+        return len(self.set_id)
+
+    def action_dicts(self, team_id : int, player_id : int) -> List[dict]:
+        return [
+            {
+                "action" : "call_set",
+                "by_team" : team_id,
+                "by" : player_id,
+                "set_id" : int(set_id),
+                "card_locations" : {card_id : int(holder) for card_id, holder in enumerate(holders)},
+            }
+            for set_id, holders in zip(self.set_id, self.holders)
+        ]
+
+class CallabilityEngine:
+    # for every set, the chance the bot's team holds all of its cards, taken as the product of the
+    # team's prob_matrix share of each card, and the likeliest teammate for each card.
+    # refresh only rescores the sets whose information cells, inference records or active flag moved
+    # since the last refresh, found by diffing against copies of what was scored last time.
+    # an engine follows one bot, keep one per seat
+    def __init__(self, bot) -> None:
+        self.team_id = bot.team_id
+        self.epsilon = bot.EPSILON
+        set_count, set_card_count = bot.set_count, bot.set_card_count
+        self.set_prob = np.zeros(set_count)
+        self.known_count = np.zeros(set_count, dtype=int)
+        self.holders = np.zeros((set_count, set_card_count), dtype=int)
+        self.versions = None
+        self.information_matrix = None
+        self.active_sets = None
+        self.inference_size = 0
+        self.inference_status = None
+        self.refreshed_sets = 0
+        # the last candidates and their (k, min_prob), handed out again until the bot moves
+        self.last = None
+
+    def refresh(self, bot) -> int:
+        # the number of sets rescored
+        if self.versions is not None and self.versions == bot.state_versions:
+            return 0
+        dirty = self.dirty_sets(bot)
+        sets = dirty.nonzero()[0]
+        if len(sets) > 0:
+            self.score_sets(bot, sets)
+        self.versions = dict(bot.state_versions)
+        self.refreshed_sets += len(sets)
+        return len(sets)
+
+    def dirty_sets(self, bot) -> np.ndarray:
+        store = bot.inference_store
+        size = store.size
+        if self.versions is None or size < self.inference_size:
+            # first refresh, or records dropped by a rewind or a restore
+            dirty = np.ones(bot.set_count, dtype=bool)
+            self.information_matrix = bot.information_matrix.copy()
+            self.active_sets = np.array(bot.active_sets, copy=True)
+            self.inference_size = size
+            self.inference_status = store.status[:size].copy()
+        else:
+            dirty = np.zeros(bot.set_count, dtype=bool)
+            if bot.state_versions["information"] != self.versions["information"]:
+                changed = (bot.information_matrix != self.information_matrix).ravel().nonzero()[0]
+                dirty[changed//bot.set_card_count % bot.set_count] = True
+                np.copyto(self.information_matrix, bot.information_matrix)
+            if bot.state_versions["active"] != self.versions["active"]:
+                dirty |= bot.active_sets != self.active_sets
+                np.copyto(self.active_sets, bot.active_sets)
+            if bot.state_versions["inference"] != self.versions["inference"]:
+                retired = (store.status[:self.inference_size] != self.inference_status).nonzero()[0]
+                dirty[store.set_ids[retired]] = True
+                dirty[store.set_ids[self.inference_size:size]] = True
+                self.inference_size = size
+                self.inference_status = store.status[:size].copy()
+        return dirty
+
+    def score_sets(self, bot, sets : np.ndarray) -> None:
+        store = bot.inference_store
+        # the active records of every set read once from the store arrays, a table seat's store
+        # has no card index and for_card would scan the whole store per card
+        records = store.active_indices()
+        record_sets = store.set_ids[records]
+        for set_id in sets.tolist():
+            if bot.active_sets[set_id] == 0:
+                # called, nobody can call it again
+                self.set_prob[set_id] = 0.0
+                continue
+            information = bot.information_matrix[:, :, set_id]
+            weights = np.where(information == self.epsilon, 1.0, information)
+            # prob_matrix's inference multiplier for this set: an inferred card is ruled out
+            # everywhere except its most recent inferred holder
+            in_set = records[record_sets == set_id]
+            # records are stored oldest first, the last one written per card is the latest
+            latest = dict(zip(store.card_ids[in_set].tolist(), in_set.tolist()))
+            for card_id, record in latest.items():
+                team_id, player_id = store.team_ids[record], store.player_ids[record]
+                keep = weights[team_id, player_id, card_id]
+                weights[:, :, card_id] = 0
+                weights[team_id, player_id, card_id] = keep
+
+            team_weights = weights[self.team_id]
+            team_share = team_weights.sum(axis=0)
+            # a card no teammate can hold rules the set out without dividing
+            self.set_prob[set_id] = 0.0 if not team_share.all() else (team_share/weights.sum(axis=(0, 1))).prod()
+            self.known_count[set_id] = np.count_nonzero(information[self.team_id] == 1)
+            # the denominator is shared by the teammates, the largest weight is the likeliest holder
+            self.holders[set_id] = team_weights.argmax(axis=0)
+
+    def candidates(self, bot, k : int = None, min_prob : float = 0.0) -> CallScores:
+        start = time.perf_counter()
+        refreshed = self.refresh(bot)
+        if refreshed == 0 and self.last is not None and self.last[0] == (k, min_prob, self.versions):
+            return self.last[1]
+        prob, known_count = self.set_prob.tolist(), self.known_count.tolist()
+        top = sorted((set_id for set_id, set_prob in enumerate(prob) if set_prob > min_prob), key=lambda set_id: (-prob[set_id], -known_count[set_id]))
+        top = np.array(top[:k] if k is not None else top, dtype=int)
+        scores = CallScores(
+            top, self.set_prob[top], self.known_count[top], self.holders[top],
+            refreshed, time.perf_counter() - start
+        )
+        self.last = ((k, min_prob, self.versions), scores)
+        return scores
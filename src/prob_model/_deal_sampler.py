@@ -0,0 +1,178 @@
+import time
+import numpy as np
+from statistics import NormalDist
+from concurrent.futures import ProcessPoolExecutor
+
+class DealProblem:
+    # the unknown cards of a position, the players that may hold each and the open slots per player
+    __slots__ = ("shape", "unknown_cards", "remaining", "candidates", "known")
+
+    def __init__(self, information_matrix : np.ndarray, player_card_count : np.ndarray, epsilon : float, multiplier : np.ndarray = None) -> None:
+        self.shape = information_matrix.shape
+        team_count, player_per_team_count, set_count, set_card_count = self.shape
+        flat = information_matrix.reshape(team_count*player_per_team_count, set_count*set_card_count)
+        self.known = flat == 1
+        self.unknown_cards = np.flatnonzero(~self.known.any(axis=0))
+        self.remaining = player_card_count.reshape(-1).astype(np.int64) - self.known.sum(axis=1)
+        if (self.remaining < 0).any() or self.remaining.sum() != len(self.unknown_cards):
+            raise ValueError(f"{len(self.unknown_cards)} unknown cards for open hand slots {self.remaining.tolist()}")
+
+        candidates = flat[:, self.unknown_cards] == epsilon
+        if multiplier is not None:
+            # inferences narrow a card down unless they rule out every hard candidate
+            narrowed = candidates & (multiplier.reshape(flat.shape)[:, self.unknown_cards] > 0)
+            candidates = np.where(narrowed.any(axis=0), narrowed, candidates)
+        if not candidates.any(axis=0).all():
+            raise ValueError("an unknown card has no player left who can hold it")
+        # most constrained cards are dealt first, fewer deals run out of candidates
+        order = np.argsort(candidates.sum(axis=0), kind="stable")
+        self.unknown_cards = self.unknown_cards[order]
+        self.candidates = candidates[:, order]
+
+class BatchSums:
+    # weighted sums of one or more batches, weights are stored divided by exp(log_scale)
+    __slots__ = ("samples", "accepted", "log_scale", "weight", "weight_sq", "holder_weight", "holder_weight_sq")
+
+    def __init__(self, samples : int, accepted : int, log_scale : float, weight : float, weight_sq : float, holder_weight : np.ndarray, holder_weight_sq : np.ndarray) -> None:
+        self.samples = samples
+        self.accepted = accepted
+        self.log_scale = log_scale
+        self.weight = weight
+        self.weight_sq = weight_sq
+        self.holder_weight = holder_weight
+        self.holder_weight_sq = holder_weight_sq
+
+    def merge(self, other : "BatchSums") -> "BatchSums":
+        log_scale = max(self.log_scale, other.log_scale)
+        sums = []
+        for batch in (self, other):
+            factor = np.exp(batch.log_scale - log_scale) if np.isfinite(batch.log_scale) else 0.0
+            sums.append((batch.weight*factor, batch.weight_sq*factor**2, batch.holder_weight*factor, batch.holder_weight_sq*factor**2))
+        return BatchSums(
+            self.samples + other.samples,
+            self.accepted + other.accepted,
+            log_scale,
+            *(first + second for first, second in zip(*sums))
+        )
+
+def sample_batch(problem : DealProblem, seed_sequence : np.random.SeedSequence, batch_size : int) -> BatchSums:
+    # sequential importance sampling: each card goes to a candidate with probability proportional
+    # to the candidate's open slots, the deal is weighted by 1/proposal probability so that every
+    # consistent deal counts the same, deals that run out of candidates get weight 0
+    rng = np.random.default_rng(seed_sequence)
+    player_count, card_count = problem.candidates.shape
+    rows = np.arange(batch_size)
+    remaining = np.tile(problem.remaining.astype(float), (batch_size, 1))
+    holders = np.zeros((batch_size, card_count), dtype=np.int64)
+    log_weight = np.zeros(batch_size)
+    alive = np.ones(batch_size, dtype=bool)
+
+    for card in range(card_count):
+        proposal = remaining*problem.candidates[:, card]
+        total = proposal.sum(axis=1)
+        threshold = rng.random(batch_size)*total
+        holder = np.minimum((proposal.cumsum(axis=1) <= threshold[:, None]).sum(axis=1), player_count - 1)
+        chosen = proposal[rows, holder]
+        alive &= chosen > 0
+        log_weight += np.log(np.where(alive, total, 1)) - np.log(np.where(alive, chosen, 1))
+        remaining[rows, holder] -= alive
+        holders[:, card] = holder
+
+    accepted = int(alive.sum())
+    log_scale = float(log_weight[alive].max()) if accepted > 0 else -np.inf
+    weight = np.where(alive, np.exp(log_weight - (log_scale if accepted > 0 else 0)), 0)
+    cells = (holders*card_count + np.arange(card_count)).ravel()
+    return BatchSums(
+        batch_size,
+        accepted,
+        log_scale,
+        float(weight.sum()),
+        float((weight**2).sum()),
+        np.bincount(cells, weights=np.repeat(weight, card_count), minlength=player_count*card_count).reshape(player_count, card_count),
+        np.bincount(cells, weights=np.repeat(weight**2, card_count), minlength=player_count*card_count).reshape(player_count, card_count),
+    )
+
+class DealEstimate:
+    __slots__ = ("prob_matrix", "stderr", "lower", "upper", "samples", "accepted", "effective_sample_size", "seconds")
+
+    def __init__(self, problem : DealProblem, sums : BatchSums, confidence : float, seconds : float) -> None:
+        self.samples = sums.samples
+        self.accepted = sums.accepted
+        self.seconds = seconds
+        self.effective_sample_size = sums.weight**2/sums.weight_sq if sums.accepted > 0 else 0.0
+
+        # self normalized estimate and its delta method standard error per (player, card)
+        prob_matrix = problem.known.astype(float)
+        stderr = np.zeros(prob_matrix.shape)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            marginals = sums.holder_weight/sums.weight
+            variance = (sums.holder_weight_sq*(1 - 2*marginals) + marginals**2*sums.weight_sq)/sums.weight**2
+        prob_matrix[:, problem.unknown_cards] = marginals
+        stderr[:, problem.unknown_cards] = np.sqrt(np.maximum(variance, 0))
+
+        z = NormalDist().inv_cdf(0.5 + confidence/2)
+        self.prob_matrix = prob_matrix.reshape(problem.shape)
+        self.stderr = stderr.reshape(problem.shape)
+        self.lower = np.clip(self.prob_matrix - z*self.stderr, 0, 1)
+        self.upper = np.clip(self.prob_matrix + z*self.stderr, 0, 1)
+
+class DealSampler:
+    # batches are seeded from SeedSequence(seed).spawn in order and merged in that order,
+    # so a sample budget gives the same estimate whether batches run inline or on the pool
+    def __init__(self, batch_size : int = 4096, processes : int = 0, confidence : float = 0.95) -> None:
+        self.batch_size = batch_size
+        self.processes = processes
+        self.confidence = confidence
+        self.executor = None
+
+    def close(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def __enter__(self) -> "DealSampler":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def run_batches(self, problem : DealProblem, seed_sequences) -> list:
+        if self.processes <= 1 or len(seed_sequences) == 1:
+            return [sample_batch(problem, seed_sequence, self.batch_size) for seed_sequence in seed_sequences]
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(self.processes)
+        return list(self.executor.map(sample_batch, [problem]*len(seed_sequences), seed_sequences, [self.batch_size]*len(seed_sequences)))
+
+    def estimate(
+        self,
+        information_matrix : np.ndarray,
+        player_card_count : np.ndarray,
+        epsilon : float,
+        multiplier : np.ndarray = None,
+        samples : int = None,
+        seconds : float = None,
+        seed : int = None
+    ) -> DealEstimate:
+        # stops at whichever of the sample and wall clock budgets runs out first
+        if samples is None and seconds is None:
+            samples = 4*self.batch_size
+        start = time.perf_counter()
+        problem = DealProblem(information_matrix, player_card_count, epsilon, multiplier)
+        seed_sequence = np.random.SeedSequence(seed)
+        batch_budget = -(-samples//self.batch_size) if samples is not None else None
+
+        sums = None
+        batches = 0
+        while batch_budget is None or batches < batch_budget:
+            round_size = max(self.processes, 1)
+            if batch_budget is not None:
+                round_size = min(round_size, batch_budget - batches)
+            round_start = time.perf_counter()
+            for batch_sums in self.run_batches(problem, seed_sequence.spawn(round_size)):
+                sums = batch_sums if sums is None else sums.merge(batch_sums)
+            batches += round_size
+            # the next round is not started if one more like the last would end past the wall clock budget
+            now = time.perf_counter()
+            if seconds is not None and now - start + (now - round_start) >= seconds:
+                break
+        return DealEstimate(problem, sums, self.confidence, time.perf_counter() - start)
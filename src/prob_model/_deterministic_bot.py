@@ -1,9 +1,24 @@
 import copy
+import time
 import numpy as np
 import itertools
 from ..abstract_classes import LiteratureBotAbstract
-
-class LitBot(LiteratureBotAbstract):
+from ._matrix_template import MatrixTemplate
+from ._propagation import ConstraintPropagator
+from ._matrix_cache import MatrixCacheMixin, cached_matrix
+from ._history import HistoryMixin
+from ._statistics import StatisticsRecorder, StatisticsConfig
+from ._inference_store import InferenceStore, CONFLICT, OUT_OF_DATE, REPEAT
+from ._exact_marginals import exact_marginals, log_deal_count
+from ._deal_sampler import DealSampler, DealEstimate
+from ._recommender import MoveRecommender, MoveScores
+from ._callability import CallabilityEngine, CallScores
+from ..tracing import (
+    NULL_TRACER, NULL_METRICS, Tracer, PipelineMetrics, HardUpdateEvent, InferenceDetectedEvent,
+    InferenceConflictEvent, InferenceOutOfDateEvent, InferenceRepeatEvent
+)
+
+class LitBot(LiteratureBotAbstract, MatrixCacheMixin, HistoryMixin):
     EPSILON = 0.01
     def __init__(
         self, 
@@ -12,7 +27,14 @@ class LitBot(LiteratureBotAbstract):
         team_count : int,
         player_count : int,
         initial_game_state_array : np.ndarray = None, 
-        fake_game_seed : int = None
+        fake_game_seed : int = None,
+        matrix_template : MatrixTemplate = None,
+        tracer : Tracer = None,
+        record_undo : bool = False,
+        metrics : PipelineMetrics = None,
+        statistics_config : StatisticsConfig = None,
+        set_count : int = 8,
+        set_card_count : int = 6
     ) -> None:
 
         super().__init__(
@@ -21,14 +43,53 @@ class LitBot(LiteratureBotAbstract):
             team_count = team_count,
             player_count = player_count,
             initial_game_state_array = initial_game_state_array,
+            set_count = set_count,
+            set_card_count = set_card_count,
             fake_game_seed = fake_game_seed
         )
 
-        if self.initial_game_state_array is not None:
-            self.initialize_matrix()
+        self.matrix_template = matrix_template
+        self.tracer = tracer if tracer is not None else NULL_TRACER
+        self.metrics = metrics if metrics is not None else NULL_METRICS
+        self.statistics_config = statistics_config if statistics_config is not None else StatisticsConfig()
+        if self.matrix_template is not None and (
+            self.matrix_template.config != (self.team_count, self.player_count, self.set_count, self.set_card_count)
+            or self.matrix_template.epsilon != LitBot.EPSILON
+        ):
+            raise ValueError(f"matrix_template config does not match the game: {self.matrix_template.config}")
+
+        if self.initial_game_state_array is None:
+            self.initial_game_state_array = self._fake_initial_game_state_array[self.team_id, self.player_id]
+        self.initialize_matrix()
+        self.initialize_history(record_undo)
     
     def initialize_matrix(self) -> None:
 
+        self.initialize_matrix_cache()
+        if self.matrix_template is not None:
+            self.initialize_matrix_from_template()
+        else:
+            self.initialize_matrix_from_scratch()
+
+        self.propagator = ConstraintPropagator(self)
+        self.propagator.mark_all()
+
+        self.inference_store = InferenceStore(self.team_count, self.player_per_team_count, self.set_count, self.set_card_count)
+
+        self.statistics = StatisticsRecorder(self.statistics_config)
+
+    def initialize_matrix_from_template(self) -> None:
+
+        template = self.matrix_template
+        self.information_matrix = template.information_matrix(self.team_id, self.player_id, self.initial_game_state_array)
+        self.player_set_card_count = template.player_set_card_count(self.team_id, self.player_id, self.initial_game_state_array)
+        self.player_card_count = template.player_card_count()
+        self.active_sets = template.active_sets()
+        self.active_cards = template.active_cards()
+        self.recent_card_array = template.recent_card_array()
+
+    def initialize_matrix_from_scratch(self) -> None:
+
         self.information_matrix = np.full((self.team_count, self.player_per_team_count, self.set_count, self.set_card_count), LitBot.EPSILON)
         for team_idx, player_idx in itertools.product(range(self.team_count), range(self.player_per_team_count)):
             self.information_matrix[team_idx, player_idx, :, :] = np.where(
@@ -45,16 +106,6 @@ class LitBot(LiteratureBotAbstract):
         self.active_sets = np.full((self.set_count), LitBot.EPSILON)
         self.active_cards = np.full((self.set_count, self.set_card_count), LitBot.EPSILON)
         self.recent_card_array = np.full((self.team_count, self.set_count), LitBot.EPSILON)
-        
-        self.inferences_list = {}
-        self.conflict_inferences_list = {}
-        self.out_of_date_inferences_list = {}
-
-        self.statistics = {
-            "shannon_info" : [],
-            "dumb_shannon_info" : [],
-            "inference_length" : [],
-        }
 
         # self.initialize_experimental_arrays()
 
@@ -75,21 +126,28 @@ class LitBot(LiteratureBotAbstract):
             assert ans_player is not None
             assert self.information_matrix[ask_player["team_id"], ask_player["player_id"], card_info["set_id"], card_info["card_id"]] != 1
             assert self.information_matrix[ans_player["team_id"], ans_player["player_id"], card_info["set_id"], card_info["card_id"]] != 1
-            print(f"{move_id} : updated information matrix for {card_info['set_id'], card_info['card_id']} for result 0 : hard")
+            if self.tracer.debug:
+                self.tracer.emit(HardUpdateEvent(move_id, "information matrix", card_info["set_id"], card_info["card_id"], 0))
             self.information_matrix[ask_player["team_id"], ask_player["player_id"], card_info["set_id"], card_info["card_id"]] = 0
             self.information_matrix[ans_player["team_id"], ans_player["player_id"], card_info["set_id"], card_info["card_id"]] = 0
+            self.propagator.mark_card(card_info["set_id"], card_info["card_id"])
         if result == 1:
             
             # use better assert condition later
             # assert self.information_matrix[ask_player["team_id"], ask_player["player_id"], card_info["set_id"], card_info["card_id"]] != 1
             
-            print(f"{move_id} : updated information matrix for {card_info['set_id'], card_info['card_id']} for result 1 : hard")
+            if self.tracer.debug:
+                self.tracer.emit(HardUpdateEvent(move_id, "information matrix", card_info["set_id"], card_info["card_id"], 1))
             self.information_matrix[:, :, card_info["set_id"], card_info["card_id"]] = 0
             self.information_matrix[ask_player["team_id"], ask_player["player_id"], card_info["set_id"], card_info["card_id"]] = 1
+            self.propagator.mark_cell(ask_player["team_id"], ask_player["player_id"], card_info["set_id"], card_info["card_id"])
             if ans_player is not None:
-                print(f"{move_id} : updated player card count matrix for {card_info['set_id'], card_info['card_id']} for result 1 : hard")
+                if self.tracer.debug:
+                    self.tracer.emit(HardUpdateEvent(move_id, "player card count matrix", card_info["set_id"], card_info["card_id"], 1))
                 self.player_card_count[ask_player["team_id"], ask_player["player_id"]] += 1
                 self.player_card_count[ans_player["team_id"], ans_player["player_id"]] -= 1
+                self.propagator.mark_player(ans_player["team_id"], ans_player["player_id"])
+        self.bump_state_version("information")
 
     def update_active_arrays(self, team_id, set_id, card_id, action, result):
         if action == "ask_card":
@@ -103,6 +161,7 @@ class LitBot(LiteratureBotAbstract):
         if action == "call_set":
             self.active_cards[set_id, :] = 0
             self.active_sets[set_id] = 0
+        self.bump_state_version("active")
 
 
     # def update_card_owner(self, move_id, card_info, ask_player, ans_player, result):
@@ -136,81 +195,85 @@ class LitBot(LiteratureBotAbstract):
 
     def update_inference_list(self, team_id, player_id, set_id, card_id, move_id):
         
-        # detecting new inference and adding to the list
-        detect = False
+        store = self.inference_store
+
+        # detecting new inference and adding to the store
+        new_idx = None
         if (self.recent_card_array[team_id, set_id] != card_id) and (self.recent_card_array[team_id, set_id] != LitBot.EPSILON):
-            print(f"{move_id} : new inference detected for {set_id, self.recent_card_array[team_id, set_id]} for player {team_id, player_id} : inference")
-            new_inference = {
-                "team_id" : team_id, 
-                "player_id" : player_id, 
-                "set_id" : set_id, 
-                "card_id" : int(self.recent_card_array[team_id, set_id])
-            }
-            self.inferences_list[move_id] = new_inference
-            detect = True
-
-        # cleaning the list for conflicts and out-of-dates
-        for id, inference in self.inferences_list.items():
-            info = self.information_matrix[:, :, inference["set_id"], inference["card_id"]]
-
-            if info[inference["team_id"], inference["player_id"]] == 0:
-                print(f"{move_id} : conflict inference detected with info matrix {id}")
-                self.conflict_inferences_list[id] = inference
-                continue
-            elif info[inference["team_id"], inference["player_id"]] == 1:
-                print(f"{move_id} : out of date inference detected with info matrix {id}")
-                self.out_of_date_inferences_list[id] = inference
-                continue
-        
-        for id, _ in (self.conflict_inferences_list | self.out_of_date_inferences_list).items():
-            try:
-                self.inferences_list.pop(id)
-            except:
-                pass
+            new_idx = store.add(move_id, team_id, player_id, set_id, int(self.recent_card_array[team_id, set_id]))
+            if self.tracer.info:
+                self.tracer.emit(InferenceDetectedEvent(move_id, team_id, player_id, set_id, int(store.card_ids[new_idx])))
+
+        # retiring conflicts and out-of-dates against the information matrix
+        conflict_idx, out_of_date_idx = store.retire_against(self.information_matrix)
+        if self.tracer.info:
+            for idx in conflict_idx.tolist():
+                self.tracer.emit(InferenceConflictEvent(move_id, store.move_ids[idx], "information_matrix"))
+            for idx in out_of_date_idx.tolist():
+                self.tracer.emit(InferenceOutOfDateEvent(move_id, store.move_ids[idx]))
 
         # remove internal inference conflicts:
-        repeat_id = None
-        conflict_id = None
-        if detect and move_id in self.inferences_list:
-            for id, inference in self.inferences_list.items():
-                if id != move_id:
-                    if (inference["set_id"] != new_inference["set_id"]) or (inference["card_id"] != new_inference["card_id"]):
-                        continue
-                    elif (inference["team_id"] == team_id) or (inference["player_id"] == player_id):
-                        print(f"{move_id} : new inference detected is already captured : inference")
-                        repeat_id = id
-                        continue
-                    else:
-                        print(f"{move_id} : conflict inference detected for {new_inference['set_id'], new_inference['card_id']} for player {team_id, player_id} : inference")
-                        conflict_id = id
-
-        if repeat_id is not None:
-            self.inferences_list.pop(repeat_id)
-        if conflict_id is not None:
-            self.conflict_inferences_list[conflict_id] = self.inferences_list[conflict_id]
-            self.inferences_list.pop(conflict_id)
+        repeat_idx = None
+        conflict_with_idx = None
+        if new_idx is not None and store.is_active(new_idx):
+            for idx in store.for_card(set_id, int(store.card_ids[new_idx])):
+                if idx == new_idx:
+                    continue
+                elif (store.team_ids[idx] == team_id) or (store.player_ids[idx] == player_id):
+                    repeat_idx = idx
+                else:
+                    conflict_with_idx = idx
+
+        if repeat_idx is not None:
+            store.retire(repeat_idx, REPEAT)
+            if self.tracer.debug:
+                self.tracer.emit(InferenceRepeatEvent(move_id, store.move_ids[repeat_idx]))
+        if conflict_with_idx is not None:
+            store.retire(conflict_with_idx, CONFLICT)
+            if self.tracer.info:
+                self.tracer.emit(InferenceConflictEvent(move_id, store.move_ids[conflict_with_idx], "inference"))
+
+        if new_idx is not None or len(conflict_idx) > 0 or len(out_of_date_idx) > 0:
+            self.bump_state_version("inference")
+        if self.metrics.enabled:
+            self.metrics.count_inferences(
+                int(new_idx is not None),
+                len(conflict_idx) + int(conflict_with_idx is not None),
+                len(out_of_date_idx),
+                int(repeat_idx is not None)
+            )
+
+    @property
+    def nbytes(self) -> int:
+        # the bot's own arrays, views into someone else's (a table seat's) are counted by their owner
+        arrays = sum(value.nbytes for value in vars(self).values() if isinstance(value, np.ndarray) and value.base is None)
+        return arrays + self.inference_store.nbytes + self.statistics.nbytes + self.undo_nbytes + self.matrix_cache_nbytes
+
+    @property
+    def inferences_list(self):
+        return self.inference_store.records()
+
+    @property
+    def conflict_inferences_list(self):
+        return self.inference_store.records(CONFLICT)
+
+    @property
+    def out_of_date_inferences_list(self):
+        return self.inference_store.records(OUT_OF_DATE)
 
     def completeness_check_hard(self, move_id):
-        # card location has to be atleast 1
-        for set_id, card_id in itertools.product(range(self.set_count), range(self.set_card_count)):
-            if self.information_matrix[:, :, set_id, card_id].sum() == LitBot.EPSILON:
-                print(f"{move_id} : epsilon to 1 completeness for {set_id, card_id} : hard")
-                self.information_matrix[:, :, set_id, card_id] //= LitBot.EPSILON
-
-        # player card count match
-        for team_id, player_id in np.argwhere(self.truth_matrix.sum(axis=(2,3))==self.player_card_count).tolist():
-            print(f"{move_id} : player card count completeness for {team_id, player_id} : hard")
-            self.information_matrix[team_id, player_id] = np.where(self.information_matrix[team_id, player_id] == LitBot.EPSILON, 0, self.information_matrix[team_id, player_id])
-
-        # set card count match
-        for set_id in np.argwhere(self.truth_matrix.sum(axis=(0,1,3))==self.set_card_count).tolist():
-            print(f"{move_id} : set card count completeness for {set_id} : hard")
-            self.information_matrix[:, :, set_id] = np.where(self.information_matrix[:, :, set_id] == LitBot.EPSILON, 0, self.information_matrix[:, :, set_id])        
+        # card uniqueness, player card count and set card count rules run to a fixpoint over what the move touched
+        deductions = self.propagator.run(move_id)
+        if deductions > 0:
+            self.bump_state_version("information")
+        return deductions
 
     def update_statistics(self):
-        self.statistics["shannon_info"].append(self.shannon_info_matrix.sum())
-        self.statistics["dumb_shannon_info"].append(self.dumb_shannon_info_matrix.sum())
-        self.statistics["inference_length"].append(self.inferences_list.__len__())
+        self.statistics.on_move(self)
+
+    def sample_statistics(self):
+        # records the current statistics whatever the mode, for statistics_config mode "on_demand"
+        self.statistics.sample(self)
 
     def update_game(self, game_action_dict, stop = True):
 
@@ -224,6 +287,8 @@ class LitBot(LiteratureBotAbstract):
         # print(result)
         card_id = None
         ans_team_id = None
+        stamps = [time.perf_counter()] if self.metrics.enabled else None
+        self.begin_move()
 
         if action == "ask_card":
             ans_team_id = game_action_dict["to_team"]
@@ -261,10 +326,17 @@ class LitBot(LiteratureBotAbstract):
         else:
             pass
         
-
+        if stamps is not None:
+            stamps.append(time.perf_counter())
         self.completeness_check_hard(move_id)
+        if stamps is not None:
+            stamps.append(time.perf_counter())
         self.update_inference_list(team_id, player_id, set_id, card_id, move_id)
+        if stamps is not None:
+            stamps.append(time.perf_counter())
         self.update_active_arrays(team_id, set_id, card_id, action, result)
+        if stamps is not None:
+            stamps.append(time.perf_counter())
         # self.update_uninferred_cards_count_matrix()
         # if action == "ask_card":
         #     self.update_player_set_card_count(
@@ -283,18 +355,15 @@ class LitBot(LiteratureBotAbstract):
             #     result = 1
             # )
         self.update_statistics()
+        self.end_move(move_id)
+        if stamps is not None:
+            stamps.append(time.perf_counter())
+            self.metrics.observe_move(stamps)
 
     @property
+    @cached_matrix("inference")
     def inference_multiplier_matrix(self):
-        inference_multiplier_matrix = np.full((self.team_count, self.player_per_team_count, self.set_count, self.set_card_count), 1)
-        for _, inference in self.inferences_list.items():
-            team_id = inference["team_id"]
-            player_id = inference["player_id"]
-            set_id = int(inference["set_id"])
-            card_id = int(inference["card_id"])
-            inference_multiplier_matrix[:, :, set_id, card_id] = 0
-            inference_multiplier_matrix[team_id, player_id, set_id, card_id] = 1
-        return inference_multiplier_matrix
+        return self.inference_store.multiplier_mask
 
     @property
     def set_card_count_inference_multiplier_matrix(self):
@@ -313,23 +382,19 @@ class LitBot(LiteratureBotAbstract):
         return player_card_count_inference_multiplier_matrix
 
     @property
+    @cached_matrix("information")
     def truth_matrix(self):
         info_matrix = np.where(self.information_matrix == LitBot.EPSILON, 0, self.information_matrix)
         return info_matrix
 
     @property
+    @cached_matrix("information", "inference")
     def inference_matrix(self):
-        inference_matrix = np.full((self.team_count, self.player_per_team_count, self.set_count, self.set_card_count), 0)
-        for _, inference in self.inferences_list.items():
-            team_id = inference["team_id"]
-            player_id = inference["player_id"]
-            set_id = int(inference["set_id"])
-            card_id = int(inference["card_id"])
-            inference_matrix[team_id, player_id, set_id, card_id] = 1
-        inference_matrix = self.truth_matrix + inference_matrix
+        inference_matrix = self.truth_matrix + self.inference_store.inference_mask
         return inference_matrix
 
     @property
+    @cached_matrix("information", "inference")
     def prob_matrix(self):
         info_matrix = np.where(self.information_matrix == LitBot.EPSILON, 1, self.information_matrix)
         integrated_info_matrix = (
@@ -342,23 +407,58 @@ class LitBot(LiteratureBotAbstract):
         return prob_matrix
     
     @property
+    @cached_matrix("information")
+    def exact_prob_matrix(self):
+        # counts every deal consistent with information_matrix and player_card_count, inferences are not used
+        return exact_marginals(self.information_matrix, self.player_card_count, LitBot.EPSILON)
+
+    @property
+    @cached_matrix("information")
+    def log_deal_count(self):
+        return log_deal_count(self.information_matrix, self.player_card_count, LitBot.EPSILON)
+
+    def sample_prob_matrix(self, samples : int = None, seconds : float = None, seed : int = None, sampler : DealSampler = None, use_inferences : bool = True) -> DealEstimate:
+        # monte carlo counterpart of exact_prob_matrix for positions too large to count, not cached
+        sampler = sampler if sampler is not None else DealSampler()
+        multiplier = self.inference_multiplier_matrix if use_inferences else None
+        estimate = sampler.estimate(self.information_matrix, self.player_card_count, LitBot.EPSILON, multiplier, samples, seconds, seed)
+        if estimate.accepted == 0 and use_inferences:
+            # the inferences leave no consistent deal, fall back to the hard constraints with what is left of the time
+            seconds = max(seconds - estimate.seconds, 0) if seconds is not None else None
+            estimate = sampler.estimate(self.information_matrix, self.player_card_count, LitBot.EPSILON, None, samples, seconds, seed)
+        return estimate
+
+    def recommend_moves(self, k : int = 5, recommender : MoveRecommender = None) -> MoveScores:
+        recommender = recommender if recommender is not None else MoveRecommender()
+        return recommender.recommend(self, k)
+
+    def call_candidates(self, k : int = None, engine : CallabilityEngine = None) -> CallScores:
+        # a fresh engine scores every set, pass the seat's own engine to only rescore what moved
+        engine = engine if engine is not None else CallabilityEngine(self)
+        return engine.candidates(self, k)
+
+    @property
+    @cached_matrix("information")
     def dumb_prob_matrix(self):
         info_matrix = np.where(self.information_matrix == LitBot.EPSILON, 1, self.information_matrix)
         prob_matrix = info_matrix/info_matrix.sum(axis=(0,1))
         return prob_matrix
 
     @property
+    @cached_matrix("information")
     def dumb_shannon_info_matrix(self):
         uncertainity_matrix = self.dumb_prob_matrix.max(axis=(0, 1))
         shannon_info_matrix = self.total_shannon_info + np.log2(uncertainity_matrix)
         return shannon_info_matrix
     
     @property
+    @cached_matrix("information", "inference")
     def shannon_info_matrix(self):
         uncertainity_matrix = self.prob_matrix.max(axis=(0, 1))
         shannon_info_matrix = self.total_shannon_info + np.log2(uncertainity_matrix)
         return shannon_info_matrix
     
     @property
+    @cached_matrix()
     def total_shannon_info(self):
-        return -np.log2(np.full((8,6), 1/self.player_count))
\ No newline at end of file
+        return -np.log2(np.full((self.set_count, self.set_card_count), 1/self.player_count))
\ No newline at end of file
@@ -0,0 +1,207 @@
+import math
+import functools
+import numpy as np
+from typing import Iterator, List, Tuple
+
+# dense count tables larger than this are refused rather than allocated
+MAX_STATES = 1 << 22
+
+def candidate_types(information_matrix : np.ndarray, player_card_count : np.ndarray, epsilon : float) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    # unknown cards grouped by the players that may still hold them, cards with the same
+    # candidates are interchangeable so only one marginal per group has to be counted
+    # returns remaining per global player, unknown card indices, their group and the group bitmasks
+    team_count, player_per_team_count, set_count, set_card_count = information_matrix.shape
+    flat = information_matrix.reshape(team_count*player_per_team_count, set_count*set_card_count)
+    known = flat == 1
+    unknown_cards = np.flatnonzero(~known.any(axis=0))
+    remaining = player_card_count.reshape(-1).astype(np.int64) - known.sum(axis=1)
+    if (remaining < 0).any():
+        raise ValueError(f"players hold more known cards than their card count: {remaining.tolist()}")
+    if remaining.sum() != len(unknown_cards):
+        raise ValueError(f"{len(unknown_cards)} unknown cards for {remaining.sum()} open hand slots")
+
+    candidates = (flat[:, unknown_cards] == epsilon) & (remaining > 0)[:, None]
+    masks = (candidates.astype(np.int64) << np.arange(len(remaining), dtype=np.int64)[:, None]).sum(axis=0)
+    if (masks == 0).any():
+        raise ValueError("an unknown card has no player left who can hold it")
+    type_masks, card_types = np.unique(masks, return_inverse=True)
+    return remaining, unknown_cards, card_types.reshape(-1), type_masks
+
+def components(type_masks : List[int]) -> List[int]:
+    # groups of players linked by a shared unknown card are counted independently
+    merged = []
+    for mask in type_masks:
+        for component in [component for component in merged if component & mask]:
+            merged.remove(component)
+            mask |= component
+        merged.append(mask)
+    return merged
+
+def bits(mask : int) -> List[int]:
+    return [idx for idx in range(mask.bit_length()) if mask >> idx & 1]
+
+@functools.lru_cache(maxsize=512)
+def component_marginals(remaining : Tuple[int, ...], types : Tuple[Tuple[int, int], ...], max_states : int = MAX_STATES) -> Tuple[np.ndarray, float]:
+    # remaining open slots per player and (local player bitmask, card count) per card group
+    # returns (group, player) probabilities and the log of the number of consistent deals
+    player_count = len(remaining)
+    marginals = np.zeros((len(types), player_count))
+    if player_count == 1:
+        marginals[:] = 1
+        marginals.flags.writeable = False
+        return marginals, 0.0
+    if len(types) == 1:
+        marginals[0] = np.asarray(remaining)/sum(remaining)
+        marginals.flags.writeable = False
+        return marginals, math.lgamma(sum(remaining) + 1) - sum(math.lgamma(count + 1) for count in remaining)
+
+    # count tables run over the open slots of every player but the last, whose slots follow from the total
+    shape = tuple(count + 1 for count in remaining[:-1])
+    if int(np.prod(shape)) > max_states:
+        raise ValueError(f"exact marginals need {int(np.prod(shape))} states, over max_states {max_states}")
+    ndim = len(shape)
+    last = player_count - 1
+    total = sum(remaining)
+    grid = np.indices(shape).reshape(ndim, -1)
+    grid_sum = grid.sum(axis=0)
+    # tables are flat, moving one slot along an axis is a shift by its stride
+    # masked to the cells that do not run off the top of that axis
+    strides = [int(np.prod(shape[axis + 1:])) for axis in range(ndim)]
+    below_top = [grid[axis, :-strides[axis]] < shape[axis] - 1 for axis in range(ndim)]
+    type_players = [bits(mask) for mask, _ in types]
+
+    def step(table, players, left, backward):
+        # one card leaves the deal with `left` cards still open before it
+        stepped = np.zeros(table.shape)
+        for player in players:
+            if player == last:
+                np.add(stepped, table, out=stepped, where=grid_sum <= left - 1)
+                continue
+            stride = strides[player]
+            if backward:
+                np.add(stepped[stride:], table[:-stride], out=stepped[stride:], where=below_top[player])
+            else:
+                np.add(stepped[:-stride], table[stride:], out=stepped[:-stride], where=below_top[player])
+        return stepped
+
+    # the largest group is dealt last in closed form, whatever slots are left over go to its
+    # candidates in n!/prod(k!) ways, so only the small groups are stepped through card by card
+    closing = max(range(len(types)), key=lambda type_idx: types[type_idx][1])
+    order = [type_idx for type_idx in range(len(types)) if type_idx != closing]
+    closing_count = types[closing][1]
+    last_slots = closing_count - grid_sum
+    log_factorials = np.array([math.lgamma(count + 1) for count in range(max(remaining) + 1)])
+    valid = (last_slots >= 0) & (last_slots <= remaining[-1])
+    log_closing = math.lgamma(closing_count + 1) - log_factorials[grid].sum(axis=0) - log_factorials[np.clip(last_slots, 0, remaining[-1])]
+    for player in range(player_count):
+        if player not in type_players[closing]:
+            valid &= (grid[player] if player != last else last_slots) == 0
+    closing_table = np.where(valid, np.exp(np.where(valid, log_closing, 0)), 0)
+
+    # forward tables count the ways to deal the cards so far, backward ones the ways to finish
+    # both are kept around the last card of every group to read that card's marginals off
+    before = {}
+    table = np.zeros(grid_sum.shape)
+    table[-1] = 1
+    left = total
+    for type_idx in order:
+        count = types[type_idx][1]
+        for card in range(count):
+            if card == count - 1:
+                before[type_idx] = (table, left)
+            table = step(table, type_players[type_idx], left, backward=False)
+            left -= 1
+    deals = table*closing_table
+    deal_count = deals.sum()
+    if deal_count == 0:
+        raise ValueError("no deal is consistent with the constraints")
+    for player in type_players[closing]:
+        marginals[closing, player] = np.dot(deals, grid[player] if player != last else last_slots)
+
+    after = {}
+    table = closing_table
+    for type_idx in reversed(order):
+        after[type_idx] = table
+        for _ in range(types[type_idx][1]):
+            left += 1
+            table = step(table, type_players[type_idx], left, backward=True)
+
+    for type_idx in order:
+        forward, left = before[type_idx]
+        backward = after[type_idx]
+        for player in type_players[type_idx]:
+            if player == last:
+                marginals[type_idx, player] = np.dot(np.where(grid_sum <= left - 1, forward, 0), backward)
+            else:
+                stride = strides[player]
+                marginals[type_idx, player] = np.dot(np.where(below_top[player], forward[stride:], 0), backward[:-stride])
+    marginals /= marginals.sum(axis=1, keepdims=True)
+    marginals.flags.writeable = False
+    return marginals, float(np.log(deal_count))
+
+def component_problems(remaining : np.ndarray, card_types : np.ndarray, type_masks : np.ndarray) -> Iterator[Tuple[List[int], List[List[int]], Tuple[int, ...], Tuple[Tuple[int, int], ...]]]:
+    # the independent counting problems of a position: per component its card groups, its pools,
+    # the open slots per pool and (local pool bitmask, card count) per group
+    type_counts = np.bincount(card_types, minlength=len(type_masks)).tolist()
+    type_masks = type_masks.tolist()
+    for component in components(type_masks):
+        type_ids = [type_id for type_id, mask in enumerate(type_masks) if mask & component]
+        # players no unknown card tells apart are pooled, given the cards dealt to a pool
+        # each card sits with a member in proportion to the member's open slots
+        pools = {}
+        for player in bits(component):
+            pools.setdefault(tuple(bool(type_masks[type_id] >> player & 1) for type_id in type_ids), []).append(player)
+        pools = sorted(pools.values(), key=lambda pool: (remaining[pool].sum(), pool))
+        pool_remaining = tuple(int(remaining[pool].sum()) for pool in pools)
+        local_types = tuple(
+            (sum(1 << pool_idx for pool_idx, pool in enumerate(pools) if type_masks[type_id] >> pool[0] & 1), type_counts[type_id])
+            for type_id in type_ids
+        )
+        if sum(pool_remaining) != sum(count for _, count in local_types):
+            raise ValueError(f"players {bits(component)} have {sum(pool_remaining)} open slots for {sum(count for _, count in local_types)} cards")
+        yield type_ids, pools, pool_remaining, local_types
+
+# fixed cost of one numpy pass over a count table, in table cells
+PASS_OVERHEAD_CELLS = 1536
+
+def component_work(remaining : Tuple[int, ...], types : Tuple[Tuple[int, int], ...]) -> int:
+    # count table cells component_marginals passes over, its running time is close to proportional
+    if len(remaining) == 1 or len(types) == 1:
+        return 0
+    states = int(np.prod([count + 1 for count in remaining[:-1]]))
+    closing = max(range(len(types)), key=lambda type_idx: types[type_idx][1])
+    # every card of the stepped groups goes forward and backward once per candidate, plus one read per marginal
+    passes = sum(2*count*len(bits(mask)) for type_idx, (mask, count) in enumerate(types) if type_idx != closing)
+    passes += len(remaining)*len(types)
+    return (states + PASS_OVERHEAD_CELLS)*passes
+
+def exact_work(information_matrix : np.ndarray, player_card_count : np.ndarray, epsilon : float) -> int:
+    # what exact_marginals would cost, without counting anything; positions it refuses raise ValueError as well
+    remaining, _, card_types, type_masks = candidate_types(information_matrix, player_card_count, epsilon)
+    return sum(component_work(pool_remaining, local_types) for _, _, pool_remaining, local_types in component_problems(remaining, card_types, type_masks))
+
+def solve(information_matrix : np.ndarray, player_card_count : np.ndarray, epsilon : float, max_states : int = MAX_STATES) -> Tuple[np.ndarray, float]:
+    remaining, unknown_cards, card_types, type_masks = candidate_types(information_matrix, player_card_count, epsilon)
+
+    # (player, group) probabilities, groups indexed as in type_masks
+    type_marginals = np.zeros((len(remaining), len(type_masks)))
+    log_deal_count = 0.0
+    for type_ids, pools, pool_remaining, local_types in component_problems(remaining, card_types, type_masks):
+        marginals, log_count = component_marginals(pool_remaining, local_types, max_states)
+        for pool_idx, pool in enumerate(pools):
+            type_marginals[np.ix_(pool, type_ids)] = remaining[pool][:, None]/pool_remaining[pool_idx]*marginals[:, pool_idx]
+            log_count += math.lgamma(pool_remaining[pool_idx] + 1) - sum(math.lgamma(count + 1) for count in remaining[pool].tolist())
+        log_deal_count += log_count
+
+    team_count, player_per_team_count, set_count, set_card_count = information_matrix.shape
+    prob_matrix = np.where(information_matrix == 1, 1.0, 0.0).reshape(team_count*player_per_team_count, set_count*set_card_count)
+    prob_matrix[:, unknown_cards] = type_marginals[:, card_types]
+    return prob_matrix.reshape(information_matrix.shape), log_deal_count
+
+def exact_marginals(information_matrix : np.ndarray, player_card_count : np.ndarray, epsilon : float, max_states : int = MAX_STATES) -> np.ndarray:
+    # probability of every (team, player, set, card) over all deals that agree with the hard
+    # knowledge in information_matrix and the hand sizes in player_card_count, each deal counted once
+    return solve(information_matrix, player_card_count, epsilon, max_states)[0]
+
+def log_deal_count(information_matrix : np.ndarray, player_card_count : np.ndarray, epsilon : float, max_states : int = MAX_STATES) -> float:
+    return solve(information_matrix, player_card_count, epsilon, max_states)[1]
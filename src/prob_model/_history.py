@@ -0,0 +1,189 @@
+import copy
+import numpy as np
+from typing import Dict, List, Tuple
+from ._inference_store import InferenceStore
+from ._propagation import ConstraintPropagator
+
+# the state update_game writes in place, everything else on a bot is either immutable or rebuilt
+HISTORY_ARRAYS = ("information_matrix", "player_card_count", "active_sets", "active_cards", "recent_card_array")
+
+class MoveDelta:
+    # what one update_game changed, enough to put the bot back the way it was before the move
+    __slots__ = ("move_id", "cells", "inference_size", "inference_status", "statistics_position")
+
+    def __init__(
+        self,
+        move_id,
+        cells : Dict[str, Tuple[np.ndarray, np.ndarray]],
+        inference_size : int,
+        inference_status : Tuple[np.ndarray, np.ndarray],
+        statistics_position : Tuple[int, int]
+    ) -> None:
+
+        self.move_id = move_id
+        self.cells = cells
+        self.inference_size = inference_size
+        self.inference_status = inference_status
+        self.statistics_position = statistics_position
+
+    @property
+    def nbytes(self) -> int:
+        return sum(changed.nbytes + old.nbytes for changed, old in (*self.cells.values(), self.inference_status))
+
+class HistoryMixin:
+    # copy-on-write forks and per-move undo deltas
+    # forks share the HISTORY_ARRAYS and the inference store read-only until either side writes,
+    # a bot recording undo keeps a MoveDelta per move that rewind applies backwards
+
+    def initialize_history(self, record_undo : bool) -> None:
+        self._shared = set()
+        self.undo_log : List[MoveDelta] = [] if record_undo else None
+        # recording started by checkpoint() alone, release_checkpoint stops it again
+        self._undo_on_demand = False
+        self._before_move = None
+
+    @property
+    def undo_nbytes(self) -> int:
+        return sum(delta.nbytes for delta in self.undo_log) if self.undo_log is not None else 0
+
+    def fork(self):
+        # O(1) in the arrays, either side copies what it shares on its next write
+        forked = copy.copy(self)
+        for name in HISTORY_ARRAYS:
+            getattr(self, name).flags.writeable = False
+        self._shared = set(HISTORY_ARRAYS) | {"inference_store"}
+        forked._shared = set(self._shared)
+
+        forked.propagator = ConstraintPropagator(forked)
+        forked._matrix_cache = dict(self._matrix_cache)
+        forked.cache_hits = dict(self.cache_hits)
+        forked.cache_misses = dict(self.cache_misses)
+        forked.state_versions = dict(self.state_versions)
+        forked.statistics = self.statistics.copy()
+        # deltas are never modified, the fork can rewind past the point it was forked at
+        forked.undo_log = list(self.undo_log) if self.undo_log is not None else None
+        return forked
+
+    def own_state(self) -> None:
+        for name in self._shared:
+            if name == "inference_store":
+                self.inference_store = self.inference_store.copy()
+            else:
+                setattr(self, name, getattr(self, name).copy())
+        self._shared.clear()
+
+    def begin_move(self) -> None:
+        if self.undo_log is None:
+            self.own_state()
+            return
+        # the bot writes into fresh copies, the old arrays are what the delta is taken against
+        before = {}
+        for name in HISTORY_ARRAYS:
+            before[name] = getattr(self, name)
+            setattr(self, name, before[name].copy())
+            self._shared.discard(name)
+        self.own_state()
+        store = self.inference_store
+        self._before_move = (before, store.size, store.status[:store.size].copy(), self.statistics.position())
+
+    def end_move(self, move_id) -> None:
+        if self._before_move is None:
+            return
+        before, inference_size, inference_status, statistics_position = self._before_move
+        self._before_move = None
+
+        cells = {}
+        for name, old in before.items():
+            changed = np.flatnonzero(old.ravel() != getattr(self, name).ravel())
+            if len(changed) > 0:
+                cells[name] = (changed, old.ravel()[changed])
+        status_changed = np.flatnonzero(inference_status != self.inference_store.status[:inference_size])
+        self.undo_log.append(MoveDelta(
+            move_id,
+            cells,
+            inference_size,
+            (status_changed, inference_status[status_changed]),
+            statistics_position
+        ))
+
+    def checkpoint(self) -> int:
+        # starts recording if the bot was created without record_undo, rewind_to goes back to the returned position
+        if self.undo_log is None:
+            self.undo_log = []
+            self._undo_on_demand = True
+        return len(self.undo_log)
+
+    def release_checkpoint(self, position : int) -> None:
+        # the checkpoint at position is no longer needed, a bot recording only for it stops recording
+        if self._undo_on_demand and position == 0:
+            self.undo_log = None
+            self._undo_on_demand = False
+
+    def abandon_move(self) -> bool:
+        # puts back whatever a move that raised halfway through update_game had written
+        if self._before_move is None:
+            return False
+        before, inference_size, inference_status, statistics_position = self._before_move
+        self._before_move = None
+        for name, array in before.items():
+            # the arrays from before the move may be shared with a fork
+            setattr(self, name, array.copy())
+        store = self.inference_store
+        self.inference_store = InferenceStore.restore(
+            store.shape,
+            store.move_ids[:inference_size],
+            store.team_ids[:inference_size],
+            store.player_ids[:inference_size],
+            store.set_ids[:inference_size],
+            store.card_ids[:inference_size],
+            inference_status
+        )
+        self.statistics.truncate(statistics_position)
+        return True
+
+    def rewind(self, move_id) -> None:
+        # undoes every move applied after the latest one with move_id
+        if self.undo_log is None:
+            raise ValueError("bot is not recording undo deltas, create it with record_undo=True or call checkpoint()")
+        for position in range(len(self.undo_log) - 1, -1, -1):
+            if self.undo_log[position].move_id == move_id:
+                self.rewind_to(position + 1)
+                return
+        raise KeyError(f"move {move_id} is not in the undo log")
+
+    def rewind_to(self, position : int) -> None:
+        if self.undo_log is None or not 0 <= position <= len(self.undo_log):
+            raise ValueError(f"no checkpoint at {position}")
+        abandoned = self.abandon_move()
+        if position < len(self.undo_log):
+            self.undo_moves(position)
+        elif not abandoned:
+            return
+
+        # versions only move forward, whatever was cached or persisted for the undone moves is stale
+        self.propagator.clear()
+        self.bump_state_version("information", "inference", "active")
+
+    def undo_moves(self, position : int) -> None:
+        self.own_state()
+
+        store = self.inference_store
+        status = store.status[:store.size].copy()
+        for delta in reversed(self.undo_log[position:]):
+            for name, (changed, old) in delta.cells.items():
+                np.put(getattr(self, name), changed, old)
+            changed, old = delta.inference_status
+            status[changed] = old
+        first = self.undo_log[position]
+        size = first.inference_size
+        self.inference_store = InferenceStore.restore(
+            store.shape,
+            store.move_ids[:size],
+            store.team_ids[:size],
+            store.player_ids[:size],
+            store.set_ids[:size],
+            store.card_ids[:size],
+            status[:size]
+        )
+        self.statistics.truncate(first.statistics_position)
+        del self.undo_log[position:]
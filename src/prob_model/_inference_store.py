@@ -0,0 +1,178 @@
+import sys
+import copy
+import numpy as np
+from typing import Dict, List, Tuple
+
+ACTIVE = 0
+CONFLICT = 1
+OUT_OF_DATE = 2
+REPEAT = 3
+
+class InferenceStore:
+    # inference records in growable parallel arrays, active ones indexed by card and by player
+    def __init__(
+        self,
+        team_count : int,
+        player_per_team_count : int,
+        set_count : int,
+        set_card_count : int,
+        capacity : int = 32
+    ) -> None:
+
+        self.shape = (team_count, player_per_team_count, set_count, set_card_count)
+        self.size = 0
+        self.move_ids = []
+        self.team_ids = np.zeros(capacity, dtype=np.int16)
+        self.player_ids = np.zeros(capacity, dtype=np.int16)
+        self.set_ids = np.zeros(capacity, dtype=np.int16)
+        self.card_ids = np.zeros(capacity, dtype=np.int16)
+        self.status = np.zeros(capacity, dtype=np.int8)
+
+        self.active_count = np.zeros(self.shape, dtype=np.int16)
+        self.card_index : Dict[Tuple[int, int], List[int]] = {}
+        self.player_index : Dict[Tuple[int, int], List[int]] = {}
+        self.move_index : Dict = {}
+
+    @classmethod
+    def restore(
+        cls,
+        shape : Tuple[int, int, int, int],
+        move_ids : List,
+        team_ids : np.ndarray,
+        player_ids : np.ndarray,
+        set_ids : np.ndarray,
+        card_ids : np.ndarray,
+        status : np.ndarray
+    ) -> "InferenceStore":
+        # rebuilds the indexes from the record arrays, e.g. when loading a snapshot
+        store = cls(*shape, capacity = max(len(move_ids), 32))
+        store.size = len(move_ids)
+        store.move_ids = list(move_ids)
+        for name, array in (("team_ids", team_ids), ("player_ids", player_ids), ("set_ids", set_ids), ("card_ids", card_ids), ("status", status)):
+            getattr(store, name)[:store.size] = array
+
+        for idx in store.active_indices().tolist():
+            team_id, player_id = int(store.team_ids[idx]), int(store.player_ids[idx])
+            set_id, card_id = int(store.set_ids[idx]), int(store.card_ids[idx])
+            store.active_count[team_id, player_id, set_id, card_id] += 1
+            store.card_index.setdefault((set_id, card_id), []).append(idx)
+            store.player_index.setdefault((team_id, player_id), []).append(idx)
+            store.move_index[store.move_ids[idx]] = idx
+        return store
+
+    def copy(self) -> "InferenceStore":
+        store = copy.copy(self)
+        for name in ("team_ids", "player_ids", "set_ids", "card_ids", "status", "active_count"):
+            setattr(store, name, getattr(self, name).copy())
+        store.move_ids = list(self.move_ids)
+        store.card_index = {key : list(indices) for key, indices in self.card_index.items()}
+        store.player_index = {key : list(indices) for key, indices in self.player_index.items()}
+        store.move_index = dict(self.move_index)
+        return store
+
+    def __len__(self) -> int:
+        return len(self.move_index)
+
+    @property
+    def nbytes(self) -> int:
+        # the record arrays plus the python lists and dicts indexing them
+        arrays = sum(getattr(self, name).nbytes for name in ("team_ids", "player_ids", "set_ids", "card_ids", "status", "active_count"))
+        indexes = sum(
+            sys.getsizeof(index) + sum(sys.getsizeof(indices) for indices in index.values())
+            for index in (self.card_index, self.player_index)
+        )
+        return arrays + indexes + sys.getsizeof(self.move_ids) + sys.getsizeof(self.move_index)
+
+    def grow(self) -> None:
+        for name in ("team_ids", "player_ids", "set_ids", "card_ids", "status"):
+            array = getattr(self, name)
+            grown = np.zeros(2*len(array), dtype=array.dtype)
+            grown[:len(array)] = array
+            setattr(self, name, grown)
+
+    def add(self, move_id, team_id : int, player_id : int, set_id : int, card_id : int) -> int:
+        # a move_id maps to one active inference, same as the dict it replaces
+        if move_id in self.move_index:
+            self.retire(self.move_index[move_id], REPEAT)
+        if self.size == len(self.status):
+            self.grow()
+
+        idx = self.size
+        self.size += 1
+        self.move_ids.append(move_id)
+        self.team_ids[idx] = team_id
+        self.player_ids[idx] = player_id
+        self.set_ids[idx] = set_id
+        self.card_ids[idx] = card_id
+        self.status[idx] = ACTIVE
+
+        self.active_count[team_id, player_id, set_id, card_id] += 1
+        self.card_index.setdefault((set_id, card_id), []).append(idx)
+        self.player_index.setdefault((team_id, player_id), []).append(idx)
+        self.move_index[move_id] = idx
+        return idx
+
+    def retire(self, idx : int, status : int) -> None:
+        team_id, player_id = int(self.team_ids[idx]), int(self.player_ids[idx])
+        set_id, card_id = int(self.set_ids[idx]), int(self.card_ids[idx])
+        self.status[idx] = status
+        self.active_count[team_id, player_id, set_id, card_id] -= 1
+        self.card_index[(set_id, card_id)].remove(idx)
+        self.player_index[(team_id, player_id)].remove(idx)
+        if self.move_index.get(self.move_ids[idx]) == idx:
+            del self.move_index[self.move_ids[idx]]
+
+    def is_active(self, idx : int) -> bool:
+        return self.status[idx] == ACTIVE
+
+    def active_indices(self) -> np.ndarray:
+        # nonzero on the 1-d mask, flatnonzero's ravel wrapper costs more than the scan at these sizes
+        return (self.status[:self.size] == ACTIVE).nonzero()[0]
+
+    def for_card(self, set_id : int, card_id : int) -> List[int]:
+        return self.card_index.get((set_id, card_id), [])
+
+    def for_player(self, team_id : int, player_id : int) -> List[int]:
+        return self.player_index.get((team_id, player_id), [])
+
+    def retire_against(self, information_matrix : np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # an inference is conflicting once its cell is known 0 and out of date once it is known 1
+        idx = self.active_indices()
+        cells = information_matrix[self.team_ids[idx], self.player_ids[idx], self.set_ids[idx], self.card_ids[idx]]
+        conflict_idx = idx[cells == 0]
+        out_of_date_idx = idx[cells == 1]
+        for conflict in conflict_idx.tolist():
+            self.retire(conflict, CONFLICT)
+        for out_of_date in out_of_date_idx.tolist():
+            self.retire(out_of_date, OUT_OF_DATE)
+        return conflict_idx, out_of_date_idx
+
+    def record(self, idx : int) -> Dict:
+        return {
+            "team_id" : int(self.team_ids[idx]),
+            "player_id" : int(self.player_ids[idx]),
+            "set_id" : int(self.set_ids[idx]),
+            "card_id" : int(self.card_ids[idx]),
+        }
+
+    def records(self, status : int = ACTIVE) -> Dict:
+        return {self.move_ids[idx] : self.record(idx) for idx in np.flatnonzero(self.status[:self.size] == status).tolist()}
+
+    @property
+    def inference_mask(self) -> np.ndarray:
+        return self.active_count > 0
+
+    @property
+    def multiplier_mask(self) -> np.ndarray:
+        # an inferred card is ruled out everywhere except the most recent inferred holder
+        multiplier = np.ones(self.shape, dtype=int)
+        idx = self.active_indices()
+        if len(idx) == 0:
+            return multiplier
+
+        set_ids, card_ids = self.set_ids[idx], self.card_ids[idx]
+        multiplier[:, :, set_ids, card_ids] = 0
+        _, latest = np.unique((set_ids*self.shape[3] + card_ids)[::-1], return_index=True)
+        latest = idx[::-1][latest]
+        multiplier[self.team_ids[latest], self.player_ids[latest], self.set_ids[latest], self.card_ids[latest]] = 1
+        return multiplier
@@ -0,0 +1,69 @@
+import functools
+import numpy as np
+from typing import Dict
+
+STATE_COMPONENTS = ("information", "inference", "active")
+
+class MatrixCacheMixin:
+    # derived matrices are kept until one of the state components they read is bumped
+    # anything writing the state arrays directly has to call bump_state_version itself
+
+    def initialize_matrix_cache(self) -> None:
+        self.state_version = 0
+        self.state_versions = {component : 0 for component in STATE_COMPONENTS}
+        self._matrix_cache = {}
+        self.cache_hits = {}
+        self.cache_misses = {}
+
+    def bump_state_version(self, *components : str) -> None:
+        self.state_version += 1
+        for component in components:
+            self.state_versions[component] = self.state_version
+
+    def clear_matrix_cache(self) -> None:
+        self._matrix_cache.clear()
+
+    def cached_matrix_value(self, name : str, *components : str):
+        # the cached value of a derived matrix reading `components` if it is still current, never computes it
+        entry = self._matrix_cache.get(name)
+        if entry is not None and entry[0] == tuple(self.state_versions[component] for component in components):
+            return entry[1]
+        return None
+
+    @property
+    def matrix_cache_nbytes(self) -> int:
+        return sum(entry[1].nbytes for entry in self._matrix_cache.values() if isinstance(entry[1], np.ndarray))
+
+    @property
+    def cache_info(self) -> Dict:
+        return {
+            "hits" : sum(self.cache_hits.values()),
+            "misses" : sum(self.cache_misses.values()),
+            "per_matrix" : {
+                name : {"hits" : self.cache_hits.get(name, 0), "misses" : self.cache_misses.get(name, 0)}
+                for name in sorted(set(self.cache_hits) | set(self.cache_misses))
+            },
+        }
+
+def cached_matrix(*components : str):
+    def decorator(method):
+        name = method.__name__
+
+        @functools.wraps(method)
+        def wrapper(self):
+            key = tuple(self.state_versions[component] for component in components)
+            entry = self._matrix_cache.get(name)
+            if entry is not None and entry[0] == key:
+                self.cache_hits[name] = self.cache_hits.get(name, 0) + 1
+                return entry[1]
+
+            self.cache_misses[name] = self.cache_misses.get(name, 0) + 1
+            value = method(self)
+            if isinstance(value, np.ndarray):
+                # cached arrays are shared between callers
+                value.flags.writeable = False
+            self._matrix_cache[name] = (key, value)
+            return value
+
+        return wrapper
+    return decorator
@@ -0,0 +1,62 @@
+import numpy as np
+from typing import Tuple
+
+class MatrixTemplate:
+    # pre-built initial arrays for one game configuration, shared by every bot created from it
+    def __init__(
+        self,
+        team_count : int,
+        player_count : int,
+        set_count : int = 8,
+        set_card_count : int = 6,
+        epsilon : float = 0.01
+    ) -> None:
+
+        self.team_count = team_count
+        self.player_count = player_count
+        self.set_count = set_count
+        self.set_card_count = set_card_count
+        self.epsilon = epsilon
+
+        player_per_team_count = player_count//team_count
+        self.shape = (team_count, player_per_team_count, set_count, set_card_count)
+
+        self._information_matrix = np.full(self.shape, epsilon)
+        self._player_set_card_count = np.full(self.shape[:3], epsilon)
+        self._player_card_count = np.full(self.shape[:2], (set_count*set_card_count)//player_count)
+        self._active_sets = np.full((set_count), epsilon)
+        self._active_cards = np.full((set_count, set_card_count), epsilon)
+        self._recent_card_array = np.full((team_count, set_count), epsilon)
+
+        for array in self.__dict__.values():
+            if isinstance(array, np.ndarray):
+                array.flags.writeable = False
+
+    @property
+    def config(self) -> Tuple[int, int, int, int]:
+        return self.team_count, self.player_count, self.set_count, self.set_card_count
+
+    def information_matrix(self, team_id : int, player_id : int, initial_game_state_array : np.ndarray) -> np.ndarray:
+        # cards in hand are excluded for every other player, own row is the hand itself
+        in_hand = initial_game_state_array == 1
+        information_matrix = self._information_matrix.copy()
+        information_matrix[:, :, in_hand] = 0
+        information_matrix[team_id, player_id] = in_hand
+        return information_matrix
+
+    def player_set_card_count(self, team_id : int, player_id : int, initial_game_state_array : np.ndarray) -> np.ndarray:
+        player_set_card_count = self._player_set_card_count.copy()
+        player_set_card_count[team_id, player_id, :] = initial_game_state_array.sum(axis=1)
+        return player_set_card_count
+
+    def player_card_count(self) -> np.ndarray:
+        return self._player_card_count.copy()
+
+    def active_sets(self) -> np.ndarray:
+        return self._active_sets.copy()
+
+    def active_cards(self) -> np.ndarray:
+        return self._active_cards.copy()
+
+    def recent_card_array(self) -> np.ndarray:
+        return self._recent_card_array.copy()
@@ -0,0 +1,114 @@
+import numpy as np
+from typing import Set, Tuple
+from ..tracing import CompletenessDeductionEvent
+
+class ConstraintPropagator:
+    # runs the hard completeness rules to a fixpoint over the cards, players and sets a move touched
+    def __init__(self, bot) -> None:
+        self.bot = bot
+        self.dirty_cards : Set[Tuple[int, int]] = set()
+        self.dirty_players : Set[Tuple[int, int]] = set()
+        self.dirty_sets : Set[int] = set()
+
+    def mark_card(self, set_id : int, card_id : int) -> None:
+        self.dirty_cards.add((set_id, card_id))
+
+    def mark_player(self, team_id : int, player_id : int) -> None:
+        self.dirty_players.add((team_id, player_id))
+
+    def mark_set(self, set_id : int) -> None:
+        self.dirty_sets.add(set_id)
+
+    def mark_cell(self, team_id : int, player_id : int, set_id : int, card_id : int) -> None:
+        self.dirty_cards.add((set_id, card_id))
+        self.dirty_players.add((team_id, player_id))
+        self.dirty_sets.add(set_id)
+
+    def mark_all(self) -> None:
+        bot = self.bot
+        self.dirty_cards.update((set_id, card_id) for set_id in range(bot.set_count) for card_id in range(bot.set_card_count))
+        self.dirty_players.update((team_id, player_id) for team_id in range(bot.team_count) for player_id in range(bot.player_per_team_count))
+        self.dirty_sets.update(range(bot.set_count))
+
+    def clear(self) -> None:
+        # for state known to be at a fixpoint already, e.g. restored from a snapshot
+        self.dirty_cards.clear()
+        self.dirty_players.clear()
+        self.dirty_sets.clear()
+
+    @property
+    def is_clean(self) -> bool:
+        return len(self.dirty_cards) == 0 and len(self.dirty_players) == 0 and len(self.dirty_sets) == 0
+
+    def run(self, move_id) -> int:
+        deductions = 0
+        while not self.is_clean:
+            if self.dirty_cards:
+                deductions += self.propagate_cards(move_id)
+            if self.dirty_players:
+                deductions += self.propagate_players(move_id)
+            if self.dirty_sets:
+                deductions += self.propagate_sets(move_id)
+        return deductions
+
+    def propagate_cards(self, move_id) -> int:
+        # card location has to be atleast 1
+        information_matrix = self.bot.information_matrix
+        set_ids, card_ids = np.array(list(self.dirty_cards)).T
+        self.dirty_cards.clear()
+
+        columns = information_matrix[:, :, set_ids, card_ids]
+        is_epsilon = columns == self.bot.EPSILON
+        complete = (is_epsilon.sum(axis=(0, 1)) == 1) & ~(columns == 1).any(axis=(0, 1))
+        if not complete.any():
+            return 0
+
+        team_idx, player_idx, card_idx = np.nonzero(is_epsilon & complete)
+        information_matrix[team_idx, player_idx, set_ids[card_idx], card_ids[card_idx]] = 1
+        tracer = self.bot.tracer
+        for team_id, player_id, set_id, card_id in zip(team_idx.tolist(), player_idx.tolist(), set_ids[card_idx].tolist(), card_ids[card_idx].tolist()):
+            if tracer.info:
+                tracer.emit(CompletenessDeductionEvent(move_id, "card", team_id, player_id, set_id, card_id))
+            self.dirty_players.add((team_id, player_id))
+            self.dirty_sets.add(set_id)
+        return len(card_idx)
+
+    def propagate_players(self, move_id) -> int:
+        # player card count match
+        information_matrix = self.bot.information_matrix
+        team_ids, player_ids = np.array(list(self.dirty_players)).T
+        self.dirty_players.clear()
+
+        hands = information_matrix[team_ids, player_ids]
+        is_epsilon = hands == self.bot.EPSILON
+        complete = ((hands == 1).sum(axis=(1, 2)) == self.bot.player_card_count[team_ids, player_ids]) & is_epsilon.any(axis=(1, 2))
+        if not complete.any():
+            return 0
+
+        if self.bot.tracer.info:
+            for team_id, player_id in zip(team_ids[complete].tolist(), player_ids[complete].tolist()):
+                self.bot.tracer.emit(CompletenessDeductionEvent(move_id, "player", team_id, player_id, None, None))
+        player_idx, set_idx, card_idx = np.nonzero(is_epsilon & complete[:, None, None])
+        information_matrix[team_ids[player_idx], player_ids[player_idx], set_idx, card_idx] = 0
+        self.dirty_cards.update(zip(set_idx.tolist(), card_idx.tolist()))
+        return len(card_idx)
+
+    def propagate_sets(self, move_id) -> int:
+        # set card count match
+        information_matrix = self.bot.information_matrix
+        set_ids = np.array(list(self.dirty_sets))
+        self.dirty_sets.clear()
+
+        sets = information_matrix[:, :, set_ids]
+        is_epsilon = sets == self.bot.EPSILON
+        complete = ((sets == 1).sum(axis=(0, 1, 3)) == self.bot.set_card_count) & is_epsilon.any(axis=(0, 1, 3))
+        if not complete.any():
+            return 0
+
+        if self.bot.tracer.info:
+            for set_id in set_ids[complete].tolist():
+                self.bot.tracer.emit(CompletenessDeductionEvent(move_id, "set", None, None, set_id, None))
+        team_idx, player_idx, set_idx, card_idx = np.nonzero(is_epsilon & complete[None, None, :, None])
+        information_matrix[team_idx, player_idx, set_ids[set_idx], card_idx] = 0
+        self.dirty_cards.update(zip(set_ids[set_idx].tolist(), card_idx.tolist()))
+        return len(card_idx)
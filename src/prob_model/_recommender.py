@@ -0,0 +1,143 @@
+import time
+import numpy as np
+from typing import List
+from ._deal_sampler import DealSampler
+from ._exact_marginals import exact_work
+
+PROB_SOURCES = ("prob_matrix", "exact_prob_matrix", "sample")
+# starting estimate of exact_marginals' seconds per count table cell, refined by every count the recommender runs
+EXACT_SECONDS_PER_CELL = 4e-9
+
+class MoveScores:
+    # the top asks, best first, as parallel arrays
+    __slots__ = ("to_team", "to", "set_id", "card_id", "hit_prob", "info_gain", "score", "legal_count", "seconds")
+
+    def __init__(self, to_team, to, set_id, card_id, hit_prob, info_gain, score, legal_count : int, seconds : float) -> None:
+        self.to_team = to_team
+        self.to = to
+        self.set_id = set_id
+        self.card_id = card_id
+        self.hit_prob = hit_prob
+        self.info_gain = info_gain
+        self.score = score
+        self.legal_count = legal_count
+        self.seconds = seconds
+
+    def __len__(self) -> int:
+        return len(self.score)
+
+    def action_dicts(self, team_id : int, player_id : int) -> List[dict]:
+        return [
+            {
+                "action" : "ask_card",
+                "by_team" : team_id,
+                "by" : player_id,
+                "to_team" : int(to_team),
+                "to" : int(to),
+                "set_id" : int(set_id),
+                "card_id" : int(card_id),
+            }
+            for to_team, to, set_id, card_id in zip(self.to_team, self.to, self.set_id, self.card_id)
+        ]
+
+def legal_ask_mask(bot) -> np.ndarray:
+    # (team, player, set, card): a card the bot lacks in an active set it holds, aimed at an opponent with cards
+    hand = bot.information_matrix[bot.team_id, bot.player_id] == 1
+    askable = hand.any(axis=1)[:, None] & ~hand & (bot.active_sets != 0)[:, None]
+    # called sets stay in information_matrix and player_card_count, they no longer sit in a hand
+    called_cards = (bot.information_matrix[:, :, bot.active_sets == 0] == 1).sum(axis=(2, 3))
+    opponents = bot.player_card_count - called_cards > 0
+    opponents[bot.team_id] = False
+    return opponents[:, :, None, None] & askable[None, None]
+
+def binary_entropy(p : np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.nan_to_num(-p*np.log2(p) - (1 - p)*np.log2(1 - p))
+
+class MoveRecommender:
+    # the expected information gain of an ask about one card is the binary entropy of a hit:
+    # a hit pins the card, a miss rules the target out, and H(card) = h(p) + (1 - p)H(card | miss)
+    def __init__(
+        self,
+        k : int = 5,
+        hit_weight : float = 1.0,
+        info_weight : float = 1.0,
+        prob : str = "prob_matrix",
+        budget_ms : float = 5.0,
+        sampler : DealSampler = None
+    ) -> None:
+
+        if prob not in PROB_SOURCES:
+            raise ValueError(f"prob must be one of {PROB_SOURCES}: {prob}")
+        self.k = k
+        self.hit_weight = hit_weight
+        self.info_weight = info_weight
+        self.prob = prob
+        self.budget_ms = budget_ms
+        self.sampler = sampler if sampler is not None else DealSampler(batch_size = 256)
+        self.exact_seconds_per_cell = EXACT_SECONDS_PER_CELL
+        # positions where counting would have overrun budget_ms and the sampler stood in
+        self.exact_skipped = 0
+
+    def remaining_seconds(self, start : float) -> float:
+        # what is left of the budget, keeping a share for scoring and for a sampling batch started just before the deadline
+        return max(self.budget_ms*1e-3*0.6 - (time.perf_counter() - start), 0)
+
+    def sample_prob_matrix(self, bot, start : float, use_inferences : bool = True) -> np.ndarray:
+        estimate = bot.sample_prob_matrix(seconds = self.remaining_seconds(start), seed = bot.state_version, sampler = self.sampler, use_inferences = use_inferences)
+        return np.nan_to_num(estimate.prob_matrix)
+
+    def exact_prob_matrix(self, bot, start : float) -> np.ndarray:
+        cached = bot.cached_matrix_value("exact_prob_matrix", "information")
+        if cached is not None:
+            return cached
+        try:
+            work = exact_work(bot.information_matrix, bot.player_card_count, bot.EPSILON)
+        except ValueError:
+            # no consistent deal, the cheap matrix still scores the asks
+            return np.nan_to_num(bot.prob_matrix)
+        if work*self.exact_seconds_per_cell > self.remaining_seconds(start):
+            # counting would overrun the budget, sampling the same hard constraints fits in what is left
+            self.exact_skipped += 1
+            return self.sample_prob_matrix(bot, start, use_inferences = False)
+
+        count_start = time.perf_counter()
+        try:
+            prob_matrix = bot.exact_prob_matrix
+        except ValueError:
+            # too many states for one count table
+            return np.nan_to_num(bot.prob_matrix)
+        seconds = time.perf_counter() - count_start
+        if seconds > 1e-3 and work > 0:
+            # a running median of the rate, one step towards every count; short counts are mostly
+            # memoized components and say little about it
+            self.exact_seconds_per_cell *= 1.1 if seconds/work > self.exact_seconds_per_cell else 1/1.1
+        return prob_matrix
+
+    def prob_matrix(self, bot, start : float) -> np.ndarray:
+        if self.prob == "exact_prob_matrix":
+            return self.exact_prob_matrix(bot, start)
+        if self.prob == "sample":
+            return self.sample_prob_matrix(bot, start)
+        return np.nan_to_num(bot.prob_matrix)
+
+    def recommend(self, bot, k : int = None) -> MoveScores:
+        start = time.perf_counter()
+        k = k if k is not None else self.k
+        legal = legal_ask_mask(bot)
+        prob_matrix = self.prob_matrix(bot, start)
+
+        hit_prob = np.where(legal, prob_matrix, 0)
+        info_gain = binary_entropy(hit_prob)
+        score = np.where(legal, self.hit_weight*hit_prob + self.info_weight*info_gain, -np.inf).reshape(-1)
+
+        legal_count = int(legal.sum())
+        k = min(k, legal_count)
+        top = np.argpartition(-score, k - 1)[:k] if k > 0 else np.zeros(0, dtype=int)
+        top = top[np.argsort(-score[top], kind="stable")]
+        to_team, to, set_id, card_id = np.unravel_index(top, legal.shape)
+        return MoveScores(
+            to_team, to, set_id, card_id,
+            hit_prob.reshape(-1)[top], info_gain.reshape(-1)[top], score[top],
+            legal_count, time.perf_counter() - start
+        )
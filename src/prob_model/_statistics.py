@@ -0,0 +1,112 @@
+import numpy as np
+from collections.abc import Mapping
+from typing import Dict, Iterator, NamedTuple, Tuple
+
+STATISTICS_SERIES = ("shannon_info", "dumb_shannon_info", "inference_length")
+
+STATISTICS_OFF = "off"
+STATISTICS_EVERY = "every"
+STATISTICS_ON_DEMAND = "on_demand"
+STATISTICS_MODES = (STATISTICS_OFF, STATISTICS_EVERY, STATISTICS_ON_DEMAND)
+
+class StatisticsConfig(NamedTuple):
+    # "every" samples after every `every`-th move, "on_demand" only when sample_statistics is called
+    # on_demand is the default, sampling costs more than the rest of an update
+    mode : str = STATISTICS_ON_DEMAND
+    every : int = 1
+    capacity : int = 512
+
+    @classmethod
+    def parse(cls, text : str) -> "StatisticsConfig":
+        # "off", "on_demand", "every" or "every:N", optionally followed by ",capacity"
+        spec, _, capacity = text.partition(",")
+        mode, _, every = spec.partition(":")
+        config = cls(mode, int(every) if every else 1, int(capacity) if capacity else cls._field_defaults["capacity"])
+        config.validate()
+        return config
+
+    def validate(self) -> None:
+        if self.mode not in STATISTICS_MODES:
+            raise ValueError(f"unknown statistics mode {self.mode}, expected one of {STATISTICS_MODES}")
+        if self.every <= 0 or self.capacity <= 0:
+            raise ValueError("every and capacity have to be positive")
+
+class StatisticsRecorder(Mapping):
+    # the last `capacity` samples of every series in preallocated ring buffers
+    # reads like the dict of lists it replaces, recorder[name] is the series in move order
+    def __init__(self, config : StatisticsConfig = None) -> None:
+        self.config = config if config is not None else StatisticsConfig()
+        self.config.validate()
+        self.values = np.zeros((len(STATISTICS_SERIES), self.config.capacity))
+        self.move_counts = np.zeros(self.config.capacity, dtype=np.int64)
+        # absolute sample indices, the buffers hold samples [start, count)
+        self.start = 0
+        self.count = 0
+        self.moves_seen = 0
+
+    def __getitem__(self, name : str) -> np.ndarray:
+        return self.values[STATISTICS_SERIES.index(name)][self.order()]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(STATISTICS_SERIES)
+
+    def __len__(self) -> int:
+        return len(STATISTICS_SERIES)
+
+    def order(self) -> np.ndarray:
+        return np.arange(self.start, self.count) % self.config.capacity
+
+    @property
+    def samples(self) -> int:
+        return self.count - self.start
+
+    def on_move(self, bot) -> None:
+        self.moves_seen += 1
+        if self.config.mode == STATISTICS_EVERY and self.moves_seen % self.config.every == 0:
+            self.sample(bot)
+
+    def sample(self, bot) -> None:
+        # the derived matrices are only computed here, and cached on the bot until its state changes
+        slot = self.count % self.config.capacity
+        self.values[0, slot] = bot.shannon_info_matrix.sum()
+        self.values[1, slot] = bot.dumb_shannon_info_matrix.sum()
+        self.values[2, slot] = len(bot.inference_store)
+        self.move_counts[slot] = self.moves_seen
+        self.count += 1
+        self.start = max(self.start, self.count - self.config.capacity)
+
+    def export(self) -> Dict[str, np.ndarray]:
+        # move is how many moves the bot had seen when the sample was taken
+        order = self.order()
+        return {"move" : self.move_counts[order], **{name : self.values[idx][order] for idx, name in enumerate(STATISTICS_SERIES)}}
+
+    def restore(self, series : Dict[str, np.ndarray], moves_seen : int) -> None:
+        # loads exported series, only the newest `capacity` samples are kept
+        count = len(series["move"])
+        kept = slice(max(0, count - self.config.capacity), count)
+        self.start = kept.start
+        self.count = count
+        order = self.order()
+        self.move_counts[order] = series["move"][kept]
+        for idx, name in enumerate(STATISTICS_SERIES):
+            self.values[idx, order] = series[name][kept]
+        self.moves_seen = moves_seen
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes + self.move_counts.nbytes
+
+    def position(self) -> Tuple[int, int]:
+        return self.count, self.moves_seen
+
+    def truncate(self, position : Tuple[int, int]) -> None:
+        # drops the samples taken after position, samples the ring overwrote meanwhile stay lost
+        self.count, self.moves_seen = position
+        self.start = min(self.start, self.count)
+
+    def copy(self) -> "StatisticsRecorder":
+        recorder = StatisticsRecorder(self.config)
+        recorder.values[:] = self.values
+        recorder.move_counts[:] = self.move_counts
+        recorder.start, recorder.count, recorder.moves_seen = self.start, self.count, self.moves_seen
+        return recorder
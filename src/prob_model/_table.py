@@ -0,0 +1,422 @@
+import sys
+import time
+import numpy as np
+from typing import Dict, List, Tuple
+from ..abstract_classes import LiteratureGameAbstract
+from ..tracing import NULL_METRICS, NULL_TRACER, PipelineMetrics, Tracer, HardUpdateEvent, InferenceDetectedEvent
+from ._deterministic_bot import LitBot
+from ._matrix_template import MatrixTemplate
+from ._batched_bot import completeness_pass
+from ._inference_store import InferenceStore, ACTIVE, CONFLICT, OUT_OF_DATE, REPEAT
+from ._statistics import StatisticsRecorder, StatisticsConfig
+
+# the table state update_game writes in place besides the inference records
+TABLE_ARRAYS = ("information_matrix", "player_card_count", "active_sets", "active_cards", "recent_card_array")
+
+class SeatInferenceStore(InferenceStore):
+    # one seat's read-only view of the table's inference records: the records are detected from
+    # public moves and shared, only their status depends on what the seat knows
+    def __init__(self, table : "LitTable", seat_idx : int) -> None:
+        self.table = table
+        self.seat_idx = seat_idx
+        self.shape = table.shape
+
+    size = property(lambda self: self.table.record_count)
+    move_ids = property(lambda self: self.table.record_move_ids)
+    team_ids = property(lambda self: self.table.record_team_ids)
+    player_ids = property(lambda self: self.table.record_player_ids)
+    set_ids = property(lambda self: self.table.record_set_ids)
+    card_ids = property(lambda self: self.table.record_card_ids)
+    status = property(lambda self: self.table.record_status[self.seat_idx])
+
+    def __len__(self) -> int:
+        return len(self.active_indices())
+
+    # the records are the table's, counted in LitTable.nbytes
+    nbytes = 0
+
+    def for_card(self, set_id : int, card_id : int) -> List[int]:
+        idx = self.active_indices()
+        return idx[(self.set_ids[idx] == set_id) & (self.card_ids[idx] == card_id)].tolist()
+
+    def for_player(self, team_id : int, player_id : int) -> List[int]:
+        idx = self.active_indices()
+        return idx[(self.team_ids[idx] == team_id) & (self.player_ids[idx] == player_id)].tolist()
+
+    @property
+    def inference_mask(self) -> np.ndarray:
+        mask = np.zeros(self.shape, dtype=bool)
+        idx = self.active_indices()
+        mask[self.team_ids[idx], self.player_ids[idx], self.set_ids[idx], self.card_ids[idx]] = True
+        return mask
+
+    def add(self, *args, **kwargs):
+        raise TypeError("a seat's inference records are updated by its LitTable")
+
+    retire = retire_against = add
+
+class TableSeat(LitBot):
+    # a LitBot whose hard knowledge lives in its LitTable: information_matrix is the seat's row of the
+    # table's stack, the public arrays are the table's own; the seat keeps its hand and statistics
+    def __init__(
+        self,
+        table : "LitTable",
+        seat_idx : int,
+        team_id : int,
+        player_id : int,
+        initial_game_state_array : np.ndarray = None,
+        fake_game_seed : int = None
+    ) -> None:
+
+        self.table = table
+        self.seat_idx = seat_idx
+        super().__init__(
+            team_id = team_id,
+            player_id = player_id,
+            team_count = table.team_count,
+            player_count = table.player_count,
+            initial_game_state_array = initial_game_state_array,
+            fake_game_seed = fake_game_seed,
+            matrix_template = table.matrix_template,
+            tracer = table.tracer,
+            metrics = table.metrics,
+            statistics_config = table.statistics_config,
+            set_count = table.set_count,
+            set_card_count = table.set_card_count
+        )
+
+    def initialize_matrix(self) -> None:
+        self.initialize_matrix_cache()
+        self.player_set_card_count = self.matrix_template.player_set_card_count(self.team_id, self.player_id, self.initial_game_state_array)
+        self.inference_store = SeatInferenceStore(self.table, self.seat_idx)
+        self.statistics = StatisticsRecorder(self.statistics_config)
+
+    information_matrix = property(lambda self: self.table.information_matrix[self.seat_idx])
+    player_card_count = property(lambda self: self.table.player_card_count)
+    active_sets = property(lambda self: self.table.active_sets)
+    active_cards = property(lambda self: self.table.active_cards)
+    recent_card_array = property(lambda self: self.table.recent_card_array)
+
+    def update_game(self, game_action_dict, stop = True):
+        raise TypeError("moves for a table seat go through LitTable.update_game")
+
+    def fork(self) -> LitBot:
+        # what-if evaluation runs on a standalone copy, the table is left alone
+        return self.detach()
+
+    def checkpoint(self) -> int:
+        raise TypeError("table seats do not record undo deltas, checkpoint their LitTable or detach() the seat first")
+
+    def detach(self) -> LitBot:
+        # a standalone LitBot with the seat's current knowledge
+        bot = LitBot(
+            team_id = self.team_id,
+            player_id = self.player_id,
+            team_count = self.team_count,
+            player_count = self.player_count,
+            initial_game_state_array = self.initial_game_state_array,
+            matrix_template = self.matrix_template,
+            tracer = self.tracer,
+            metrics = self.metrics,
+            statistics_config = self.statistics_config,
+            set_count = self.set_count,
+            set_card_count = self.set_card_count
+        )
+        bot.fake_game_seed = self.fake_game_seed
+        bot.information_matrix = self.information_matrix.copy()
+        bot.player_set_card_count = self.player_set_card_count.copy()
+        bot.player_card_count = self.player_card_count.copy()
+        bot.active_sets = self.active_sets.copy()
+        bot.active_cards = self.active_cards.copy()
+        bot.recent_card_array = self.recent_card_array.copy()
+        store = self.inference_store
+        bot.inference_store = InferenceStore.restore(
+            store.shape, store.move_ids[:store.size],
+            store.team_ids[:store.size], store.player_ids[:store.size], store.set_ids[:store.size], store.card_ids[:store.size],
+            store.status[:store.size]
+        )
+        bot.statistics = self.statistics.copy()
+        bot.propagator.clear()
+        bot.state_version = self.state_version
+        bot.state_versions = dict(self.state_versions)
+        return bot
+
+class LitTable(LiteratureGameAbstract):
+    # every seat of one game on a shared public core: each move is applied once, to the public arrays
+    # (player_card_count, active_sets, active_cards, recent_card_array, the inference records) and to
+    # the stack of the seats' information matrices with one vectorized update and completeness pass
+    EPSILON = LitBot.EPSILON
+
+    def __init__(
+        self,
+        team_count : int,
+        player_count : int,
+        set_count : int = 8,
+        set_card_count : int = 6,
+        matrix_template : MatrixTemplate = None,
+        metrics : PipelineMetrics = None,
+        statistics_config : StatisticsConfig = None,
+        tracer : Tracer = None
+    ) -> None:
+
+        super().__init__(
+            team_count = team_count,
+            player_count = player_count,
+            set_count = set_count,
+            set_card_count = set_card_count
+        )
+
+        self.shape = (team_count, self.player_per_team_count, set_count, set_card_count)
+        self.matrix_template = matrix_template if matrix_template is not None else MatrixTemplate(team_count, player_count, set_count, set_card_count, LitTable.EPSILON)
+        if self.matrix_template.config != (team_count, player_count, set_count, set_card_count):
+            raise ValueError(f"matrix_template config does not match the table: {self.matrix_template.config}")
+        self.metrics = metrics if metrics is not None else NULL_METRICS
+        self.statistics_config = statistics_config
+        # the seats share the table's tracer, events of the shared updates are emitted once per table
+        self.tracer = tracer if tracer is not None else NULL_TRACER
+
+        self.seats : Dict[Tuple[int, int], TableSeat] = {}
+        self.information_matrix = np.empty((0,) + self.shape)
+        self.player_card_count = self.matrix_template.player_card_count()
+        self.active_sets = self.matrix_template.active_sets()
+        self.active_cards = self.matrix_template.active_cards()
+        self.recent_card_array = self.matrix_template.recent_card_array()
+        self.move_count = 0
+
+        self.record_count = 0
+        self.record_move_ids = []
+        self.record_team_ids = np.zeros(32, dtype=np.int16)
+        self.record_player_ids = np.zeros(32, dtype=np.int16)
+        self.record_set_ids = np.zeros(32, dtype=np.int16)
+        self.record_card_ids = np.zeros(32, dtype=np.int16)
+        self.record_status = np.zeros((0, 32), dtype=np.int8)
+
+    @property
+    def nbytes(self) -> int:
+        # the shared state and inference records plus what each seat keeps for itself
+        arrays = sum(getattr(self, name).nbytes for name in TABLE_ARRAYS)
+        records = sum(getattr(self, f"record_{name}").nbytes for name in ("team_ids", "player_ids", "set_ids", "card_ids", "status"))
+        return arrays + records + sys.getsizeof(self.record_move_ids) + sum(seat.nbytes for seat in self.seats.values())
+
+    @property
+    def seat_count(self) -> int:
+        return len(self.seats)
+
+    def add_seat(self, team_id : int, player_id : int, initial_game_state_array : np.ndarray = None, fake_game_seed : int = None) -> TableSeat:
+        # seats join before the first move, a seat taken again is dealt the new hand
+        if self.move_count > 0:
+            raise ValueError("seats can only join a table before its first move")
+        replaced = self.seats.get((team_id, player_id))
+        seat_idx = replaced.seat_idx if replaced is not None else len(self.seats)
+        seat = TableSeat(self, seat_idx, team_id, player_id, initial_game_state_array, fake_game_seed)
+
+        information_matrix = self.matrix_template.information_matrix(team_id, player_id, seat.initial_game_state_array)
+        if replaced is not None:
+            self.information_matrix[seat_idx] = information_matrix
+        else:
+            self.information_matrix = np.concatenate([self.information_matrix, information_matrix[None]])
+            self.record_status = np.concatenate([self.record_status, np.zeros((1, self.record_status.shape[1]), dtype=np.int8)])
+        self.seats[(team_id, player_id)] = seat
+        return seat
+
+    @classmethod
+    def from_bots(
+        cls,
+        bots : Dict[Tuple[int, int], LitBot],
+        metrics : PipelineMetrics = None,
+        statistics_config : StatisticsConfig = None,
+        tracer : Tracer = None
+    ) -> "LitTable":
+        # seats standalone bots of one game, e.g. restored from a snapshot, at a shared table
+        # the bots must have seen the same moves, their public arrays and inference records agree
+        first = next(iter(bots.values()))
+        table = cls(first.team_count, first.player_count, first.set_count, first.set_card_count, first.matrix_template, metrics, statistics_config, tracer)
+        for (team_id, player_id), bot in bots.items():
+            table.add_seat(team_id, player_id, bot.initial_game_state_array)
+        table.information_matrix = np.stack([bot.information_matrix for bot in bots.values()]).astype(float)
+        table.player_card_count = first.player_card_count.copy()
+        table.active_sets = first.active_sets.copy()
+        table.active_cards = first.active_cards.copy()
+        table.recent_card_array = first.recent_card_array.copy()
+
+        store = first.inference_store
+        table.record_count = store.size
+        table.record_move_ids = list(store.move_ids[:store.size])
+        capacity = max(32, store.size)
+        for name, array in (("team_ids", store.team_ids), ("player_ids", store.player_ids), ("set_ids", store.set_ids), ("card_ids", store.card_ids)):
+            records = np.zeros(capacity, dtype=np.int16)
+            records[:store.size] = array[:store.size]
+            setattr(table, f"record_{name}", records)
+        table.record_status = np.zeros((len(bots), capacity), dtype=np.int8)
+        for seat_idx, bot in enumerate(bots.values()):
+            table.record_status[seat_idx, :store.size] = bot.inference_store.status[:store.size]
+
+        for seat, bot in zip(table.seats.values(), bots.values()):
+            seat.fake_game_seed = bot.fake_game_seed
+            seat.statistics = bot.statistics.copy()
+            seat.state_version = bot.state_version
+            seat.state_versions = dict(bot.state_versions)
+        table.move_count = max(bot.statistics.moves_seen for bot in bots.values())
+        return table
+
+    def checkpoint(self) -> Tuple:
+        # a copy of everything update_game writes, cheaper than undo deltas for a table's stack of
+        # seats; rewind_to puts the table and its seats back to it, once
+        return (
+            {name : getattr(self, name).copy() for name in TABLE_ARRAYS},
+            self.record_count,
+            self.record_status[:, :self.record_count].copy(),
+            self.move_count,
+            {seat_key : seat.statistics.position() for seat_key, seat in self.seats.items()},
+        )
+
+    def release_checkpoint(self, checkpoint : Tuple) -> None:
+        # nothing is recorded on the table, the checkpoint is the copy itself
+        pass
+
+    def rewind_to(self, checkpoint : Tuple) -> None:
+        arrays, record_count, record_status, move_count, statistics_positions = checkpoint
+        if arrays["information_matrix"].shape != self.information_matrix.shape:
+            raise ValueError("seats joined the table after the checkpoint")
+        for name, array in arrays.items():
+            setattr(self, name, array)
+        del self.record_move_ids[record_count:]
+        self.record_count = record_count
+        self.record_status[:, :record_count] = record_status
+        self.move_count = move_count
+        for seat_key, seat in self.seats.items():
+            seat.statistics.truncate(statistics_positions[seat_key])
+            # versions only move forward, whatever was cached for the undone moves is stale
+            seat.bump_state_version("information", "inference", "active")
+
+    def update_information_matrix_hard(self, set_id : int, card_id : int, ask_player : Tuple[int, int], ans_player : Tuple[int, int], result : int) -> None:
+        information_matrix = self.information_matrix
+        if result == 0:
+            assert not (information_matrix[:, ask_player[0], ask_player[1], set_id, card_id] == 1).any()
+            assert not (information_matrix[:, ans_player[0], ans_player[1], set_id, card_id] == 1).any()
+            information_matrix[:, ask_player[0], ask_player[1], set_id, card_id] = 0
+            information_matrix[:, ans_player[0], ans_player[1], set_id, card_id] = 0
+        else:
+            information_matrix[:, :, :, set_id, card_id] = 0
+            information_matrix[:, ask_player[0], ask_player[1], set_id, card_id] = 1
+            if ans_player is not None:
+                self.player_card_count[ask_player] += 1
+                self.player_card_count[ans_player] -= 1
+
+    def completeness_check_hard(self) -> None:
+        active = np.ones(len(self.information_matrix), dtype=bool)
+        while active.any():
+            active = completeness_pass(self.information_matrix, self.player_card_count, self.set_card_count, LitTable.EPSILON, active)
+
+    def grow_records(self) -> None:
+        capacity = 2*len(self.record_team_ids)
+        for name in ("record_team_ids", "record_player_ids", "record_set_ids", "record_card_ids"):
+            grown = np.zeros(capacity, dtype=np.int16)
+            grown[:self.record_count] = getattr(self, name)[:self.record_count]
+            setattr(self, name, grown)
+        status = np.zeros((len(self.record_status), capacity), dtype=np.int8)
+        status[:, :self.record_count] = self.record_status[:, :self.record_count]
+        self.record_status = status
+
+    def update_inference_list(self, team_id : int, player_id : int, set_id : int, card_id : int, move_id) -> None:
+        # LitBot.update_inference_list for every seat at once, detection only reads public arrays
+        status = self.record_status
+        new_idx = None
+        recent_card = self.recent_card_array[team_id, set_id]
+        if recent_card != card_id and recent_card != LitTable.EPSILON:
+            size = self.record_count
+            same_move = np.array([record_move_id == move_id for record_move_id in self.record_move_ids], dtype=bool)
+            if same_move.any():
+                repeated = (status[:, :size] == ACTIVE) & same_move
+                status[:, :size][repeated] = REPEAT
+            if size == status.shape[1]:
+                self.grow_records()
+                status = self.record_status
+            new_idx = size
+            self.record_move_ids.append(move_id)
+            self.record_team_ids[new_idx] = team_id
+            self.record_player_ids[new_idx] = player_id
+            self.record_set_ids[new_idx] = set_id
+            self.record_card_ids[new_idx] = int(recent_card)
+            status[:, new_idx] = ACTIVE
+            self.record_count += 1
+            if self.tracer.info:
+                self.tracer.emit(InferenceDetectedEvent(move_id, team_id, player_id, set_id, int(recent_card)))
+
+        # retiring conflicts and out-of-dates against every seat's information matrix
+        size = self.record_count
+        cells = self.information_matrix[:, self.record_team_ids[:size], self.record_player_ids[:size], self.record_set_ids[:size], self.record_card_ids[:size]]
+        active = status[:, :size] == ACTIVE
+        status[:, :size][active & (cells == 0)] = CONFLICT
+        status[:, :size][active & (cells == 1)] = OUT_OF_DATE
+
+        # remove internal inference conflicts, the latest older record per seat of each kind
+        if new_idx is not None:
+            older = np.flatnonzero(
+                (self.record_set_ids[:new_idx] == set_id) & (self.record_card_ids[:new_idx] == self.record_card_ids[new_idx])
+            )
+            repeat = (self.record_team_ids[older] == team_id) | (self.record_player_ids[older] == player_id)
+            for seat_idx in np.flatnonzero(status[:, new_idx] == ACTIVE).tolist():
+                candidates = older[status[seat_idx, older] == ACTIVE]
+                kinds = repeat[status[seat_idx, older] == ACTIVE]
+                if kinds.any():
+                    status[seat_idx, candidates[kinds][-1]] = REPEAT
+                if (~kinds).any():
+                    status[seat_idx, candidates[~kinds][-1]] = CONFLICT
+
+    def update_active_arrays(self, team_id : int, set_id : int, card_id : int, action : str, result : int) -> None:
+        if action == "ask_card":
+            if result == 0:
+                self.active_cards[set_id, card_id] = 1
+                self.recent_card_array[team_id, set_id] = card_id
+            else:
+                self.active_cards[set_id, card_id] = 0
+            self.active_sets[set_id] = 1
+        if action == "call_set":
+            self.active_cards[set_id, :] = 0
+            self.active_sets[set_id] = 0
+
+    def update_game(self, game_action_dict, stop = True) -> None:
+        # same steps, inputs and quirks as LitBot.update_game, e.g. a call_set leaves player_id
+        # and card_id at the last card location when the inferences are updated
+        move_id = list(game_action_dict.keys())[0]
+        game_action_dict = game_action_dict[move_id]
+        action = game_action_dict["action"]
+        team_id = game_action_dict["by_team"]
+        player_id = game_action_dict["by"]
+        set_id = game_action_dict["set_id"]
+        result = game_action_dict["result"]
+        card_id = None
+        stamps = [time.perf_counter()] if self.metrics.enabled else None
+
+        if action == "ask_card":
+            card_id = game_action_dict["card_id"]
+            if self.tracer.debug:
+                self.tracer.emit(HardUpdateEvent(move_id, "information matrix", set_id, card_id, result))
+            self.update_information_matrix_hard(set_id, card_id, (team_id, player_id), (game_action_dict["to_team"], game_action_dict["to"]), result)
+        elif action == "call_set":
+            for card_id, player_id in game_action_dict["card_locations"].items():
+                card_id = int(card_id)
+                if self.tracer.debug:
+                    self.tracer.emit(HardUpdateEvent(move_id, "information matrix", set_id, card_id, 1))
+                self.update_information_matrix_hard(set_id, card_id, (team_id, player_id), None, 1)
+
+        if stamps is not None:
+            stamps.append(time.perf_counter())
+        self.completeness_check_hard()
+        if stamps is not None:
+            stamps.append(time.perf_counter())
+        self.update_inference_list(team_id, player_id, set_id, card_id, move_id)
+        if stamps is not None:
+            stamps.append(time.perf_counter())
+        self.update_active_arrays(team_id, set_id, card_id, action, result)
+        if stamps is not None:
+            stamps.append(time.perf_counter())
+
+        self.move_count += 1
+        for seat in self.seats.values():
+            seat.bump_state_version("information", "inference", "active")
+            seat.update_statistics()
+        if stamps is not None:
+            stamps.append(time.perf_counter())
+            self.metrics.observe_move(stamps)
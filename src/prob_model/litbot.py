@@ -3,14 +3,20 @@ import numpy as np
 import itertools
 import json
 import copy
+from ..tracing import NULL_TRACER, HardUpdateEvent, CompletenessDeductionEvent, InferenceDetectedEvent
 
 class LitBot:
     EPSILON = 0.01
-    def __init__(self, game_id, team_id, player_id, player_count, game_state_array=None, fake_game_seed = None):
+    def __init__(self, game_id, team_id, player_id, player_count, game_state_array=None, fake_game_seed = None, tracer = None, team_count = 2, set_count = 8, set_card_count = 6):
         self.game_id = game_id
+        self.tracer = tracer if tracer is not None else NULL_TRACER
         self.team_id = team_id
         self.player_id = player_id
         self.player_count = player_count
+        self.team_count = team_count
+        self.set_count = set_count
+        self.set_card_count = set_card_count
+        self.player_per_team_count = player_count//team_count
 
         self.encoding = {
             "set_id" : {
@@ -64,12 +70,12 @@ class LitBot:
     def initialize_fake_game(self, fake_game_seed):
         
         np.random.seed(fake_game_seed)
-        card_location_array = np.random.choice(range(self.player_count), (8,6))
-        card_location_array_team = card_location_array%2
-        card_location_array_player = card_location_array//2
+        card_location_array = np.random.choice(range(self.player_count), (self.set_count, self.set_card_count))
+        card_location_array_team = card_location_array%self.team_count
+        card_location_array_player = card_location_array//self.team_count
 
-        game_state_array = np.zeros((2, self.player_count//2, 8, 6))
-        for set_id, card_id in itertools.product(range(8), range(6)):
+        game_state_array = np.zeros((self.team_count, self.player_per_team_count, self.set_count, self.set_card_count))
+        for set_id, card_id in itertools.product(range(self.set_count), range(self.set_card_count)):
             game_state_array[
                 card_location_array_team[set_id, card_id],
                 card_location_array_player[set_id, card_id],
@@ -81,33 +87,35 @@ class LitBot:
 
     def initialize_matrix(self, team_id, player_id, player_array):
         
-        self.truth_matrix = np.full((2, self.player_count//2, 8, 6), LitBot.EPSILON)
+        self.truth_matrix = np.full((self.team_count, self.player_per_team_count, self.set_count, self.set_card_count), LitBot.EPSILON)
         self.truth_matrix[team_id, player_id, :, :] = player_array
-        self.truth_matrix[team_id, [i for i in np.arange(self.player_count//2) if i != player_id ], :, :] -= player_array*LitBot.EPSILON
-        self.truth_matrix[0 if team_id == 1 else 1, [i for i in np.arange(self.player_count//2)], :, :] -= player_array*LitBot.EPSILON
+        self.truth_matrix[team_id, [i for i in np.arange(self.player_per_team_count) if i != player_id ], :, :] -= player_array*LitBot.EPSILON
+        for other_team_id in [i for i in np.arange(self.team_count) if i != team_id]:
+            self.truth_matrix[other_team_id, [i for i in np.arange(self.player_per_team_count)], :, :] -= player_array*LitBot.EPSILON
         
         self.inference_matrix = copy.deepcopy(self.truth_matrix)
 
-        self.active_cards_matrix = np.zeros((8, 6))
-        self.active_sets_matrix = np.zeros(8)
-        self.recent_card_array = np.full((8, 2), -1)
+        self.active_cards_matrix = np.zeros((self.set_count, self.set_card_count))
+        self.active_sets_matrix = np.zeros(self.set_count)
+        # last asked card and asking team per set
+        self.recent_card_array = np.full((self.set_count, 2), -1)
 
-        self.player_card_counter = np.full((2, self.player_count//2), 48//self.player_count)
-        self.player_set_card_counter = np.full((2, self.player_count//2, 8), LitBot.EPSILON)
+        self.player_card_counter = np.full((self.team_count, self.player_per_team_count), (self.set_count*self.set_card_count)//self.player_count)
+        self.player_set_card_counter = np.full((self.team_count, self.player_per_team_count, self.set_count), LitBot.EPSILON)
 
-        self.prob_matrix = np.zeros((0, 2, self.player_count//2, 8, 6))
+        self.prob_matrix = np.zeros((0, self.team_count, self.player_per_team_count, self.set_count, self.set_card_count))
         self.prob_matrix = self.update_prob_matrix(self.truth_matrix)
 
-        # self.total_shannon_info = -np.log2(np.full((8,6), 1/self.player_count))
+        # self.total_shannon_info = -np.log2(np.full((self.set_count, self.set_card_count), 1/self.player_count))
         # self.shannon_info_matrix = self.update_shannon_info_matrix(self.prob_matrix)
         
         
     def update_prob_matrix(self, truth_matrix):
 
-        prob_matrix = np.zeros((1, 2, self.player_count//2, 8, 6))
+        prob_matrix = np.zeros((1, self.team_count, self.player_per_team_count, self.set_count, self.set_card_count))
         prob_matrix[0, :, :, :, :] += truth_matrix
 
-        for set_id, card_id in itertools.product(range(0,8), range(0,6)):
+        for set_id, card_id in itertools.product(range(0,self.set_count), range(0,self.set_card_count)):
             prob_matrix[0, :, :, set_id, card_id] = np.where(
                 truth_matrix[:, :, set_id, card_id] == LitBot.EPSILON,
                 LitBot.EPSILON/truth_matrix[:, :, set_id, card_id].sum(),
@@ -127,11 +135,11 @@ class LitBot:
 
     def update_active_sets(self, set_id, card_id, result):
         self.active_sets_matrix[set_id] = 1
+        if self.tracer.debug:
+            self.tracer.emit(HardUpdateEvent(None, "active cards", set_id, card_id, result))
         if result == 1:
-            print("removed active card")
             self.active_cards_matrix[set_id, card_id] = 0
         else:
-            print("added active card")
             self.active_cards_matrix[set_id, card_id] = 1
 
     def update_inference_matrix(self, ask_player_id, ask_team_id, set_id, card_id):
@@ -144,7 +152,8 @@ class LitBot:
         #         ] = 1/self.active_cards_matrix[set_id].sum()
         
         if (self.recent_card_array[set_id, 0] != card_id) and (self.recent_card_array[set_id, 1] == ask_team_id) and (self.active_cards_matrix[set_id, self.recent_card_array[set_id, 0]] == 1):
-            print("updated deep inference matrix")
+            if self.tracer.info:
+                self.tracer.emit(InferenceDetectedEvent(None, ask_team_id, ask_player_id, set_id, self.recent_card_array[set_id, 0]))
             self.inference_matrix[
                 ask_team_id,
                 ask_player_id,
@@ -155,15 +164,16 @@ class LitBot:
     def update_player_card_count(self, ask_team_id, ask_player_id, ans_team_id, ans_player_id, set_id, card_id, result):
 
         if self.player_set_card_counter[ask_team_id, ask_player_id, set_id] == LitBot.EPSILON:
-            print("new player set combination detected")
+            if self.tracer.debug:
+                self.tracer.emit(HardUpdateEvent(None, "player set card count", set_id, card_id, result))
             self.player_set_card_counter[ask_team_id, ask_player_id, set_id] = 1
 
         if result == 1:
-            print("updated card count")
+            if self.tracer.debug:
+                self.tracer.emit(HardUpdateEvent(None, "player card count", set_id, card_id, result))
             self.player_card_counter[ask_team_id, ask_player_id] += 1
             self.player_card_counter[ans_team_id, ans_player_id] -= 1
 
-            print("updated player set card count")
             self.player_set_card_counter[ask_team_id, ask_player_id, set_id] += 1
 
         self.truth_matrix_completeness_inference()
@@ -171,11 +181,12 @@ class LitBot:
 
     def truth_matrix_completeness_inference(self):
 
-        for set_id, card_id in itertools.product(range(0,8), range(0,6)):
+        for set_id, card_id in itertools.product(range(0,self.set_count), range(0,self.set_card_count)):
             if self.inference_matrix[:, :, set_id, card_id].sum() == LitBot.EPSILON:
-                print("updating truth matrices on completeness logic")
                 team_id = np.argwhere(self.inference_matrix[:, :, set_id, card_id] == LitBot.EPSILON)[0][0]
                 player_id = np.argwhere(self.inference_matrix[:, :, set_id, card_id] == LitBot.EPSILON)[0][1]
+                if self.tracer.info:
+                    self.tracer.emit(CompletenessDeductionEvent(None, "card", team_id, player_id, set_id, card_id))
                 self.inference_matrix[team_id, player_id, set_id, card_id] = 1
                 self.truth_matrix[team_id, player_id, set_id, card_id] = 1
 
@@ -185,14 +196,14 @@ class LitBot:
 
         # set completeness
         set_card_count = player_set_card_count.sum(axis=(0, 1))
-        completed_sets = np.argwhere(set_card_count==6).reshape(-1).tolist()
+        completed_sets = np.argwhere(set_card_count==self.set_card_count).reshape(-1).tolist()
 
 
         for set_id in completed_sets:
-            print(f"set_id {set_id} is semi certain now")
+            if self.tracer.info:
+                self.tracer.emit(CompletenessDeductionEvent(None, "set", None, None, set_id, None))
             null_players = np.argwhere(player_set_card_count[:, :, set_id] == 0).tolist()
             for team_id, player_id in null_players:
-                print(f"team_id {team_id} player_id {player_id} doesn't have set_id {set_id}")
                 self.truth_matrix[team_id, player_id, set_id, :] = 0
                 # np.where(self.truth_matrix[team_id, player_id, set_id, :] == LitBot.EPSILON, 0, self.truth_matrix[:, :, set_id, :])
                 self.inference_matrix[team_id, player_id, set_id, :] = 0
@@ -203,10 +214,10 @@ class LitBot:
         completed_players = np.argwhere(player_card_count==self.player_card_counter).tolist()
         
         for team_id, player_id in completed_players:
-            print(f"team_id {team_id} player_id {player_id}  is semi certain now")
+            if self.tracer.info:
+                self.tracer.emit(CompletenessDeductionEvent(None, "player", team_id, player_id, None, None))
             null_sets = np.argwhere(player_set_card_count[team_id, player_id, :] == 0).tolist()
             for set_id in null_sets:
-                print(f"team_id {team_id} player_id {player_id} doesn't have set_id {set_id}")
                 self.truth_matrix[team_id, player_id, set_id, :] = 0
                 # np.where(self.truth_matrix[team_id, player_id, :, :] == LitBot.EPSILON, 0, self.truth_matrix[team_id, player_id, :, :])
                 self.inference_matrix[team_id, player_id, set_id, :] = 0
@@ -225,22 +236,26 @@ class LitBot:
             result = game_action_dict["result"]
 
             if result == 1:
-                print("updated truth matrix 1")
+                if self.tracer.debug:
+                    self.tracer.emit(HardUpdateEvent(None, "truth matrix", set_id, card_id, 1))
                 self.truth_matrix[ask_team_id, ask_player_id, set_id, card_id] = 1
-                self.truth_matrix[ask_team_id, [i for i in np.arange(self.player_count//2) if i != ask_player_id ], set_id, card_id] = 0
-                self.truth_matrix[ans_team_id, [i for i in np.arange(self.player_count//2)], set_id, card_id] = 0
+                self.truth_matrix[ask_team_id, [i for i in np.arange(self.player_per_team_count) if i != ask_player_id ], set_id, card_id] = 0
+                self.truth_matrix[ans_team_id, [i for i in np.arange(self.player_per_team_count)], set_id, card_id] = 0
 
-                print("updated inference matrix 1")
+                if self.tracer.debug:
+                    self.tracer.emit(HardUpdateEvent(None, "inference matrix", set_id, card_id, 1))
                 self.inference_matrix[ask_team_id, ask_player_id, set_id, card_id] = 1
-                self.inference_matrix[ask_team_id, [i for i in np.arange(self.player_count//2) if i != ask_player_id ], set_id, card_id] = 0
-                self.inference_matrix[ans_team_id, [i for i in np.arange(self.player_count//2)], set_id, card_id] = 0
+                self.inference_matrix[ask_team_id, [i for i in np.arange(self.player_per_team_count) if i != ask_player_id ], set_id, card_id] = 0
+                self.inference_matrix[ans_team_id, [i for i in np.arange(self.player_per_team_count)], set_id, card_id] = 0
 
 
             else:
-                print("updated truth matrix 0")
+                if self.tracer.debug:
+                    self.tracer.emit(HardUpdateEvent(None, "truth matrix", set_id, card_id, 0))
                 self.truth_matrix[ask_team_id, ask_player_id, set_id, card_id] = 0
                 self.truth_matrix[ans_team_id, ans_player_id, set_id, card_id] = 0
-                print("updated inference matrix 0")
+                if self.tracer.debug:
+                    self.tracer.emit(HardUpdateEvent(None, "inference matrix", set_id, card_id, 0))
                 self.inference_matrix[ask_team_id, ask_player_id, set_id, card_id] = 0
                 self.inference_matrix[ans_team_id, ans_player_id, set_id, card_id] = 0
                 
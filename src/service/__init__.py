@@ -0,0 +1,4 @@
+from ._game_registry import GameRegistry, GameEntry
+from ._move_executor import MoveExecutor, Overloaded, validate_move, apply_moves
+from ._state_feed import StateFeeds, SeatFeed, Subscriber, merge_frames
+from ._encodings import EncodedMatrixCache, encode_matrix, etag_matches, ENCODINGS, STATE_MATRICES
@@ -0,0 +1,106 @@
+import os
+import json
+import base64
+import weakref
+import itertools
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from ..prob_model import LitBot
+
+ENCODING_JSON = "json"
+ENCODING_SPARSE = "sparse"
+ENCODING_PACKED = "packed"
+ENCODING_MSGPACK = "msgpack"
+ENCODINGS = (ENCODING_JSON, ENCODING_SPARSE, ENCODING_PACKED, ENCODING_MSGPACK)
+
+# matrix name : (LitBot property, state components it reads, dtype of the packed encodings)
+STATE_MATRICES : Dict[str, Tuple[str, Tuple[str, ...], str]] = {
+    "truth" : ("truth_matrix", ("information",), "int8"),
+    "inference" : ("inference_matrix", ("information", "inference"), "int8"),
+    "prob" : ("prob_matrix", ("information", "inference"), "float16"),
+}
+
+class EncodedMatrix:
+    __slots__ = ("etag", "body", "media_type")
+
+    def __init__(self, etag : str, body : bytes, media_type : str) -> None:
+        self.etag = etag
+        self.body = body
+        self.media_type = media_type
+
+def matrix_version(bot : LitBot, matrix : str) -> int:
+    # moves only touching the active arrays leave every served matrix and its etag alone
+    return max(bot.state_versions[component] for component in STATE_MATRICES[matrix][1])
+
+def json_values(values : np.ndarray, dtype : str) -> list:
+    # probabilities to 4 decimals, the 0/1 matrices as ints
+    return (np.round(values, 4) if np.dtype(dtype).kind == "f" else values.astype(dtype)).tolist()
+
+def matrix_payload(matrix : np.ndarray, dtype : str, encoding : str) -> Dict:
+    if encoding == ENCODING_JSON:
+        return {"shape" : list(matrix.shape), "data" : json_values(matrix, dtype)}
+    if encoding == ENCODING_SPARSE:
+        # (team_id, player_id, set_id, card_id, value) of the non zero cells, e.g. the known card locations of truth
+        cells = np.argwhere(matrix != 0)
+        values = json_values(matrix[tuple(cells.T)], dtype)
+        return {"shape" : list(matrix.shape), "cells" : [[*cell, value] for cell, value in zip(cells.tolist(), values)]}
+    # packed and msgpack are the matrix in C order as dtype, base64 in json and raw bytes in msgpack
+    data = np.ascontiguousarray(matrix, dtype=dtype).tobytes()
+    return {
+        "shape" : list(matrix.shape),
+        "dtype" : dtype,
+        "data" : base64.b64encode(data).decode("ascii") if encoding == ENCODING_PACKED else data,
+    }
+
+def encode_matrix(bot : LitBot, matrix : str, encoding : str) -> Tuple[bytes, str]:
+    if matrix not in STATE_MATRICES:
+        raise ValueError(f"unknown matrix {matrix}, expected one of {tuple(STATE_MATRICES)}")
+    if encoding not in ENCODINGS:
+        raise ValueError(f"unknown encoding {encoding}, expected one of {ENCODINGS}")
+    name, _, dtype = STATE_MATRICES[matrix]
+    payload = {"matrix" : matrix, "version" : matrix_version(bot, matrix), **matrix_payload(np.nan_to_num(getattr(bot, name)), dtype, encoding)}
+    if encoding == ENCODING_MSGPACK:
+        # msgpack is optional, only imported when a client asks for it
+        import msgpack
+        return msgpack.packb(payload), "application/msgpack"
+    return json.dumps(payload, separators=(",", ":")).encode(), "application/json"
+
+class EncodedMatrixCache:
+    # encoded state reads keyed by bot, matrix and encoding, valid until the matrix's state version moves;
+    # a bot's token and the process nonce keep etags of a recreated or restored game from matching old ones
+    def __init__(self, max_entries : int = 4096) -> None:
+        self.max_entries = max_entries
+        self.nonce = os.urandom(4).hex()
+        self.tokens = weakref.WeakKeyDictionary()
+        self.counter = itertools.count()
+        self.entries : OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def etag(self, bot : LitBot, matrix : str, encoding : str) -> str:
+        if bot not in self.tokens:
+            self.tokens[bot] = next(self.counter)
+        return f'"{self.nonce}-{self.tokens[bot]}-{matrix_version(bot, matrix)}-{matrix}-{encoding}"'
+
+    def get(self, bot : LitBot, matrix : str, encoding : str) -> EncodedMatrix:
+        etag = self.etag(bot, matrix, encoding)
+        key = (self.tokens[bot], matrix, encoding)
+        entry = self.entries.get(key)
+        if entry is not None and entry.etag == etag:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry
+        self.misses += 1
+        entry = EncodedMatrix(etag, *encode_matrix(bot, matrix, encoding))
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return entry
+
+def etag_matches(if_none_match : Optional[str], etag : str) -> bool:
+    if if_none_match is None:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
@@ -0,0 +1,222 @@
+import time
+import asyncio
+import weakref
+import numpy as np
+from collections import OrderedDict
+from typing import Callable, Dict, List, Tuple
+from ..prob_model import LitBot, LitTable, MatrixTemplate, StatisticsConfig
+from ..persistence import dump_game, load_game
+from ..tracing import PipelineMetrics, Tracer, INFO
+
+class GameEntry:
+    __slots__ = ("game_id", "bots", "table", "lock", "tracer", "last_access", "nbytes")
+
+    def __init__(self, game_id : str, last_access : float, lock : asyncio.Lock = None, tracer : Tracer = None) -> None:
+        self.game_id = game_id
+        self.bots = {}
+        # the game's bots emit into one ring buffered tracer, the game's recent events
+        self.tracer = tracer if tracer is not None else Tracer(game_id = game_id)
+        # with shared tables the bots are the seats of this LitTable
+        self.table = None
+        self.lock = lock if lock is not None else asyncio.Lock()
+        self.last_access = last_access
+        self.nbytes = 0
+
+    def move_targets(self) -> List:
+        # what update_game has to be called on for every move
+        return [self.table] if self.table is not None else list(self.bots.values())
+
+def estimate_entry_nbytes(entry : GameEntry) -> int:
+    # a table counts its seats, standalone bots count themselves; both grow with the moves applied
+    if entry.table is not None:
+        return entry.table.nbytes
+    return sum(bot.nbytes for bot in entry.bots.values())
+
+class GameRegistry:
+    def __init__(
+        self,
+        ttl_seconds : float = 3600.0,
+        max_games : int = 1000,
+        max_bytes : int = 256*1024*1024,
+        clock : Callable[[], float] = time.monotonic,
+        metrics : PipelineMetrics = None,
+        statistics_config : StatisticsConfig = None,
+        shared_tables : bool = False,
+        trace_level : int = INFO,
+        trace_ring_size : int = 1024,
+        on_evict : Callable[[GameEntry], None] = None
+    ) -> None:
+
+        self.ttl_seconds = ttl_seconds
+        self.max_games = max_games
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.metrics = metrics
+        self.statistics_config = statistics_config
+        # seat every bot of a game at one LitTable, seats then have to join before the first move
+        self.shared_tables = shared_tables
+        self.trace_level = trace_level
+        self.trace_ring_size = trace_ring_size
+        # called with every entry evict drops, for whatever the caller keeps per game
+        self.on_evict = on_evict
+
+        # least recently used game first
+        self.games : "OrderedDict[str, GameEntry]" = OrderedDict()
+        self.templates : Dict[Tuple[int, int, int, int], MatrixTemplate] = {}
+        self.nbytes = 0
+        # locks of games not entered yet, each lives as long as a request holds or awaits it
+        self.pending_locks : "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+    def __len__(self) -> int:
+        return len(self.games)
+
+    def __contains__(self, game_id : str) -> bool:
+        return game_id in self.games
+
+    def template(self, team_count : int, player_count : int, set_count : int = 8, set_card_count : int = 6) -> MatrixTemplate:
+        config = (team_count, player_count, set_count, set_card_count)
+        if config not in self.templates:
+            self.templates[config] = MatrixTemplate(*config, epsilon = LitBot.EPSILON)
+        return self.templates[config]
+
+    def touch(self, game_id : str) -> GameEntry:
+        entry = self.games[game_id]
+        entry.last_access = self.clock()
+        self.games.move_to_end(game_id)
+        return entry
+
+    def get_game(self, game_id : str) -> GameEntry:
+        if game_id not in self.games:
+            raise KeyError(f"unknown game_id: {game_id}")
+        return self.touch(game_id)
+
+    def get_bot(self, game_id : str, team_id : int, player_id : int) -> LitBot:
+        entry = self.get_game(game_id)
+        if (team_id, player_id) not in entry.bots:
+            raise KeyError(f"no bot seated at {team_id, player_id} in game {game_id}")
+        return entry.bots[(team_id, player_id)]
+
+    def lock(self, game_id : str) -> asyncio.Lock:
+        # an unknown game_id gets a lock but no entry, the entry is only added once a bot or snapshot fills it
+        if game_id in self.games:
+            return self.touch(game_id).lock
+        lock = self.pending_locks.get(game_id)
+        if lock is None:
+            lock = self.pending_locks[game_id] = asyncio.Lock()
+        return lock
+
+    def make_tracer(self, game_id : str) -> Tracer:
+        return Tracer(level = self.trace_level, ring_size = self.trace_ring_size, game_id = game_id)
+
+    def add_game(self, game_id : str, tracer : Tracer = None) -> GameEntry:
+        # the entry takes over the lock its creator is holding
+        tracer = tracer if tracer is not None else self.make_tracer(game_id)
+        self.games[game_id] = GameEntry(game_id, self.clock(), self.pending_locks.pop(game_id, None), tracer)
+        return self.games[game_id]
+
+    def create_bot(
+        self,
+        game_id : str,
+        team_id : int,
+        player_id : int,
+        team_count : int,
+        player_count : int,
+        initial_game_state_array : np.ndarray = None,
+        fake_game_seed : int = None,
+        set_count : int = 8,
+        set_card_count : int = 6
+    ) -> LitBot:
+
+        # the bot is built before the game is entered, a rejected seat leaves the registry as it was
+        entry = self.games.get(game_id)
+        table = entry.table if entry is not None else None
+        tracer = entry.tracer if entry is not None else self.make_tracer(game_id)
+        if self.shared_tables:
+            if table is None:
+                table = LitTable(
+                    team_count,
+                    player_count,
+                    set_count,
+                    set_card_count,
+                    matrix_template = self.template(team_count, player_count, set_count, set_card_count),
+                    metrics = self.metrics,
+                    statistics_config = self.statistics_config,
+                    tracer = tracer
+                )
+            elif table.matrix_template.config != (team_count, player_count, set_count, set_card_count):
+                raise ValueError(f"game {game_id} is seated for {table.matrix_template.config}")
+            bot = table.add_seat(team_id, player_id, initial_game_state_array, fake_game_seed)
+        else:
+            bot = LitBot(
+                team_id = team_id,
+                player_id = player_id,
+                team_count = team_count,
+                player_count = player_count,
+                initial_game_state_array = initial_game_state_array,
+                fake_game_seed = fake_game_seed,
+                matrix_template = self.template(team_count, player_count, set_count, set_card_count),
+                tracer = tracer,
+                metrics = self.metrics,
+                statistics_config = self.statistics_config,
+                set_count = set_count,
+                set_card_count = set_card_count
+            )
+        entry = self.touch(game_id) if entry is not None else self.add_game(game_id, tracer)
+        entry.table = table
+        entry.bots[(team_id, player_id)] = bot
+        self.refresh_nbytes(game_id)
+        return bot
+
+    def snapshot_game(self, game_id : str) -> bytes:
+        return dump_game(self.get_game(game_id).bots)
+
+    def restore_game(self, game_id : str, data : bytes) -> GameEntry:
+        # replaces whatever the registry holds for game_id with the snapshot's bots
+        # an existing entry keeps its lock, the caller may be holding it
+        entry = self.games.get(game_id)
+        tracer = entry.tracer if entry is not None else self.make_tracer(game_id)
+        bots = load_game(data, self.template, tracer = tracer, metrics = self.metrics, statistics_config = self.statistics_config)
+        entry = self.touch(game_id) if entry is not None else self.add_game(game_id, tracer)
+        if self.shared_tables and len(bots) > 0:
+            entry.table = LitTable.from_bots(bots, self.metrics, self.statistics_config, entry.tracer)
+            entry.bots = dict(entry.table.seats)
+        else:
+            entry.table = None
+            entry.bots = bots
+        self.refresh_nbytes(game_id)
+        return entry
+
+    def refresh_nbytes(self, game_id : str) -> List[str]:
+        # re-measures a game after its bots changed, e.g. after a batch of moves, and evicts
+        # other games if it pushed the registry over max_bytes
+        entry = self.games[game_id]
+        self.nbytes -= entry.nbytes
+        entry.nbytes = estimate_entry_nbytes(entry)
+        self.nbytes += entry.nbytes
+        return self.evict(keep = game_id)
+
+    def remove_game(self, game_id : str) -> None:
+        entry = self.games.pop(game_id)
+        self.nbytes -= entry.nbytes
+
+    def evict(self, keep : str = None) -> List[str]:
+        # expired games first, then least recently used until under both caps
+        # games whose lock is held are being updated and are never evicted
+        now = self.clock()
+        evicted = []
+        for game_id, entry in list(self.games.items()):
+            if game_id != keep and not entry.lock.locked() and now - entry.last_access > self.ttl_seconds:
+                self.remove_game(game_id)
+                evicted.append(entry)
+
+        for game_id, entry in list(self.games.items()):
+            if len(self.games) <= self.max_games and self.nbytes <= self.max_bytes:
+                break
+            if game_id != keep and not entry.lock.locked():
+                self.remove_game(game_id)
+                evicted.append(entry)
+
+        if self.on_evict is not None:
+            for entry in evicted:
+                self.on_evict(entry)
+        return [entry.game_id for entry in evicted]
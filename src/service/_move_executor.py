@@ -0,0 +1,100 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Tuple
+from ..prob_model import LitBot
+from ..tracing import MoveProfiler
+
+class Overloaded(RuntimeError):
+    # raised instead of queueing once max_pending batches are waiting or running
+    pass
+
+def validate_move(bot : LitBot, move_id, action_dict : Dict) -> None:
+    # checks a move against the game's configuration before any bot sees it
+    def check_player(team_id, player_id):
+        if not (0 <= team_id < bot.team_count and 0 <= player_id < bot.player_per_team_count):
+            raise ValueError(f"move {move_id}: no player {team_id, player_id} at this table")
+
+    action = action_dict.get("action")
+    if action not in ("ask_card", "call_set"):
+        raise ValueError(f"move {move_id}: unknown action {action}")
+    if action_dict.get("result") not in (0, 1):
+        raise ValueError(f"move {move_id}: result must be 0 or 1")
+    if not 0 <= action_dict["set_id"] < bot.set_count:
+        raise ValueError(f"move {move_id}: set_id out of range")
+    check_player(action_dict["by_team"], action_dict["by"])
+
+    if action == "ask_card":
+        check_player(action_dict["to_team"], action_dict["to"])
+        if action_dict["to_team"] == action_dict["by_team"]:
+            raise ValueError(f"move {move_id}: asked a teammate")
+        if not 0 <= action_dict["card_id"] < bot.set_card_count:
+            raise ValueError(f"move {move_id}: card_id out of range")
+    else:
+        # a call names the holder of every card of the set, each card once
+        card_ids = [int(card_id) for card_id in action_dict["card_locations"]]
+        if sorted(card_ids) != list(range(bot.set_card_count)):
+            raise ValueError(f"move {move_id}: call_set needs each of the set's {bot.set_card_count} card_ids once, got {sorted(card_ids)}")
+        for player_id in action_dict["card_locations"].values():
+            check_player(action_dict["by_team"], int(player_id))
+
+def apply_moves(targets : List, moves : List[Tuple], profiler : MoveProfiler = None) -> None:
+    # every target, the game's bots or the LitTable they are seated at, sees every move in order
+    # a batch is applied whole or not at all: a move that raises, e.g. one contradicting what the
+    # bots know, rewinds every target to its checkpoint from before the batch and re-raises
+    # a profiler brackets each move until it is done
+    checkpoints = [target.checkpoint() for target in targets]
+    try:
+        for move_id, action_dict in moves:
+            profiling = profiler is not None and not profiler.done
+            if profiling:
+                profiler.start()
+            try:
+                for target in targets:
+                    target.update_game({move_id : action_dict})
+            finally:
+                if profiling:
+                    profiler.stop()
+    except BaseException:
+        for target, checkpoint in zip(targets, checkpoints):
+            target.rewind_to(checkpoint)
+        raise
+    finally:
+        for target, checkpoint in zip(targets, checkpoints):
+            target.release_checkpoint(checkpoint)
+
+class MoveExecutor:
+    # runs the numpy work off the event loop on a bounded thread pool; callers hold the game's
+    # lock around run, so one game's moves stay ordered while different games run side by side
+    def __init__(self, max_workers : int = 4, max_pending : int = 64) -> None:
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.pool = ThreadPoolExecutor(max_workers, thread_name_prefix="litbot-moves")
+        self.pending = 0
+        self.rejected = 0
+        self.completed = 0
+
+    def reserve(self) -> None:
+        # taken before waiting on the game lock, so queued batches count against the bound too
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise Overloaded(f"{self.pending} move batches pending, retry later")
+        self.pending += 1
+
+    def release(self) -> None:
+        self.pending -= 1
+        self.completed += 1
+
+    async def run(self, function : Callable, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.pool, function, *args)
+
+    def shutdown(self) -> None:
+        self.pool.shutdown(wait=True)
+
+    @property
+    def stats(self) -> Dict:
+        return {
+            "pending" : self.pending,
+            "max_pending" : self.max_pending,
+            "rejected" : self.rejected,
+            "completed" : self.completed,
+        }
@@ -0,0 +1,204 @@
+import asyncio
+import numpy as np
+from collections import deque
+from typing import Dict, List, Optional, Set, Tuple
+from ..prob_model import LitBot
+
+FRAME_SNAPSHOT = "snapshot"
+FRAME_DIFF = "diff"
+FRAME_CLOSED = "closed"
+
+class SeatView:
+    # what the subscribers of one seat have been sent so far, diffs are taken against it
+    __slots__ = ("version", "information_matrix", "records", "prob_matrix")
+
+    def __init__(self, version : int, information_matrix : np.ndarray, records : List[Tuple], prob_matrix : np.ndarray) -> None:
+        self.version = version
+        self.information_matrix = information_matrix
+        self.records = records
+        self.prob_matrix = prob_matrix
+
+    @classmethod
+    def capture(cls, bot : LitBot) -> "SeatView":
+        return cls(bot.state_version, bot.information_matrix.copy(), inference_records(bot), np.nan_to_num(bot.prob_matrix))
+
+    def snapshot_frame(self) -> Dict:
+        return {
+            "type" : FRAME_SNAPSHOT,
+            "version" : self.version,
+            "information_matrix" : self.information_matrix.tolist(),
+            "inferences" : [list(record) for record in self.records],
+            "prob_matrix" : np.round(self.prob_matrix, 4).tolist(),
+        }
+
+def inference_records(bot : LitBot) -> List[Tuple]:
+    # (index, move_id, team_id, player_id, set_id, card_id, status) of every record, retired ones included
+    store = bot.inference_store
+    size = store.size
+    columns = (store.team_ids[:size], store.player_ids[:size], store.set_ids[:size], store.card_ids[:size], store.status[:size])
+    return [(idx, store.move_ids[idx], *values) for idx, values in enumerate(zip(*(column.tolist() for column in columns)))]
+
+def cell_list(cells : np.ndarray, values : np.ndarray) -> List[List]:
+    return [[*cell, value] for cell, value in zip(cells.tolist(), values.tolist())]
+
+def diff_frame(view : SeatView, bot : LitBot, threshold : float) -> Tuple[Optional[Dict], SeatView]:
+    # the changes since view and the view the subscribers have after receiving them,
+    # None when a diff cannot express the change (records dropped by a rewind or a restore)
+    records = inference_records(bot)
+    if len(records) < len(view.records):
+        return None, SeatView.capture(bot)
+
+    changed = np.argwhere(bot.information_matrix != view.information_matrix)
+    prob_matrix = np.nan_to_num(bot.prob_matrix)
+    # probabilities are only sent once they drift threshold away from what subscribers were sent
+    moved = np.abs(prob_matrix - view.prob_matrix) > threshold
+    sent_prob = np.where(moved, prob_matrix, view.prob_matrix)
+    moved_cells = np.argwhere(moved)
+
+    frame = {
+        "type" : FRAME_DIFF,
+        "from_version" : view.version,
+        "version" : bot.state_version,
+        "cells" : cell_list(changed, bot.information_matrix[tuple(changed.T)]),
+        "inferences" : [list(record) for idx, record in enumerate(records) if idx >= len(view.records) or record != view.records[idx]],
+        "prob" : cell_list(moved_cells, np.round(prob_matrix[tuple(moved_cells.T)], 4)),
+    }
+    return frame, SeatView(bot.state_version, bot.information_matrix.copy(), records, sent_prob)
+
+def merge_frames(frames : List[Dict]) -> Dict:
+    # one diff with the effect of applying frames in order, later values win
+    cells, inferences, prob = {}, {}, {}
+    for frame in frames:
+        cells.update((tuple(cell[:4]), cell) for cell in frame["cells"])
+        inferences.update((record[0], record) for record in frame["inferences"])
+        prob.update((tuple(cell[:4]), cell) for cell in frame["prob"])
+    return {
+        "type" : FRAME_DIFF,
+        "from_version" : frames[0]["from_version"],
+        "version" : frames[-1]["version"],
+        "cells" : list(cells.values()),
+        "inferences" : sorted(inferences.values()),
+        "prob" : list(prob.values()),
+    }
+
+class Subscriber:
+    __slots__ = ("key", "version", "wake", "closed")
+
+    def __init__(self, key : Tuple, version : Optional[int]) -> None:
+        self.key = key
+        # the version the client holds, None until it has been sent a snapshot
+        self.version = version
+        self.wake = asyncio.Event()
+        self.closed = False
+
+    def resync(self, version : Optional[int]) -> None:
+        self.version = version
+        self.wake.set()
+
+class SeatFeed:
+    # the diffs of one seat, computed once per publish whatever the number of subscribers
+    def __init__(self, bot : LitBot, threshold : float, history : int) -> None:
+        self.threshold = threshold
+        self.view = SeatView.capture(bot)
+        self.frames = deque(maxlen = history)
+        self.subscribers : Set[Subscriber] = set()
+
+    def publish(self, bot : LitBot) -> bool:
+        # may run off the event loop, the frame goes in before the view that follows it so a
+        # concurrent catch_up sees either both or an older view it can still diff from
+        if bot.state_version == self.view.version and not self.frames_lost(bot):
+            return False
+        frame, view = diff_frame(self.view, bot, self.threshold)
+        if frame is None:
+            # older versions can no longer be diffed against, every subscriber resyncs from the snapshot
+            self.frames.clear()
+        else:
+            self.frames.append(frame)
+        self.view = view
+        return True
+
+    def wake(self) -> None:
+        # on the event loop, asyncio events are not thread safe
+        for subscriber in self.subscribers:
+            subscriber.wake.set()
+
+    def frames_lost(self, bot : LitBot) -> bool:
+        # a restored bot can come back at the version subscribers hold with fewer records
+        return bot.inference_store.size < len(self.view.records)
+
+    def catch_up(self, version : Optional[int]) -> Optional[Dict]:
+        # what a client holding version needs, None when it is up to date
+        view, frames = self.view, list(self.frames)
+        if version == view.version:
+            return None
+        if len(frames) > 0 and frames[-1]["from_version"] == version:
+            return frames[-1]
+        for idx, frame in enumerate(frames):
+            if frame["from_version"] == version:
+                return merge_frames(frames[idx:])
+        return view.snapshot_frame()
+
+class StateFeeds:
+    # websocket subscriptions to the seats of the registry's games; after moves are applied the
+    # server publishes each subscribed seat once, and every subscriber is sent the merge of the
+    # diffs it has not seen yet, so bursts of moves reach slow clients as one frame
+    def __init__(self, threshold : float = 0.05, history : int = 64, coalesce_seconds : float = 0.05) -> None:
+        if threshold < 0 or history <= 0 or coalesce_seconds < 0:
+            raise ValueError("threshold and coalesce_seconds can not be negative, history has to be positive")
+        self.threshold = threshold
+        self.history = history
+        self.coalesce_seconds = coalesce_seconds
+        self.feeds : Dict[Tuple, SeatFeed] = {}
+
+    def __len__(self) -> int:
+        return sum(len(feed.subscribers) for feed in self.feeds.values())
+
+    def subscribe(self, game_id : str, team_id : int, player_id : int, bot : LitBot, since : Optional[int] = None) -> Subscriber:
+        key = (game_id, team_id, player_id)
+        if key not in self.feeds:
+            self.feeds[key] = SeatFeed(bot, self.threshold, self.history)
+        elif self.feeds[key].publish(bot):
+            self.feeds[key].wake()
+        subscriber = Subscriber(key, since)
+        self.feeds[key].subscribers.add(subscriber)
+        subscriber.wake.set()
+        return subscriber
+
+    def unsubscribe(self, subscriber : Subscriber) -> None:
+        feed = self.feeds.get(subscriber.key)
+        if feed is None:
+            return
+        # the feed stays until its game is closed, a client reconnecting with since=<version> gets a diff
+        feed.subscribers.discard(subscriber)
+
+    def publish(self, game_id : str, bots : Dict[Tuple[int, int], LitBot]) -> List[SeatFeed]:
+        # diffs the game's subscribed seats, e.g. on the move pool under the game's lock, and returns
+        # the feeds that moved for wake to notify from the event loop
+        # feeds nobody listens to are left behind, the next subscribe catches them up in one diff
+        published = []
+        for (team_id, player_id), bot in bots.items():
+            feed = self.feeds.get((game_id, team_id, player_id))
+            if feed is not None and len(feed.subscribers) > 0 and feed.publish(bot):
+                published.append(feed)
+        return published
+
+    def wake(self, feeds : List[SeatFeed]) -> None:
+        for feed in feeds:
+            feed.wake()
+
+    def close_game(self, game_id : str) -> None:
+        for key in [key for key in self.feeds if key[0] == game_id]:
+            for subscriber in self.feeds.pop(key).subscribers:
+                subscriber.closed = True
+                subscriber.wake.set()
+
+    def next_frame(self, subscriber : Subscriber) -> Optional[Dict]:
+        if subscriber.closed:
+            return {"type" : FRAME_CLOSED, "version" : subscriber.version}
+        feed = self.feeds.get(subscriber.key)
+        if feed is None:
+            return None
+        frame = feed.catch_up(subscriber.version)
+        if frame is not None:
+            subscriber.version = frame["version"]
+        return frame
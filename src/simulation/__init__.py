@@ -0,0 +1,3 @@
+from ._policies import MovePolicy, RandomPolicy, GreedyPolicy, InformationGainPolicy, TurnView
+from ._simulator import GameSimulator, SimulationResult
+from ._tournament import TournamentConfig, TournamentGame, TournamentReport, TournamentCheckpoint, LegacyBot, run_tournament, play_game
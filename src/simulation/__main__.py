@@ -0,0 +1,52 @@
+import sys
+import json
+import argparse
+from . import TournamentConfig, run_tournament
+from ._tournament import BOTS, POLICIES
+
+def main(argv = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.simulation", description="seeded bot-vs-bot tournament on a process pool")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--processes", type=int, default=0, help="worker processes, 0 or 1 plays the games inline")
+    parser.add_argument("--bots", nargs="+", choices=BOTS, default=["litbot", "litbot"], help="bot per team")
+    parser.add_argument("--policies", nargs="+", choices=sorted(POLICIES), default=["random", "random"], help="move policy per team")
+    parser.add_argument("--players", type=int, default=6)
+    parser.add_argument("--max-moves", type=int, default=2000)
+    parser.add_argument("--accuracy-every", type=int, default=10, help="score the seats' beliefs every this many moves")
+    parser.add_argument("--checkpoint", help="jsonl file results are appended to, an interrupted run resumes from it")
+    parser.add_argument("--progress-every", type=int, default=100, help="print progress to stderr every this many games, 0 for never")
+    args = parser.parse_args(argv)
+
+    config = TournamentConfig(
+        bots = tuple(args.bots),
+        policies = tuple(args.policies),
+        player_count = args.players,
+        max_moves = args.max_moves,
+        accuracy_every = args.accuracy_every
+    )
+
+    def on_result(result, report):
+        if "error" in result:
+            print(f"failed seed {result['seed']} : {result['error']}", file=sys.stderr)
+        played = len(report.results) - report.resumed
+        if args.progress_every > 0 and played % args.progress_every == 0:
+            print(f"{len(report.results)}/{args.games} games", file=sys.stderr)
+
+    try:
+        report = run_tournament(
+            config,
+            range(args.first_seed, args.first_seed + args.games),
+            processes = args.processes,
+            checkpoint_path = args.checkpoint,
+            on_result = on_result
+        )
+    except ValueError as error:
+        print(error, file=sys.stderr)
+        return 2
+
+    print(json.dumps(report.summary(), indent=4))
+    return 0 if report.summary()["failed_games"] == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+import numpy as np
+from abc import ABC, abstractmethod
+from typing import Dict
+from ..prob_model import MoveRecommender
+
+class TurnView:
+    # what the simulator hands a policy: its own bot, its true hand and the legal asks
+    __slots__ = ("team_id", "player_id", "bot", "hand", "legal_asks", "active_sets", "must_call")
+
+    def __init__(self, team_id : int, player_id : int, bot, hand : np.ndarray, legal_asks : np.ndarray, active_sets : np.ndarray, must_call : bool) -> None:
+        self.team_id = team_id
+        self.player_id = player_id
+        self.bot = bot
+        self.hand = hand
+        self.legal_asks = legal_asks
+        self.active_sets = active_sets
+        self.must_call = must_call
+
+class MovePolicy(ABC):
+    # returns an action dict without "result", the simulator resolves it against the deal
+    @abstractmethod
+    def choose_move(self, view : TurnView, rng : np.random.Generator) -> Dict:
+        pass
+
+def known_team_sets(view : TurnView) -> np.ndarray:
+    # sets whose every card the bot knows to be with its own team
+    team_truth = view.bot.truth_matrix[view.team_id].sum(axis=0)
+    return np.flatnonzero((team_truth.sum(axis=1) == view.bot.set_card_count) & view.active_sets)
+
+def call_set_action(view : TurnView, set_id : int) -> Dict:
+    # each card goes to the teammate the bot thinks most likely holds it
+    team_prob = np.nan_to_num(view.bot.prob_matrix[view.team_id, :, set_id])
+    return {
+        "action" : "call_set",
+        "by_team" : view.team_id,
+        "by" : view.player_id,
+        "set_id" : int(set_id),
+        "card_locations" : {card_id : int(player_id) for card_id, player_id in enumerate(team_prob.argmax(axis=0).tolist())},
+    }
+
+def ask_card_action(view : TurnView, to_team : int, to : int, set_id : int, card_id : int) -> Dict:
+    return {
+        "action" : "ask_card",
+        "by_team" : view.team_id,
+        "by" : view.player_id,
+        "to_team" : int(to_team),
+        "to" : int(to),
+        "set_id" : int(set_id),
+        "card_id" : int(card_id),
+    }
+
+class RandomPolicy(MovePolicy):
+    # calls sets the bot is certain of, otherwise asks uniformly among the legal asks
+    def choose_move(self, view : TurnView, rng : np.random.Generator) -> Dict:
+        certain_sets = known_team_sets(view)
+        if len(certain_sets) > 0:
+            return call_set_action(view, certain_sets[0])
+        if view.must_call:
+            return call_set_action(view, np.flatnonzero(view.active_sets)[0])
+        return ask_card_action(view, *view.legal_asks[rng.integers(len(view.legal_asks))])
+
+class GreedyPolicy(MovePolicy):
+    # asks for the card the bot's prob_matrix rates most likely to be with the target
+    def choose_move(self, view : TurnView, rng : np.random.Generator) -> Dict:
+        certain_sets = known_team_sets(view)
+        if len(certain_sets) > 0:
+            return call_set_action(view, certain_sets[0])
+        if view.must_call:
+            return call_set_action(view, np.flatnonzero(view.active_sets)[0])
+
+        prob_matrix = np.nan_to_num(view.bot.prob_matrix)
+        to_team, to, set_id, card_id = view.legal_asks.T
+        hit_prob = prob_matrix[to_team, to, set_id, card_id]
+        best = np.flatnonzero(hit_prob == hit_prob.max())
+        return ask_card_action(view, *view.legal_asks[rng.choice(best)])
+
+class InformationGainPolicy(MovePolicy):
+    # takes the MoveRecommender's best ask that is legal at the table
+    def __init__(self, recommender : MoveRecommender = None) -> None:
+        self.recommender = recommender if recommender is not None else MoveRecommender()
+
+    def choose_move(self, view : TurnView, rng : np.random.Generator) -> Dict:
+        certain_sets = known_team_sets(view)
+        if len(certain_sets) > 0:
+            return call_set_action(view, certain_sets[0])
+        if view.must_call:
+            return call_set_action(view, np.flatnonzero(view.active_sets)[0])
+
+        legal_asks = set(map(tuple, view.legal_asks.tolist()))
+        scores = self.recommender.recommend(view.bot, len(view.legal_asks))
+        for ask in zip(scores.to_team.tolist(), scores.to.tolist(), scores.set_id.tolist(), scores.card_id.tolist()):
+            if ask in legal_asks:
+                return ask_card_action(view, *ask)
+        return ask_card_action(view, *view.legal_asks[rng.integers(len(view.legal_asks))])
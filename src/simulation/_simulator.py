@@ -0,0 +1,196 @@
+import numpy as np
+from typing import Callable, Dict, List, Tuple
+from ..prob_model import LitBot, MatrixTemplate
+from ._policies import MovePolicy, RandomPolicy, TurnView
+
+class SimulationResult:
+    __slots__ = ("seed", "move_count", "sets_won", "winner", "completed")
+
+    def __init__(self, seed : int, move_count : int, sets_won : np.ndarray, completed : bool) -> None:
+        self.seed = seed
+        self.move_count = move_count
+        self.sets_won = sets_won
+        self.completed = completed
+        leaders = np.flatnonzero(sets_won == sets_won.max())
+        self.winner = int(leaders[0]) if len(leaders) == 1 else -1
+
+    def to_dict(self) -> Dict:
+        return {
+            "seed" : self.seed,
+            "move_count" : self.move_count,
+            "sets_won" : self.sets_won.tolist(),
+            "winner" : self.winner,
+            "completed" : self.completed,
+        }
+
+class GameSimulator:
+    # deals a seeded game with initialize_fake_game, asks each seat's policy for a move
+    # and feeds every bot at the table through update_game
+    def __init__(
+        self,
+        seed : int,
+        team_count : int = 2,
+        player_count : int = 6,
+        policies : Dict[int, MovePolicy] = None,
+        bot_factory : Callable = None,
+        max_moves : int = 2000,
+        matrix_template : MatrixTemplate = None,
+        set_count : int = 8,
+        set_card_count : int = 6,
+        card_location_array : np.ndarray = None
+    ) -> None:
+
+        self.seed = seed
+        self.team_count = team_count
+        self.player_count = player_count
+        self.max_moves = max_moves
+        self.policies = policies if policies is not None else {team_id : RandomPolicy() for team_id in range(team_count)}
+        self.rng = np.random.default_rng(seed)
+
+        if bot_factory is None:
+            bot_factory = lambda team_id, player_id: LitBot(
+                team_id = team_id,
+                player_id = player_id,
+                team_count = team_count,
+                player_count = player_count,
+                fake_game_seed = seed,
+                matrix_template = matrix_template,
+                set_count = set_count,
+                set_card_count = set_card_count
+            )
+        self.seats = [(team_id, player_id) for team_id in range(team_count) for player_id in range(player_count//team_count)]
+        self.bots = {seat : bot_factory(*seat) for seat in self.seats}
+
+        self.player_per_team_count = player_count//team_count
+        self.set_count = set_count
+        self.set_card_count = set_card_count
+        # global player index per card, -1 once the card's set is called; bot_factory has to deal the
+        # hands from card_location_array when it is given, else the first seat's fake deal is used
+        if card_location_array is None:
+            card_location_array = self.bots[self.seats[0]]._fake_initial_card_location_array
+        self.card_location_array = np.array(card_location_array)
+
+        self.active_sets = np.ones(self.set_count, dtype=bool)
+        self.sets_won = np.zeros(team_count, dtype=int)
+        self.move_id = 0
+        self.turn = self.seats[int(self.rng.integers(len(self.seats)))]
+
+    def player_index(self, team_id : int, player_id : int) -> int:
+        return team_id*self.player_per_team_count + player_id
+
+    def hand(self, team_id : int, player_id : int) -> np.ndarray:
+        return self.card_location_array == self.player_index(team_id, player_id)
+
+    def card_counts(self) -> np.ndarray:
+        held = self.card_location_array[self.card_location_array >= 0]
+        return np.bincount(held, minlength=self.player_count)
+
+    def legal_asks(self, team_id : int, player_id : int) -> np.ndarray:
+        # a card missing from a set the asker holds, aimed at an opponent who still has cards
+        hand = self.hand(team_id, player_id)
+        counts = self.card_counts()
+        opponents = [
+            (opponent_team, opponent) for opponent_team, opponent in self.seats
+            if opponent_team != team_id and counts[self.player_index(opponent_team, opponent)] > 0
+        ]
+        set_ids, card_ids = np.nonzero(hand.any(axis=1)[:, None] & ~hand & self.active_sets[:, None])
+        if len(opponents) == 0 or len(set_ids) == 0:
+            return np.zeros((0, 4), dtype=int)
+
+        opponents = np.array(opponents)
+        return np.column_stack([
+            np.repeat(opponents[:, 0], len(set_ids)),
+            np.repeat(opponents[:, 1], len(set_ids)),
+            np.tile(set_ids, len(opponents)),
+            np.tile(card_ids, len(opponents)),
+        ])
+
+    def next_turn(self, team_id : int, player_id : int) -> Tuple[int, int]:
+        # a player without cards hands the turn to a teammate with cards, failing that to an opponent
+        counts = self.card_counts()
+        if counts[self.player_index(team_id, player_id)] > 0:
+            return team_id, player_id
+        for seat in sorted(self.seats, key=lambda seat: seat[0] != team_id):
+            if counts[self.player_index(*seat)] > 0:
+                return seat
+        return None
+
+    @property
+    def is_over(self) -> bool:
+        return not self.active_sets.any() or self.move_id >= self.max_moves
+
+    def resolve(self, action_dict : Dict) -> Dict:
+        team_id, player_id = action_dict["by_team"], action_dict["by"]
+        set_id = action_dict["set_id"]
+
+        if action_dict["action"] == "ask_card":
+            to_team, to, card_id = action_dict["to_team"], action_dict["to"], action_dict["card_id"]
+            if to_team == team_id or self.card_location_array[set_id, card_id] == self.player_index(team_id, player_id):
+                raise ValueError(f"illegal ask: {action_dict}")
+            result = int(self.card_location_array[set_id, card_id] == self.player_index(to_team, to))
+            if result == 1:
+                self.card_location_array[set_id, card_id] = self.player_index(team_id, player_id)
+            else:
+                self.turn = (to_team, to)
+            return {**action_dict, "result" : result}
+
+        if action_dict["action"] == "call_set":
+            if not self.active_sets[set_id]:
+                raise ValueError(f"illegal call, set {set_id} is already called: {action_dict}")
+            # cards are laid down on a call, so bots see the true locations of the calling team's cards
+            # whatever was claimed; a set the team does not hold entirely is lost like a wrong claim
+            locations = self.card_location_array[set_id]
+            held = locations//self.player_per_team_count == team_id
+            true_locations = (locations%self.player_per_team_count).tolist()
+            claimed_locations = [int(action_dict["card_locations"].get(card_id, -1)) for card_id in range(self.set_card_count)]
+            result = int(held.all() and claimed_locations == true_locations)
+
+            self.sets_won[team_id if result == 1 else (team_id + 1)%self.team_count] += 1
+            self.active_sets[set_id] = False
+            self.card_location_array[set_id] = -1
+            card_locations = {card_id : true_locations[card_id] for card_id in np.flatnonzero(held).tolist()}
+            return {**action_dict, "card_locations" : card_locations, "result" : result}
+
+        raise ValueError(f"unknown action: {action_dict['action']}")
+
+    def broadcast(self, game_action_dict : Dict) -> None:
+        for bot in self.bots.values():
+            bot.update_game(game_action_dict)
+
+    def step(self) -> Dict:
+        self.turn = self.next_turn(*self.turn)
+        if self.turn is None:
+            self.active_sets[:] = False
+            return None
+
+        team_id, player_id = self.turn
+        legal_asks = self.legal_asks(team_id, player_id)
+        view = TurnView(
+            team_id = team_id,
+            player_id = player_id,
+            bot = self.bots[self.turn],
+            hand = self.hand(team_id, player_id),
+            legal_asks = legal_asks,
+            active_sets = self.active_sets,
+            must_call = len(legal_asks) == 0
+        )
+        action_dict = self.resolve(self.policies[team_id].choose_move(view, self.rng))
+
+        game_action_dict = {self.move_id : action_dict}
+        self.broadcast(game_action_dict)
+        self.move_id += 1
+        return game_action_dict
+
+    def run(self) -> SimulationResult:
+        while not self.is_over:
+            self.step()
+        return SimulationResult(self.seed, self.move_id, self.sets_won, not self.active_sets.any())
+
+    def play(self) -> List[Dict]:
+        # runs the game and returns the moves as update_game inputs
+        moves = []
+        while not self.is_over:
+            game_action_dict = self.step()
+            if game_action_dict is not None:
+                moves.append(game_action_dict)
+        return moves
@@ -0,0 +1,304 @@
+import os
+import json
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, as_completed, wait
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Tuple
+from ..prob_model import LitBot, MatrixTemplate, StatisticsConfig
+from ._policies import RandomPolicy, GreedyPolicy, InformationGainPolicy
+from ._simulator import GameSimulator
+
+POLICIES = {
+    "random" : RandomPolicy,
+    "greedy" : GreedyPolicy,
+    "information_gain" : InformationGainPolicy,
+}
+BOTS = ("litbot", "legacy")
+
+class TournamentConfig(NamedTuple):
+    # one entry of bots and policies per team
+    bots : Tuple[str, ...] = ("litbot", "litbot")
+    policies : Tuple[str, ...] = ("random", "random")
+    player_count : int = 6
+    max_moves : int = 2000
+    accuracy_every : int = 10
+    set_count : int = 8
+    set_card_count : int = 6
+
+    @property
+    def team_count(self) -> int:
+        return len(self.bots)
+
+    def validate(self) -> None:
+        if len(self.policies) != len(self.bots):
+            raise ValueError(f"one policy per team is needed: {len(self.bots)} bots, {len(self.policies)} policies")
+        for bot, policy in zip(self.bots, self.policies):
+            if bot not in BOTS:
+                raise ValueError(f"unknown bot {bot}, expected one of {BOTS}")
+            if policy not in POLICIES:
+                raise ValueError(f"unknown policy {policy}, expected one of {tuple(POLICIES)}")
+            if bot == "legacy" and policy == "information_gain":
+                raise ValueError("the legacy bot has no move recommender, use the random or greedy policy")
+        if self.accuracy_every <= 0:
+            raise ValueError("accuracy_every has to be positive")
+
+    def to_dict(self) -> Dict:
+        return {**self._asdict(), "bots" : list(self.bots), "policies" : list(self.policies)}
+
+class LegacyBot:
+    # the legacy litbot.LitBot behind the attributes the policies and the accuracy check read;
+    # it only learns from asks, the adapter lays down called sets itself
+    def __init__(self, team_id : int, player_id : int, config : TournamentConfig, hand : np.ndarray) -> None:
+        # the legacy module needs pandas, it is only imported when a legacy seat is played
+        from ..prob_model.litbot import LitBot as LegacyLitBot
+        self.bot = LegacyLitBot(
+            None, team_id, player_id, config.player_count, game_state_array = hand,
+            team_count = config.team_count, set_count = config.set_count, set_card_count = config.set_card_count
+        )
+        self.set_card_count = config.set_card_count
+
+    @property
+    def truth_matrix(self) -> np.ndarray:
+        return np.where(self.bot.truth_matrix == 1, 1, 0)
+
+    @property
+    def prob_matrix(self) -> np.ndarray:
+        return self.bot.prob_matrix[0]
+
+    def update_game(self, game_action_dict : Dict) -> None:
+        # a laid down set has no unknown cell left, the legacy prob_matrix divides by its zero columns
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for action_dict in game_action_dict.values():
+                if action_dict["action"] == "ask_card":
+                    self.bot.update_game(action_dict)
+                elif action_dict["action"] == "call_set":
+                    self.lay_down(action_dict)
+
+    def lay_down(self, action_dict : Dict) -> None:
+        # the called set's cards leave the game: nobody holds them any more and the revealed holders,
+        # the calling team's, hold that many fewer cards; the counts may then complete other players
+        bot, set_id = self.bot, action_dict["set_id"]
+        holders = [int(player_id) for player_id in action_dict["card_locations"].values()]
+        bot.player_card_counter[action_dict["by_team"]] -= np.bincount(holders, minlength=bot.player_per_team_count)
+        bot.truth_matrix[:, :, set_id] = 0
+        bot.inference_matrix[:, :, set_id] = 0
+        bot.player_set_card_counter[:, :, set_id] = 0
+        bot.active_cards_matrix[set_id] = 0
+        bot.active_sets_matrix[set_id] = 0
+        bot.check_count_completeness_inference()
+        bot.truth_matrix_completeness_inference()
+        bot.prob_matrix = bot.update_prob_matrix(bot.truth_matrix)
+
+class TournamentGame(GameSimulator):
+    # a GameSimulator with one bot kind and policy per team, scoring every seat's beliefs
+    # against the true card locations every accuracy_every moves
+    def __init__(self, seed : int, config : TournamentConfig, matrix_template : MatrixTemplate = None) -> None:
+        self.config = config
+        self.accuracy = np.zeros(config.team_count)
+        self.known_errors = np.zeros(config.team_count, dtype=int)
+        self.samples = np.zeros(config.team_count, dtype=int)
+        dealer = LitBot(
+            0, 0, config.team_count, config.player_count, fake_game_seed = seed, matrix_template = matrix_template,
+            statistics_config = StatisticsConfig.parse("off"), set_count = config.set_count, set_card_count = config.set_card_count
+        )
+        hands = dealer._fake_initial_game_state_array
+
+        def bot_factory(team_id : int, player_id : int):
+            if config.bots[team_id] == "legacy":
+                return LegacyBot(team_id, player_id, config, hands[team_id, player_id])
+            return LitBot(
+                team_id, player_id, config.team_count, config.player_count, initial_game_state_array = hands[team_id, player_id],
+                matrix_template = matrix_template, statistics_config = StatisticsConfig.parse("off"),
+                set_count = config.set_count, set_card_count = config.set_card_count
+            )
+
+        super().__init__(
+            seed,
+            team_count = config.team_count,
+            player_count = config.player_count,
+            policies = {team_id : POLICIES[policy]() for team_id, policy in enumerate(config.policies)},
+            bot_factory = bot_factory,
+            max_moves = config.max_moves,
+            set_count = config.set_count,
+            set_card_count = config.set_card_count,
+            card_location_array = dealer._fake_initial_card_location_array
+        )
+
+    def step(self) -> Dict:
+        game_action_dict = super().step()
+        if game_action_dict is not None and self.move_id % self.config.accuracy_every == 0:
+            self.score_beliefs()
+        return game_action_dict
+
+    def score_beliefs(self) -> None:
+        # accuracy: share of the cards in play outside the seat's hand whose most likely holder is the true one
+        # known_errors: cards the seat's truth_matrix places with the wrong player
+        in_play = self.card_location_array >= 0
+        for (team_id, player_id), bot in self.bots.items():
+            unknown = in_play & ~self.hand(team_id, player_id)
+            if not unknown.any():
+                continue
+            prob_matrix = np.nan_to_num(bot.prob_matrix).reshape(self.player_count, self.set_count, self.set_card_count)
+            holders = prob_matrix.argmax(axis=0)
+            truth = np.asarray(bot.truth_matrix).reshape(self.player_count, self.set_count, self.set_card_count) == 1
+            self.accuracy[team_id] += (holders == self.card_location_array)[unknown].mean()
+            self.known_errors[team_id] += int((truth & (np.arange(self.player_count)[:, None, None] != self.card_location_array) & in_play).sum())
+            self.samples[team_id] += 1
+
+def play_game(config : TournamentConfig, seed : int) -> Dict:
+    # runs in the pool's workers, only this summary travels back to the parent
+    start = time.perf_counter()
+    try:
+        game = TournamentGame(seed, config)
+        result = game.run()
+    except Exception as error:
+        return {"seed" : seed, "error" : f"{type(error).__name__}: {error}", "seconds" : round(time.perf_counter() - start, 4)}
+    return {
+        **result.to_dict(),
+        "accuracy" : (game.accuracy/np.maximum(game.samples, 1)).round(4).tolist(),
+        "known_errors" : game.known_errors.tolist(),
+        "seconds" : round(time.perf_counter() - start, 4),
+    }
+
+class TournamentCheckpoint:
+    # a jsonl file, the config on the first line and one finished game per line after it;
+    # a line cut short by an interrupted run is ignored and its game is played again, and so
+    # is a game that failed, failures are reported but never checkpointed
+    def __init__(self, path : str, config : TournamentConfig) -> None:
+        self.path = path
+        self.results : Dict[int, Dict] = {}
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            self.load(config)
+        else:
+            self.write_header(config)
+        self.file = open(path, "a")
+
+    def write_header(self, config : TournamentConfig) -> None:
+        with open(self.path, "w") as f:
+            f.write(json.dumps({"config" : config.to_dict()}) + "\n")
+
+    def load(self, config : TournamentConfig) -> None:
+        with open(self.path) as f:
+            lines = f.read().split("\n")
+        try:
+            header = json.loads(lines[0])
+        except json.JSONDecodeError:
+            # interrupted while writing the header, no game was recorded yet
+            self.write_header(config)
+            return
+        if header.get("config") != config.to_dict():
+            raise ValueError(f"checkpoint {self.path} was written for another config: {header.get('config')}")
+        for line in lines[1:]:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if "error" not in result:
+                self.results[result["seed"]] = result
+        if not lines[-1] == "":
+            # drop the torn tail so appended results start on their own line
+            with open(self.path, "w") as f:
+                f.write("\n".join([lines[0]] + [json.dumps(result) for result in self.results.values()]) + "\n")
+
+    def record(self, result : Dict) -> None:
+        if "error" in result:
+            return
+        self.results[result["seed"]] = result
+        self.file.write(json.dumps(result) + "\n")
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
+
+class TournamentReport:
+    def __init__(self, team_count : int) -> None:
+        self.team_count = team_count
+        self.results : List[Dict] = []
+        self.resumed = 0
+        self.seconds = 0.0
+
+    def add(self, result : Dict) -> None:
+        self.results.append(result)
+
+    @property
+    def games(self) -> List[Dict]:
+        return [result for result in self.results if "error" not in result]
+
+    def summary(self) -> Dict:
+        games = self.games
+        played = len(self.results) - self.resumed
+        summary = {
+            "games" : len(games),
+            "failed_games" : len(self.results) - len(games),
+            "resumed_games" : self.resumed,
+            "seconds" : round(self.seconds, 4),
+            "games_per_second" : round(played/self.seconds, 2) if self.seconds > 0 else 0.0,
+        }
+        if len(games) == 0:
+            return summary
+        winners = np.array([game["winner"] for game in games])
+        move_counts = np.array([game["move_count"] for game in self.results[self.resumed:] if "error" not in game] or [0])
+        accuracy = np.array([game["accuracy"] for game in games])
+        return {
+            **summary,
+            "moves_per_second" : round(move_counts.sum()/self.seconds, 2) if self.seconds > 0 else 0.0,
+            "win_rate" : [round(float((winners == team_id).mean()), 4) for team_id in range(self.team_count)],
+            "draw_rate" : round(float((winners == -1).mean()), 4),
+            "completed_rate" : round(float(np.mean([game["completed"] for game in games])), 4),
+            "mean_moves" : round(float(np.mean([game["move_count"] for game in games])), 2),
+            "p50_moves" : float(np.percentile([game["move_count"] for game in games], 50)),
+            "accuracy" : accuracy.mean(axis=0).round(4).tolist(),
+            "known_errors" : np.sum([game["known_errors"] for game in games], axis=0).tolist(),
+        }
+
+def run_tournament(
+    config : TournamentConfig,
+    seeds : Iterable[int],
+    processes : int = 0,
+    checkpoint_path : str = None,
+    on_result = None
+) -> TournamentReport:
+    # games stream back as they finish, at most 4 per worker are in flight so huge seed ranges stay cheap
+    config.validate()
+    report = TournamentReport(config.team_count)
+    checkpoint = TournamentCheckpoint(checkpoint_path, config) if checkpoint_path is not None else None
+    pending_seeds = list(seeds)
+    if checkpoint is not None:
+        done = [seed for seed in pending_seeds if seed in checkpoint.results]
+        for seed in done:
+            report.add(checkpoint.results[seed])
+        report.resumed = len(done)
+        pending_seeds = [seed for seed in pending_seeds if seed not in checkpoint.results]
+
+    def finish(result : Dict) -> None:
+        report.add(result)
+        if checkpoint is not None:
+            checkpoint.record(result)
+        if on_result is not None:
+            on_result(result, report)
+
+    start = time.perf_counter()
+    try:
+        if processes <= 1:
+            for seed in pending_seeds:
+                finish(play_game(config, seed))
+        else:
+            with ProcessPoolExecutor(processes) as executor:
+                for result in stream_results(executor, config, iter(pending_seeds), 4*processes):
+                    finish(result)
+    finally:
+        report.seconds = time.perf_counter() - start
+        if checkpoint is not None:
+            checkpoint.close()
+    return report
+
+def stream_results(executor : ProcessPoolExecutor, config : TournamentConfig, seeds : Iterator[int], window : int) -> Iterator[Dict]:
+    in_flight = set()
+    for seed in seeds:
+        in_flight.add(executor.submit(play_game, config, seed))
+        if len(in_flight) >= window:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+    for future in as_completed(in_flight):
+        yield future.result()
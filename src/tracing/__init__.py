@@ -0,0 +1,8 @@
+from ._events import (
+    DEBUG, INFO, OFF, LEVELS,
+    HardUpdateEvent, CompletenessDeductionEvent, InferenceDetectedEvent,
+    InferenceConflictEvent, InferenceOutOfDateEvent, InferenceRepeatEvent
+)
+from ._tracer import Tracer, NULL_TRACER, StreamSink, JsonLinesSink
+from ._metrics import PipelineMetrics, Histogram, NULL_METRICS, UPDATE_STAGES
+from ._profiler import MoveProfiler
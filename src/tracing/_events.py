@@ -0,0 +1,76 @@
+from typing import Any, NamedTuple
+
+DEBUG = 10
+INFO = 20
+OFF = 100
+
+LEVELS = {
+    "debug" : DEBUG,
+    "info" : INFO,
+    "off" : OFF,
+}
+
+class HardUpdateEvent(NamedTuple):
+    level = DEBUG
+    move_id : Any
+    kind : str
+    set_id : int
+    card_id : int
+    result : int
+
+    def message(self) -> str:
+        return f"{self.move_id} : updated {self.kind} for {self.set_id, self.card_id} for result {self.result} : hard"
+
+class CompletenessDeductionEvent(NamedTuple):
+    # rule is "card", "player" or "set", the unused coordinates are None
+    level = INFO
+    move_id : Any
+    rule : str
+    team_id : int
+    player_id : int
+    set_id : int
+    card_id : int
+
+    def message(self) -> str:
+        if self.rule == "card":
+            return f"{self.move_id} : epsilon to 1 completeness for {self.set_id, self.card_id} : hard"
+        if self.rule == "player":
+            return f"{self.move_id} : player card count completeness for {self.team_id, self.player_id} : hard"
+        return f"{self.move_id} : set card count completeness for {self.set_id} : hard"
+
+class InferenceDetectedEvent(NamedTuple):
+    level = INFO
+    move_id : Any
+    team_id : int
+    player_id : int
+    set_id : int
+    card_id : int
+
+    def message(self) -> str:
+        return f"{self.move_id} : new inference detected for {self.set_id, self.card_id} for player {self.team_id, self.player_id} : inference"
+
+class InferenceConflictEvent(NamedTuple):
+    # source is "information_matrix" when hard knowledge contradicts it, "inference" when a newer inference does
+    level = INFO
+    move_id : Any
+    inference_move_id : Any
+    source : str
+
+    def message(self) -> str:
+        return f"{self.move_id} : conflict inference detected with {self.source} {self.inference_move_id}"
+
+class InferenceOutOfDateEvent(NamedTuple):
+    level = INFO
+    move_id : Any
+    inference_move_id : Any
+
+    def message(self) -> str:
+        return f"{self.move_id} : out of date inference detected with info matrix {self.inference_move_id}"
+
+class InferenceRepeatEvent(NamedTuple):
+    level = DEBUG
+    move_id : Any
+    inference_move_id : Any
+
+    def message(self) -> str:
+        return f"{self.move_id} : new inference detected is already captured by {self.inference_move_id} : inference"
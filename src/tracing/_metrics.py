@@ -0,0 +1,95 @@
+import bisect
+import threading
+from typing import Dict, Iterable, List, Tuple
+
+UPDATE_STAGES = ("hard_update", "completeness", "inference", "active_arrays", "statistics")
+
+# seconds, a LitBot move is tens to hundreds of microseconds per stage
+LATENCY_BUCKETS = (5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2)
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets : Tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.buckets = buckets
+        # the last count is the +Inf bucket
+        self.counts = [0]*(len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value : float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+class PipelineMetrics:
+    # process wide counters and per-stage latency histograms for LitBot.update_game
+    # bots check metrics.enabled before reading the clock, so a disabled instance costs one attribute read per stage
+    def __init__(self, enabled : bool = True) -> None:
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.reset()
+
+    def set_enabled(self, enabled : bool) -> None:
+        self.enabled = enabled
+
+    def reset(self) -> None:
+        self.stages = {stage : Histogram() for stage in UPDATE_STAGES}
+        self.moves = Histogram()
+        self.moves_processed = 0
+        self.inferences = {"detected" : 0, "conflict" : 0, "out_of_date" : 0, "repeat" : 0}
+
+    def observe_move(self, stamps : List[float]) -> None:
+        # stamps are perf_counter readings before the first stage and after every stage
+        with self.lock:
+            for stage, start, end in zip(UPDATE_STAGES, stamps, stamps[1:]):
+                self.stages[stage].observe(end - start)
+            self.moves.observe(stamps[-1] - stamps[0])
+            self.moves_processed += 1
+
+    def count_inferences(self, detected : int, conflict : int, out_of_date : int, repeat : int) -> None:
+        with self.lock:
+            self.inferences["detected"] += detected
+            self.inferences["conflict"] += conflict
+            self.inferences["out_of_date"] += out_of_date
+            self.inferences["repeat"] += repeat
+
+    def render(self, gauges : Dict[str, float] = None) -> str:
+        # prometheus text exposition format 0.0.4
+        lines = []
+        with self.lock:
+            lines += histogram_lines("litbot_update_stage_seconds", "update_game latency per stage", [
+                ({"stage" : stage}, histogram) for stage, histogram in self.stages.items()
+            ])
+            lines += histogram_lines("litbot_update_seconds", "update_game latency", [({}, self.moves)])
+            lines += [
+                "# HELP litbot_moves_processed_total moves applied to a bot",
+                "# TYPE litbot_moves_processed_total counter",
+                f"litbot_moves_processed_total {self.moves_processed}",
+                "# HELP litbot_inferences_total inference records by what happened to them",
+                "# TYPE litbot_inferences_total counter",
+            ]
+            lines += [f'litbot_inferences_total{{event="{event}"}} {count}' for event, count in self.inferences.items()]
+        for name, value in (gauges or {}).items():
+            lines += [f"# TYPE {name} gauge", f"{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+def label_text(labels : Dict[str, str]) -> str:
+    return ",".join(f'{key}="{value}"' for key, value in labels.items())
+
+def histogram_lines(name : str, help_text : str, series : Iterable[Tuple[Dict[str, str], Histogram]]) -> List[str]:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for labels, histogram in series:
+        prefix = label_text(labels) + "," if labels else ""
+        cumulative = 0
+        for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f'{name}_bucket{{{prefix}le="{le}"}} {cumulative}')
+        suffix = "{" + label_text(labels) + "}" if labels else ""
+        lines.append(f"{name}_sum{suffix} {histogram.total}")
+        lines.append(f"{name}_count{suffix} {histogram.count}")
+    return lines
+
+# shared default for bots created without metrics, never enable it
+NULL_METRICS = PipelineMetrics(enabled = False)
@@ -0,0 +1,63 @@
+import io
+import time
+import pstats
+import cProfile
+import tracemalloc
+from typing import Dict, Optional
+
+class MoveProfiler:
+    # cProfile, and optionally tracemalloc, over the next `moves` moves of one game
+    # start/stop bracket each move on the thread applying it, cProfile only sees that thread;
+    # tracemalloc is process wide, allocations of other games running meanwhile are included
+    def __init__(self, moves : int, memory : bool = False, top : int = 30) -> None:
+        if moves <= 0:
+            raise ValueError("moves has to be positive")
+        self.moves = moves
+        self.memory = memory
+        self.top = top
+        self.profile = cProfile.Profile()
+        self.profiled = 0
+        self.seconds = 0.0
+        self.started_tracemalloc = False
+        self.memory_snapshot : Optional[tracemalloc.Snapshot] = None
+        self.peak_bytes = 0
+        self.start_time = None
+
+    @property
+    def done(self) -> bool:
+        return self.profiled >= self.moves
+
+    def start(self) -> None:
+        if self.memory and self.profiled == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracemalloc = True
+        self.start_time = time.perf_counter()
+        self.profile.enable()
+
+    def stop(self) -> None:
+        self.profile.disable()
+        self.seconds += time.perf_counter() - self.start_time
+        self.profiled += 1
+        if self.done and self.memory and tracemalloc.is_tracing():
+            self.memory_snapshot = tracemalloc.take_snapshot()
+            self.peak_bytes = tracemalloc.get_traced_memory()[1]
+            if self.started_tracemalloc:
+                tracemalloc.stop()
+
+    def report(self) -> Dict:
+        report = {
+            "status" : "done" if self.done else "pending",
+            "moves" : self.moves,
+            "profiled" : self.profiled,
+            "seconds" : self.seconds,
+        }
+        if self.profiled > 0:
+            stream = io.StringIO()
+            pstats.Stats(self.profile, stream=stream).sort_stats("cumulative").print_stats(self.top)
+            report["cprofile"] = stream.getvalue()
+        if self.memory_snapshot is not None:
+            report["tracemalloc"] = {
+                "peak_bytes" : self.peak_bytes,
+                "top" : [str(stat) for stat in self.memory_snapshot.statistics("lineno")[:self.top]],
+            }
+        return report
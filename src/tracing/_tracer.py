@@ -0,0 +1,64 @@
+import sys
+import json
+from collections import deque
+from typing import Callable, Iterable, List
+from ._events import DEBUG, INFO, OFF
+
+class Tracer:
+    # call sites check tracer.debug / tracer.info before building an event, so a disabled tracer costs one attribute read
+    def __init__(
+        self,
+        level : int = INFO,
+        ring_size : int = 1024,
+        sinks : Iterable[Callable] = (),
+        game_id : str = None
+    ) -> None:
+
+        self.game_id = game_id
+        self.ring = deque(maxlen=ring_size)
+        self.sinks = list(sinks)
+        self.set_level(level)
+
+    def set_level(self, level : int) -> None:
+        self.level = level
+        self.debug = level <= DEBUG
+        self.info = level <= INFO
+
+    def add_sink(self, sink : Callable) -> None:
+        self.sinks.append(sink)
+
+    def emit(self, event) -> None:
+        if event.level < self.level:
+            return
+        self.ring.append(event)
+        for sink in self.sinks:
+            sink(event)
+
+    def events(self, event_type : type = None, move_id = None) -> List:
+        return [
+            event for event in self.ring
+            if (event_type is None or isinstance(event, event_type)) and (move_id is None or event.move_id == move_id)
+        ]
+
+    def clear(self) -> None:
+        self.ring.clear()
+
+# shared default for bots created without a tracer, never enable it
+NULL_TRACER = Tracer(level = OFF, ring_size = 0)
+
+class StreamSink:
+    # the human readable lines the bots used to print
+    def __init__(self, stream = None) -> None:
+        self.stream = stream
+
+    def __call__(self, event) -> None:
+        print(event.message(), file=self.stream if self.stream is not None else sys.stdout)
+
+class JsonLinesSink:
+    def __init__(self, stream, game_id : str = None) -> None:
+        self.stream = stream
+        self.game_id = game_id
+
+    def __call__(self, event) -> None:
+        record = {"event" : type(event).__name__, "game_id" : self.game_id, **event._asdict()}
+        self.stream.write(json.dumps(record, default=str) + "\n")
@@ -0,0 +1 @@
+from ._card_codec import CardCodec
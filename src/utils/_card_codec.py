@@ -0,0 +1,45 @@
+import os
+import json
+from typing import Dict, Tuple
+
+CARD_ENCODINGS_PATH = os.path.join(os.path.dirname(__file__), "card_encodings.json")
+
+class CardCodec:
+    # O(1) lookups between (rank, suit) names and (set_id, card_id) built from card_encodings.json
+    def __init__(self, encodings : Dict = None) -> None:
+
+        if encodings is None:
+            with open(CARD_ENCODINGS_PATH) as f:
+                encodings = json.load(f)
+
+        self.set_names = {int(set_id) : name for set_id, name in encodings["set_id"].items()}
+        self.set_ids = {name : set_id for set_id, name in self.set_names.items()}
+
+        self.card_names = {}
+        self.card_ids = {}
+        for set_id, name in self.set_names.items():
+            set_id_type = encodings["set_id_type"][str(set_id)]
+            suit = name[len(set_id_type) + 1:]
+            for card_id, rank in encodings["card_id"][set_id_type].items():
+                self.card_names[(set_id, int(card_id))] = (rank, suit)
+                self.card_ids[(rank, suit)] = (set_id, int(card_id))
+
+    @property
+    def set_count(self) -> int:
+        return len(self.set_names)
+
+    @property
+    def set_card_count(self) -> int:
+        return len(self.card_ids)//len(self.set_names)
+
+    def encode(self, rank : str, suit : str) -> Tuple[int, int]:
+        try:
+            return self.card_ids[(rank.lower(), suit.lower())]
+        except KeyError:
+            raise ValueError(f"unknown card: {rank} of {suit}")
+
+    def encode_card(self, card_dict : Dict) -> Tuple[int, int]:
+        return self.encode(card_dict["rank"], card_dict["suit"])
+
+    def decode(self, set_id : int, card_id : int) -> Tuple[str, str]:
+        return self.card_names[(set_id, card_id)]
@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+from src.prob_model import LitBot, BitboardBot, BitboardState, StatisticsConfig
+from src.simulation import GameSimulator
+
+# team_count, player_count, set_count, set_card_count, seed; the last two decks do not fit a uint64 mask
+CONFIGS = [(2, 6, 8, 6, 0), (2, 8, 8, 6, 1), (2, 8, 12, 6, 2), (2, 4, 9, 8, 3)]
+
+@pytest.mark.parametrize("team_count, player_count, set_count, set_card_count, seed", CONFIGS)
+def test_bitboard_matches_litbot_hard_knowledge(team_count, player_count, set_count, set_card_count, seed):
+    simulator = GameSimulator(seed, team_count = team_count, player_count = player_count, set_count = set_count, set_card_count = set_card_count)
+    moves = simulator.play()
+    for seat in simulator.seats:
+        config = dict(team_count = team_count, player_count = player_count, fake_game_seed = seed, set_count = set_count, set_card_count = set_card_count)
+        bot = LitBot(*seat, statistics_config = StatisticsConfig.parse("off"), **config)
+        bitboard = BitboardBot(*seat, **config)
+        np.testing.assert_array_equal(bitboard.information_matrix, bot.information_matrix)
+        for move_idx, game_action_dict in enumerate(moves):
+            bot.update_game(game_action_dict)
+            bitboard.update_game(game_action_dict)
+            np.testing.assert_array_equal(bitboard.information_matrix, bot.information_matrix, err_msg=f"seat {seat} after move {move_idx}")
+            np.testing.assert_array_equal(bitboard.player_card_count, bot.player_card_count)
+
+        state = BitboardState.from_information_matrix(bot.information_matrix, bot.player_card_count)
+        assert state.has == bitboard.state.has
+        assert state.cannot == bitboard.state.cannot
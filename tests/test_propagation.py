@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+from src.prob_model import LitBot, StatisticsConfig
+from src.prob_model._batched_bot import completeness_pass
+from src.simulation import GameSimulator
+
+# team_count, player_count, seed
+CONFIGS = [(2, 4, 0), (2, 6, 1), (2, 6, 2), (2, 8, 3), (3, 6, 4)]
+
+def full_fixpoint(bot : LitBot) -> np.ndarray:
+    # every rule over every card, player and set, repeated until a pass changes nothing
+    information_matrix = bot.information_matrix[None].copy()
+    active = np.ones(1, dtype=bool)
+    while active.any():
+        active = completeness_pass(information_matrix, bot.player_card_count, bot.set_card_count, LitBot.EPSILON, active)
+    return information_matrix[0]
+
+@pytest.mark.parametrize("team_count, player_count, seed", CONFIGS)
+def test_propagator_reaches_the_full_pass_fixpoint(team_count, player_count, seed):
+    simulator = GameSimulator(seed, team_count = team_count, player_count = player_count)
+    moves = simulator.play()
+    for seat in simulator.seats:
+        bot = LitBot(*seat, team_count, player_count, fake_game_seed = seed, statistics_config = StatisticsConfig.parse("off"))
+        for move_idx, game_action_dict in enumerate(moves):
+            bot.update_game(game_action_dict)
+            np.testing.assert_array_equal(bot.information_matrix, full_fixpoint(bot), err_msg=f"seat {seat} after move {move_idx}")
+            assert bot.propagator.is_clean
+
+        # a propagator told everything is dirty finds nothing left to deduce
+        bot.propagator.mark_all()
+        assert bot.completeness_check_hard(None) == 0
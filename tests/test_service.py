@@ -0,0 +1,81 @@
+import asyncio
+import main
+from src.persistence import MemoryBackend, WriteBehind, dump_game, game_version
+from src.service import GameRegistry, apply_moves
+from src.simulation import GameSimulator
+
+class SlowReadBackend(MemoryBackend):
+    # the n-th read waits read_delays[n] seconds
+    def __init__(self, read_delays) -> None:
+        super().__init__()
+        self.read_delays = list(read_delays)
+
+    async def read(self, game_id):
+        if len(self.read_delays) > 0:
+            await asyncio.sleep(self.read_delays.pop(0))
+        return await super().read(game_id)
+
+def test_slow_restore_does_not_overwrite_a_live_game(monkeypatch):
+    game_id = "slow-restore"
+    simulator = GameSimulator(0, player_count = 4)
+    team_id, player_id = simulator.seats[0]
+    moves = [(move_id, action_dict) for game_action_dict in simulator.play()[:10] for move_id, action_dict in game_action_dict.items()]
+
+    main.registry.create_bot(game_id, team_id, player_id, 2, 4, fake_game_seed = 0)
+    backend = SlowReadBackend([0.0, 0.2])
+    backend.snapshots[game_id] = dump_game(main.registry.get_game(game_id).bots)
+    main.registry.remove_game(game_id)
+    monkeypatch.setattr(main, "write_behind", WriteBehind(backend))
+
+    async def restore_and_play():
+        # the fast reader restores the game and applies moves while the slow reader is still reading
+        await main.get_bot_or_404(game_id, team_id, player_id)
+        async with main.registry.lock(game_id):
+            apply_moves(main.registry.get_game(game_id).move_targets(), moves)
+
+    async def run():
+        await asyncio.gather(restore_and_play(), main.get_bot_or_404(game_id, team_id, player_id))
+
+    try:
+        asyncio.run(run())
+        assert game_version(main.registry.get_game(game_id).bots) == len(moves)
+    finally:
+        main.registry.remove_game(game_id)
+
+def test_registry_bytes_follow_the_moves():
+    simulator = GameSimulator(0, player_count = 4)
+    moves = [(move_id, action_dict) for game_action_dict in simulator.play() for move_id, action_dict in game_action_dict.items()]
+    registry = GameRegistry()
+    for game_id in ("idle", "played"):
+        for seat in simulator.seats:
+            registry.create_bot(game_id, *seat, 2, 4, fake_game_seed = 0)
+    created = registry.get_game("played").nbytes
+
+    entry = registry.get_game("played")
+    apply_moves(entry.move_targets(), moves)
+    registry.refresh_nbytes("played")
+    assert entry.nbytes == sum(bot.nbytes for bot in entry.bots.values()) > created
+    assert registry.nbytes == entry.nbytes + registry.get_game("idle").nbytes
+
+    # the game that grew stays, the other one is evicted to get back under the cap
+    registry.max_bytes = entry.nbytes
+    assert registry.refresh_nbytes("played") == ["idle"]
+    assert registry.nbytes == entry.nbytes
+
+def test_idle_games_expire_without_new_games(monkeypatch):
+    now = [0.0]
+    registry = GameRegistry(ttl_seconds = 10, clock = lambda: now[0], on_evict = main.forget_game)
+    registry.create_bot("idle", 0, 0, 2, 4, fake_game_seed = 0)
+    monkeypatch.setattr(main, "registry", registry)
+    monkeypatch.setattr(main, "evict_interval", 0.01)
+
+    async def run():
+        sweeper = asyncio.create_task(main.sweep_expired_games())
+        await asyncio.sleep(0.05)
+        assert "idle" in registry
+        now[0] = 11.0
+        await asyncio.sleep(0.05)
+        sweeper.cancel()
+
+    asyncio.run(run())
+    assert "idle" not in registry
@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+from src.prob_model import LitBot, LitTable, StatisticsConfig
+from src.simulation import GameSimulator
+from src.persistence import dump_game, load_game
+
+# team_count, player_count, seed
+CONFIGS = [(2, 4, 0), (2, 4, 1), (2, 6, 2), (2, 6, 3), (2, 8, 4), (3, 6, 5)]
+
+def simulated_game(team_count : int, player_count : int, seed : int):
+    simulator = GameSimulator(seed, team_count = team_count, player_count = player_count)
+    return simulator.seats, simulator.play()
+
+def standalone_bots(seats, team_count : int, player_count : int, seed : int):
+    return {
+        seat : LitBot(*seat, team_count, player_count, fake_game_seed = seed, statistics_config = StatisticsConfig.parse("off"))
+        for seat in seats
+    }
+
+def table_of(seats, team_count : int, player_count : int, seed : int) -> LitTable:
+    table = LitTable(team_count, player_count, statistics_config = StatisticsConfig.parse("off"))
+    for seat in seats:
+        table.add_seat(*seat, fake_game_seed = seed)
+    return table
+
+def assert_same_knowledge(seat, bot, move_idx : int) -> None:
+    message = f"seat {seat.team_id, seat.player_id} after move {move_idx}"
+    np.testing.assert_array_equal(seat.information_matrix, bot.information_matrix, err_msg=message)
+    np.testing.assert_array_equal(seat.player_card_count, bot.player_card_count, err_msg=message)
+    np.testing.assert_array_equal(seat.active_sets, bot.active_sets, err_msg=message)
+    np.testing.assert_array_equal(seat.active_cards, bot.active_cards, err_msg=message)
+    np.testing.assert_array_equal(seat.recent_card_array, bot.recent_card_array, err_msg=message)
+
+    seat_store, bot_store = seat.inference_store, bot.inference_store
+    assert seat_store.size == bot_store.size, message
+    assert len(seat_store) == len(bot_store), message
+    np.testing.assert_array_equal(seat_store.status[:seat_store.size], bot_store.status[:bot_store.size], err_msg=message)
+    np.testing.assert_array_equal(seat_store.active_indices(), bot_store.active_indices(), err_msg=message)
+    for name in ("team_ids", "player_ids", "set_ids", "card_ids"):
+        np.testing.assert_array_equal(getattr(seat_store, name)[:seat_store.size], getattr(bot_store, name)[:bot_store.size], err_msg=message)
+
+    np.testing.assert_allclose(seat.prob_matrix, bot.prob_matrix, equal_nan=True, err_msg=message)
+
+@pytest.mark.parametrize("team_count, player_count, seed", CONFIGS)
+def test_seats_match_standalone_bots(team_count, player_count, seed):
+    seats, moves = simulated_game(team_count, player_count, seed)
+    bots = standalone_bots(seats, team_count, player_count, seed)
+    table = table_of(seats, team_count, player_count, seed)
+
+    for move_idx, game_action_dict in enumerate(moves):
+        table.update_game(game_action_dict)
+        for seat_key, bot in bots.items():
+            bot.update_game(game_action_dict)
+            assert_same_knowledge(table.seats[seat_key], bot, move_idx)
+
+@pytest.mark.parametrize("team_count, player_count, seed", CONFIGS)
+def test_table_restored_from_snapshot_mid_game(team_count, player_count, seed):
+    seats, moves = simulated_game(team_count, player_count, seed)
+    bots = standalone_bots(seats, team_count, player_count, seed)
+    half = len(moves)//2
+    for game_action_dict in moves[:half]:
+        for bot in bots.values():
+            bot.update_game(game_action_dict)
+
+    # standalone bots round trip through a snapshot and take their seats at a new table
+    restored = load_game(dump_game(bots), statistics_config = StatisticsConfig.parse("off"))
+    table = LitTable.from_bots(restored, statistics_config = StatisticsConfig.parse("off"))
+    for seat_key, bot in bots.items():
+        assert_same_knowledge(table.seats[seat_key], bot, half - 1)
+
+    for move_idx, game_action_dict in enumerate(moves[half:], start=half):
+        table.update_game(game_action_dict)
+        for seat_key, bot in bots.items():
+            bot.update_game(game_action_dict)
+            assert_same_knowledge(table.seats[seat_key], bot, move_idx)
+
+@pytest.mark.parametrize("team_count, player_count, seed", CONFIGS[::2])
+def test_detached_seats_round_trip_through_snapshot(team_count, player_count, seed):
+    seats, moves = simulated_game(team_count, player_count, seed)
+    bots = standalone_bots(seats, team_count, player_count, seed)
+    table = table_of(seats, team_count, player_count, seed)
+    half = len(moves)//2
+    for game_action_dict in moves[:half]:
+        table.update_game(game_action_dict)
+        for bot in bots.values():
+            bot.update_game(game_action_dict)
+
+    # a table is persisted through its detached seats, the restored bots carry on alone
+    restored = load_game(dump_game({seat_key : seat.detach() for seat_key, seat in table.seats.items()}), statistics_config = StatisticsConfig.parse("off"))
+    for move_idx, game_action_dict in enumerate(moves[half:], start=half):
+        for seat_key, bot in bots.items():
+            bot.update_game(game_action_dict)
+            restored[seat_key].update_game(game_action_dict)
+            assert_same_knowledge(restored[seat_key], bot, move_idx)
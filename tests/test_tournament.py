@@ -0,0 +1,58 @@
+import json
+import numpy as np
+import pytest
+from src.simulation import GameSimulator, TournamentConfig, TournamentCheckpoint, run_tournament
+
+CONFIG = TournamentConfig(player_count = 4, max_moves = 50)
+
+def checkpoint_lines(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f.read().splitlines()]
+
+def test_failed_games_are_not_checkpointed(tmp_path):
+    path = str(tmp_path/"checkpoint.jsonl")
+    with open(path, "w") as f:
+        f.write(json.dumps({"config" : CONFIG.to_dict()}) + "\n")
+        f.write(json.dumps({"seed" : 0, "error" : "KeyboardInterrupt: "}) + "\n")
+
+    checkpoint = TournamentCheckpoint(path, CONFIG)
+    assert checkpoint.results == {}
+    checkpoint.record({"seed" : 1, "error" : "ValueError: "})
+    checkpoint.close()
+
+    # the failed seed is played again on resume and its result replaces the failure
+    report = run_tournament(CONFIG, range(2), checkpoint_path = path)
+    assert report.resumed == 0
+    assert report.summary()["games"] == 2
+    assert set(TournamentCheckpoint(path, CONFIG).results) == {0, 1}
+
+def test_torn_header_starts_a_fresh_checkpoint(tmp_path):
+    path = str(tmp_path/"checkpoint.jsonl")
+    with open(path, "w") as f:
+        f.write(json.dumps({"config" : CONFIG.to_dict()})[:20])
+
+    report = run_tournament(CONFIG, range(2), checkpoint_path = path)
+    assert report.summary()["games"] == 2
+    lines = checkpoint_lines(path)
+    assert lines[0] == {"config" : CONFIG.to_dict()}
+    assert [line["seed"] for line in lines[1:]] == [0, 1]
+
+def test_wrong_call_loses_the_set():
+    game = GameSimulator(0, player_count = 4)
+    set_id = int(np.flatnonzero((game.card_location_array//game.player_per_team_count != 0).any(axis=1))[0])
+    held = game.card_location_array[set_id]//game.player_per_team_count == 0
+    action_dict = game.resolve({"action" : "call_set", "by_team" : 0, "by" : 0, "set_id" : set_id, "card_locations" : {card_id : 0 for card_id in range(6)}})
+
+    assert action_dict["result"] == 0
+    assert game.sets_won.tolist() == [0, 1]
+    assert not game.active_sets[set_id]
+    # only the calling team's cards are laid down where they were
+    assert sorted(action_dict["card_locations"]) == np.flatnonzero(held).tolist()
+    game.broadcast({0 : action_dict})
+
+def test_legacy_seats_finish_every_game():
+    # the legacy bot imports pandas
+    pytest.importorskip("pandas")
+    for bots in (("litbot", "legacy"), ("legacy", "legacy")):
+        report = run_tournament(TournamentConfig(bots = bots, player_count = 4), range(20))
+        assert report.summary()["failed_games"] == 0